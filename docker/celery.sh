@@ -1,3 +1,11 @@
 #!/bin/bash
 
-celery --app=src.celery_main:celery worker -l INFO
\ No newline at end of file
+# CELERY_QUEUES selects the queues consumed by this worker, CELERY_BEAT runs the scheduler in it,
+# exactly one worker of the deployment should have it enabled
+QUEUES=${CELERY_QUEUES:-mail,media,counters,maintenance}
+
+if [ "${CELERY_BEAT:-true}" = "true" ]; then
+  celery --app=src.celery_main:celery worker --beat -Q "$QUEUES" -n "worker.${QUEUES//,/.}@%h" -l INFO
+else
+  celery --app=src.celery_main:celery worker -Q "$QUEUES" -n "worker.${QUEUES//,/.}@%h" -l INFO
+fi
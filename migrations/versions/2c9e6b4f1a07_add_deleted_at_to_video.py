@@ -0,0 +1,26 @@
+"""add deleted at to video
+
+Revision ID: 2c9e6b4f1a07
+Revises: f0c3a8d27b61
+Create Date: 2026-10-18 20:31:09.542118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2c9e6b4f1a07'
+down_revision = 'f0c3a8d27b61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('video', sa.Column('deleted_at', sa.TIMESTAMP(), nullable=True))
+    op.create_index('ix_video_deleted_at', 'video', ['deleted_at'], unique=False,
+                    postgresql_where=sa.text('deleted_at IS NOT NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_video_deleted_at', table_name='video')
+    op.drop_column('video', 'deleted_at')
@@ -0,0 +1,41 @@
+"""add video_stats model
+
+Revision ID: 3b8f1c2d9e47
+Revises: d35326793118
+Create Date: 2026-10-18 12:04:31.527114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8f1c2d9e47'
+down_revision = 'd35326793118'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('video_stats',
+    sa.Column('video_id', sa.UUID(), nullable=False),
+    sa.Column('likes', sa.Integer(), nullable=False),
+    sa.Column('dislikes', sa.Integer(), nullable=False),
+    sa.Column('views', sa.Integer(), nullable=False),
+    sa.Column('comments', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['video_id'], ['video.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('video_id')
+    )
+    op.execute(
+        'INSERT INTO video_stats (video_id, likes, dislikes, views, comments) '
+        'SELECT video.id, '
+        '(SELECT count(*) FROM "like" WHERE "like".video_id = video.id AND "like".status), '
+        '(SELECT count(*) FROM "like" WHERE "like".video_id = video.id AND NOT "like".status), '
+        '(SELECT count(*) FROM view WHERE view.video_id = video.id AND view.viewing_time IS NOT NULL), '
+        '(SELECT count(*) FROM comment WHERE comment.video_id = video.id) '
+        'FROM video'
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('video_stats')
@@ -0,0 +1,24 @@
+"""add subscription subscribed index
+
+Revision ID: 5d1a9e7f3c20
+Revises: c71e5a0b84d2
+Create Date: 2026-10-18 16:52:37.114508
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1a9e7f3c20'
+down_revision = 'c71e5a0b84d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_subscription_subscribed'), 'subscription', ['subscribed'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_subscription_subscribed'), table_name='subscription')
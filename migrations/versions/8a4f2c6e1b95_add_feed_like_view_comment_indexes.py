@@ -0,0 +1,43 @@
+"""add feed, like, view and comment indexes
+
+Revision ID: 8a4f2c6e1b95
+Revises: 5d1a9e7f3c20
+Create Date: 2026-10-18 17:20:48.540913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4f2c6e1b95'
+down_revision = '5d1a9e7f3c20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_video_uploaded_at_id', 'video', ['uploaded_at', 'id'], unique=False)
+    op.create_index('ix_video_owner_uploaded_at_id', 'video', ['owner', 'uploaded_at', 'id'], unique=False)
+    op.create_index('ix_view_video_id_viewed', 'view', ['video_id'], unique=False,
+                    postgresql_where=sa.text('viewing_time IS NOT NULL'))
+    op.create_index('ix_view_owner_id_video_id_viewed_at', 'view', ['owner_id', 'video_id', 'viewed_at'],
+                    unique=False)
+    op.create_index('ix_view_fingerprint_video_id_viewed_at', 'view', ['fingerprint', 'video_id', 'viewed_at'],
+                    unique=False)
+    op.create_index(op.f('ix_comment_video_id'), 'comment', ['video_id'], unique=False)
+    op.create_index('ix_like_video_id_status', 'like', ['video_id', 'status'], unique=False)
+    op.create_index('ix_user_lower_username', 'user', [sa.text('lower(username)')], unique=False)
+    op.create_index('ix_user_lower_email', 'user', [sa.text('lower(email)')], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_lower_email', table_name='user')
+    op.drop_index('ix_user_lower_username', table_name='user')
+    op.drop_index('ix_like_video_id_status', table_name='like')
+    op.drop_index(op.f('ix_comment_video_id'), table_name='comment')
+    op.drop_index('ix_view_fingerprint_video_id_viewed_at', table_name='view')
+    op.drop_index('ix_view_owner_id_video_id_viewed_at', table_name='view')
+    op.drop_index('ix_view_video_id_viewed', table_name='view')
+    op.drop_index('ix_video_owner_uploaded_at_id', table_name='video')
+    op.drop_index('ix_video_uploaded_at_id', table_name='video')
@@ -0,0 +1,28 @@
+"""add updated_at to video_stats
+
+Revision ID: c71e5a0b84d2
+Revises: 3b8f1c2d9e47
+Create Date: 2026-10-18 15:41:09.803262
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c71e5a0b84d2'
+down_revision = '3b8f1c2d9e47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('video_stats', sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text("timezone('utc', now())"),
+                                           nullable=False))
+    op.alter_column('video_stats', 'updated_at', server_default=None)
+    op.create_index(op.f('ix_video_stats_updated_at'), 'video_stats', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_video_stats_updated_at'), table_name='video_stats')
+    op.drop_column('video_stats', 'updated_at')
@@ -0,0 +1,32 @@
+"""add processing status to video
+
+Revision ID: e4b7d1a6c953
+Revises: 8a4f2c6e1b95
+Create Date: 2026-10-18 18:05:12.671204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from src.video.models import ProcessingStatus
+
+# revision identifiers, used by Alembic.
+revision = 'e4b7d1a6c953'
+down_revision = '8a4f2c6e1b95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    processing_status = sa.Enum(ProcessingStatus, name="processingstatus")
+    processing_status.create(op.get_bind(), checkfirst=True)
+    op.add_column('video', sa.Column('processing_status',
+                                     sa.Enum('raw', 'processing', 'ready', 'failed', name='processingstatus'),
+                                     server_default='raw', nullable=False))
+    op.alter_column('video', 'processing_status', server_default=None)
+
+
+def downgrade() -> None:
+    op.drop_column('video', 'processing_status')
+    processing_status = sa.Enum(ProcessingStatus, name="processingstatus")
+    processing_status.drop(op.get_bind())
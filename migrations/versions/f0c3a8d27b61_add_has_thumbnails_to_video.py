@@ -0,0 +1,24 @@
+"""add has thumbnails to video
+
+Revision ID: f0c3a8d27b61
+Revises: e4b7d1a6c953
+Create Date: 2026-10-18 19:42:37.180455
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f0c3a8d27b61'
+down_revision = 'e4b7d1a6c953'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('video', sa.Column('has_thumbnails', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.alter_column('video', 'has_thumbnails', server_default=None)
+
+
+def downgrade() -> None:
+    op.drop_column('video', 'has_thumbnails')
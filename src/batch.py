@@ -0,0 +1,126 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence
+
+import fastapi_jsonrpc as jsonrpc
+from fastapi import BackgroundTasks, Request, Response
+
+from src.config import BATCH_MAX_SIZE, BATCH_CONCURRENCY
+from src.request_cache import RequestCache, token_cache, identity_cache
+
+# methods with these prefixes only read, so they may run concurrently and share what they load
+read_only_prefixes = ('get_', 'count_')
+
+
+class BatchEntrypointRoute(jsonrpc.EntrypointRoute):
+    """
+    Serves a JSON-RPC batch whose calls may belong to any of the entrypoints, as `<entrypoint>.<method>`.
+
+    The calls are answered in order of the batch. Consecutive read only calls run concurrently, at most
+    BATCH_CONCURRENCY at a time, each on its own dependencies, and share the tokens they verify and
+    the videos and subscriptions they read. Any other call runs alone and drops everything shared,
+    since it may have changed it.
+    """
+
+    async def parse_body(self, http_request: Request) -> Any:
+        body = await super().parse_body(http_request)
+        if isinstance(body, list) and len(body) > BATCH_MAX_SIZE:
+            raise jsonrpc.InvalidRequest(data={'errors': [
+                {'loc': (), 'type': 'value_error.batch', 'msg': f'no more than {BATCH_MAX_SIZE} calls in a batch'}
+            ]})
+        return body
+
+    async def handle_body(self,
+                          http_request: Request,
+                          background_tasks: BackgroundTasks,
+                          sub_response: Response,
+                          body: Any,
+                          ) -> dict:
+        shared_dependencies_error = None
+        try:
+            dependency_cache = await self.solve_shared_dependencies(http_request, background_tasks, sub_response)
+        except jsonrpc.BaseError as error:
+            shared_dependencies_error = error
+            dependency_cache = None
+
+        async def handle(req: Any, identities: Optional[RequestCache]) -> dict:
+            identity_cache.set(identities)
+            return await self.handle_req_to_resp(
+                http_request, background_tasks, sub_response, req,
+                dependency_cache=dependency_cache,
+                shared_dependencies_error=shared_dependencies_error,
+            )
+
+        concurrency = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def handle_read_only(req: Any, identities: RequestCache) -> dict:
+            async with concurrency:
+                return await handle(req, identities)
+
+        req_list = body if isinstance(body, list) else [body]
+        resp_list: List[dict] = []
+        reset = token_cache.set(RequestCache())
+        try:
+            read_only: List[Any] = []
+            for req in req_list + [None]:
+                if req is not None and self.is_read_only(req):
+                    read_only.append(req)
+                    continue
+                if read_only:
+                    identities = RequestCache()
+                    # each call runs in a task of its own, so the identity cache is only set for them
+                    resp_list += await asyncio.gather(*[handle_read_only(call, identities) for call in read_only])
+                    read_only = []
+                if req is not None:
+                    resp_list.append(await handle(req, None))
+                    token_cache.set(RequestCache())
+        finally:
+            token_cache.reset(reset)
+
+        # no response for successful notifications
+        resp_list = [resp for resp in resp_list if 'error' in resp or 'id' in resp]
+        if not resp_list:
+            raise jsonrpc.NoContent
+        return resp_list if isinstance(body, list) else resp_list[0]
+
+    async def handle_req(self,
+                         http_request: Request,
+                         background_tasks: BackgroundTasks,
+                         sub_response: Response,
+                         ctx: jsonrpc.JsonRpcContext,
+                         dependency_cache: dict = None,
+                         shared_dependencies_error: jsonrpc.BaseError = None
+                         ):
+        route = self.entrypoint.get_method_route(ctx.request.method)
+        if route is None:
+            raise jsonrpc.MethodNotFound()
+        http_request_shadow = jsonrpc.RequestShadow(http_request)
+        http_request_shadow.scope['path'] = route.path
+        ctx.method_route = route
+        return await route.handle_req(
+            http_request_shadow, background_tasks, sub_response, ctx,
+            dependency_cache=dependency_cache,
+            shared_dependencies_error=shared_dependencies_error,
+        )
+
+    def is_read_only(self, req: Any) -> bool:
+        method = req.get('method') if isinstance(req, dict) else None
+        if not isinstance(method, str):
+            # an invalid call is answered with an error without running anything
+            return True
+        return method.rpartition('.')[2].startswith(read_only_prefixes)
+
+
+class BatchEntrypoint(jsonrpc.Entrypoint):
+    entrypoint_route_class = BatchEntrypointRoute
+
+    def __init__(self, path: str, entrypoints: Sequence[jsonrpc.Entrypoint], **kwargs):
+        super().__init__(path, **kwargs)
+        self.method_routes: Dict[str, jsonrpc.MethodRoute] = {}
+        for entrypoint in entrypoints:
+            prefix = entrypoint.entrypoint_route.path.strip('/')
+            for route in entrypoint.routes:
+                if isinstance(route, jsonrpc.MethodRoute):
+                    self.method_routes[f'{prefix}.{route.name}'] = route
+
+    def get_method_route(self, method: str) -> Optional[jsonrpc.MethodRoute]:
+        return self.method_routes.get(method)
@@ -1,8 +1,70 @@
 import celery
+from kombu import Queue
 
-from src.config import REDIS_HOST, REDIS_PORT
+from src.config import REDIS_HOST, REDIS_PORT, VIDEO_STATS_BUFFERED, VIDEO_STATS_FLUSH_INTERVAL, \
+    POPULARITY_REFRESH_INTERVAL, UPLOAD_EXPIRES, VIDEO_DELETE_COLLECT_INTERVAL, CELERY_QUEUES, \
+    CELERY_VISIBILITY_TIMEOUT, CELERY_MAIL_CONCURRENCY, CELERY_MAIL_PREFETCH, CELERY_MEDIA_CONCURRENCY, \
+    CELERY_MEDIA_PREFETCH, CELERY_COUNTERS_CONCURRENCY, CELERY_COUNTERS_PREFETCH, CELERY_MAINTENANCE_CONCURRENCY, \
+    CELERY_MAINTENANCE_PREFETCH
 
 CELERY_URL = f'redis://{REDIS_HOST}:{REDIS_PORT}'
 
+# concurrency and prefetch multiplier of a worker consuming the queue
+queue_settings = {
+    'mail': (CELERY_MAIL_CONCURRENCY, CELERY_MAIL_PREFETCH),
+    'media': (CELERY_MEDIA_CONCURRENCY, CELERY_MEDIA_PREFETCH),
+    'counters': (CELERY_COUNTERS_CONCURRENCY, CELERY_COUNTERS_PREFETCH),
+    'maintenance': (CELERY_MAINTENANCE_CONCURRENCY, CELERY_MAINTENANCE_PREFETCH),
+}
+
 celery = celery.Celery('celery', broker=CELERY_URL)
-celery.autodiscover_tasks(['src.user.tasks'])
+celery.autodiscover_tasks(['src.mail.tasks', 'src.video.tasks'])
+celery.conf.task_queues = [Queue(name) for name in queue_settings]
+celery.conf.task_default_queue = 'maintenance'
+celery.conf.task_routes = {
+    'src.mail.tasks.*': {'queue': 'mail'},
+    'src.video.tasks.finalize_upload': {'queue': 'media'},
+    'src.video.tasks.transcode_video': {'queue': 'media'},
+    'src.video.tasks.publish_hls': {'queue': 'media'},
+    'src.video.tasks.fail_transcoding': {'queue': 'media'},
+    'src.video.tasks.generate_thumbnails': {'queue': 'media'},
+    'src.video.tasks.delete_videos': {'queue': 'media'},
+    'src.video.tasks.flush_video_stats': {'queue': 'counters'},
+    'src.video.tasks.reconcile_video_stats': {'queue': 'counters'},
+    'src.video.tasks.refresh_popularity_ranking': {'queue': 'counters'},
+    'src.video.tasks.push_to_subscription_feeds': {'queue': 'counters'},
+    'src.video.tasks.add_to_subscription_feed': {'queue': 'counters'},
+    'src.video.tasks.remove_from_subscription_feed': {'queue': 'counters'},
+    'src.video.tasks.collect_*': {'queue': 'maintenance'},
+}
+# a task is acknowledged once it has finished, so the ones of a killed worker are delivered again,
+# the visibility timeout has to outlast the longest task or it would be delivered twice
+celery.conf.task_acks_late = True
+celery.conf.task_reject_on_worker_lost = True
+celery.conf.broker_transport_options = {'visibility_timeout': CELERY_VISIBILITY_TIMEOUT}
+# a worker consuming several queues gets the sum of their concurrency and the smallest prefetch
+consumed = [queue_settings[name] for name in CELERY_QUEUES if name in queue_settings]
+if consumed:
+    celery.conf.worker_concurrency = sum(concurrency for concurrency, _ in consumed)
+    celery.conf.worker_prefetch_multiplier = min(prefetch for _, prefetch in consumed)
+
+celery.conf.beat_schedule = {
+    'refresh-popularity-ranking': {
+        'task': 'src.video.tasks.refresh_popularity_ranking',
+        'schedule': POPULARITY_REFRESH_INTERVAL,
+    },
+    'collect-expired-uploads': {
+        'task': 'src.video.tasks.collect_expired_uploads',
+        'schedule': UPLOAD_EXPIRES,
+    },
+    'collect-deleted-videos': {
+        'task': 'src.video.tasks.collect_deleted_videos',
+        'schedule': VIDEO_DELETE_COLLECT_INTERVAL,
+    },
+}
+
+if VIDEO_STATS_BUFFERED:
+    celery.conf.beat_schedule['flush-video-stats'] = {
+        'task': 'src.video.tasks.flush_video_stats',
+        'schedule': VIDEO_STATS_FLUSH_INTERVAL,
+    }
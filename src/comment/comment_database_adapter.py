@@ -10,6 +10,7 @@ from src.comment.shemas import CommentEdit
 from src.like.models import Like
 from src.user.models import User
 from src.video.models import Video
+from src.video.video_stats_database_adapter import VideoStatsDatabaseAdapter
 
 
 class CommentDatabaseAdapter:
@@ -17,15 +18,18 @@ class CommentDatabaseAdapter:
             self,
             session: AsyncSession,
             comment_table: Type[Comment],
+            video_stats_db: VideoStatsDatabaseAdapter,
     ):
         self.session = session
         self.comment_table = comment_table
+        self.video_stats_db = video_stats_db
 
     async def create(self, create_dict: Dict[str, Any], user_id: uuid.UUID):
         comment = self.comment_table(**create_dict)
         comment.owner_id = user_id
         self.session.add(comment)
-        await self.session.commit()
+        await self.video_stats_db.increment(comment.video_id, comments=1)
+        await self.video_stats_db.commit()
         return comment
 
     async def edit(self, comment: Comment, edited_text: str):
@@ -44,11 +48,13 @@ class CommentDatabaseAdapter:
 
     async def remove(self, comment: Comment):
         statement = delete(self.comment_table).where(self.comment_table.id == comment.id)
-        await self._remove(statement)
+        await self._remove(statement, comment.video_id)
 
-    async def _remove(self, statement: Delete):
-        await self.session.execute(statement)
-        await self.session.commit()
+    async def _remove(self, statement: Delete, video_id: uuid.UUID):
+        results = await self.session.execute(statement)
+        if results.rowcount:
+            await self.video_stats_db.increment(video_id, comments=-results.rowcount)
+        await self.video_stats_db.commit()
 
     async def get_video_comments(self, video: Video):
         comments = await self.session.scalars(video.comments)
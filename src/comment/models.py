@@ -13,7 +13,7 @@ class Comment(Base):
     id: Mapped[pyUUID] = mapped_column(UUID, primary_key=True, default=uuid.uuid4)
     text: Mapped[str] = mapped_column(String(length=5000), nullable=False)
     owner_id: Mapped[pyUUID] = mapped_column(UUID, ForeignKey("user.id"))
-    video_id: Mapped[pyUUID] = mapped_column(UUID, ForeignKey("video.id", ondelete='CASCADE'))
+    video_id: Mapped[pyUUID] = mapped_column(UUID, ForeignKey("video.id", ondelete='CASCADE'), index=True)
     posted_at: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP, default=datetime.utcnow)
     edited_at: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP, nullable=True)
 
@@ -15,14 +15,76 @@ BOTO_ENDPOINT_URL = os.environ.get("BOTO_ENDPOINT_URL")
 AWS_ACCESS_KEY_ID = os.environ.get("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.environ.get("AWS_SECRET_ACCESS_KEY")
 BUCKET_NAME = os.environ.get("BUCKET_NAME")
+S3_MAX_POOL_CONNECTIONS = int(os.environ.get("S3_MAX_POOL_CONNECTIONS", 50))
+S3_KEEPALIVE_TIMEOUT = float(os.environ.get("S3_KEEPALIVE_TIMEOUT", 60))
+UPLOAD_MODE = os.environ.get("UPLOAD_MODE", "streaming")
+UPLOAD_PART_SIZE = int(os.environ.get("UPLOAD_PART_SIZE", 8 * 1024 * 1024))
+UPLOAD_CONCURRENCY = int(os.environ.get("UPLOAD_CONCURRENCY", 4))
+TOKEN_DENYLIST_BLOOM_SIZE = int(os.environ.get("TOKEN_DENYLIST_BLOOM_SIZE", 1_000_000))
+TOKEN_DENYLIST_BLOOM_HASHES = int(os.environ.get("TOKEN_DENYLIST_BLOOM_HASHES", 7))
+TOKEN_DENYLIST_REBUILD_INTERVAL = int(os.environ.get("TOKEN_DENYLIST_REBUILD_INTERVAL", 3600))
+USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", 300))
+USER_CACHE_LOCAL_TTL = int(os.environ.get("USER_CACHE_LOCAL_TTL", 5))
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", 10000))
+UPLOAD_EXPIRES = int(os.environ.get("UPLOAD_EXPIRES", 3600))
+VIDEO_DELETE_RETRIES = int(os.environ.get("VIDEO_DELETE_RETRIES", 8))
+VIDEO_DELETE_COLLECT_INTERVAL = int(os.environ.get("VIDEO_DELETE_COLLECT_INTERVAL", 3600))
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", 20))
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", 4))
+OFFLOAD_MAX_WORKERS = int(os.environ.get("OFFLOAD_MAX_WORKERS", 16))
+OFFLOAD_MEDIAINFO_LIMIT = int(os.environ.get("OFFLOAD_MEDIAINFO_LIMIT", 2))
+OFFLOAD_FINGERPRINT_LIMIT = int(os.environ.get("OFFLOAD_FINGERPRINT_LIMIT", 8))
+OFFLOAD_PASSWORD_LIMIT = int(os.environ.get("OFFLOAD_PASSWORD_LIMIT", 4))
+# seconds between the offload metrics written to the log, 0 turns them off
+OFFLOAD_METRICS_INTERVAL = float(os.environ.get("OFFLOAD_METRICS_INTERVAL", 60))
+PUBLIC_API_URL = os.environ.get("PUBLIC_API_URL", "")
+HLS_ENABLED = os.environ.get("HLS_ENABLED", "true").lower() == "true"
+HLS_SEGMENT_SECONDS = int(os.environ.get("HLS_SEGMENT_SECONDS", 6))
+HLS_PLAYLIST_CACHE_SIZE = int(os.environ.get("HLS_PLAYLIST_CACHE_SIZE", 1000))
+SPRITE_INTERVAL_SECONDS = int(os.environ.get("SPRITE_INTERVAL_SECONDS", 10))
+PRESIGNED_URL_EXPIRES = int(os.environ.get("PRESIGNED_URL_EXPIRES", 3600))
+PRESIGNED_URL_CACHE_SIZE = int(os.environ.get("PRESIGNED_URL_CACHE_SIZE", 10000))
 FINGERPRINT_API_KEY = os.environ.get("FINGERPRINT_API_KEY")
 FINGERPRINT_API_REGION = os.environ.get("FINGERPRINT_API_REGION")
 REDIS_HOST = os.environ.get("REDIS_HOST")
 REDIS_PORT = os.environ.get("REDIS_PORT")
+REDIS_MAX_CONNECTIONS = int(os.environ.get("REDIS_MAX_CONNECTIONS", 64))
+REDIS_POOL_TIMEOUT = int(os.environ.get("REDIS_POOL_TIMEOUT", 5))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.environ.get("REDIS_HEALTH_CHECK_INTERVAL", 30))
+REDIS_SOCKET_TIMEOUT = int(os.environ.get("REDIS_SOCKET_TIMEOUT", 5))
 SMTP_HOST = os.environ.get("SMTP_HOST")
 SMTP_PORT = os.environ.get("SMTP_PORT")
 SMTP_LOGIN = os.environ.get("SMTP_LOGIN")
 SMTP_PASSWORD = os.environ.get("SMTP_PASSWORD")
+MAIL_TRANSPORT = os.environ.get("MAIL_TRANSPORT", "smtp_ssl")
+MAIL_SMTP_TIMEOUT = int(os.environ.get("MAIL_SMTP_TIMEOUT", 30))
+MAIL_POOL_SIZE = int(os.environ.get("MAIL_POOL_SIZE", 1))
+MAIL_RATE_LIMIT = float(os.environ.get("MAIL_RATE_LIMIT", 10))
+MAIL_BATCH_SIZE = int(os.environ.get("MAIL_BATCH_SIZE", 100))
+MAIL_MAX_RETRIES = int(os.environ.get("MAIL_MAX_RETRIES", 5))
+MAIL_RETRY_BACKOFF = int(os.environ.get("MAIL_RETRY_BACKOFF", 10))
+CELERY_QUEUES = os.environ.get("CELERY_QUEUES", "mail,media,counters,maintenance").split(',')
+CELERY_VISIBILITY_TIMEOUT = int(os.environ.get("CELERY_VISIBILITY_TIMEOUT", 6 * 3600))
+CELERY_MAIL_CONCURRENCY = int(os.environ.get("CELERY_MAIL_CONCURRENCY", 2))
+CELERY_MAIL_PREFETCH = int(os.environ.get("CELERY_MAIL_PREFETCH", 4))
+CELERY_MEDIA_CONCURRENCY = int(os.environ.get("CELERY_MEDIA_CONCURRENCY", 1))
+CELERY_MEDIA_PREFETCH = int(os.environ.get("CELERY_MEDIA_PREFETCH", 1))
+CELERY_COUNTERS_CONCURRENCY = int(os.environ.get("CELERY_COUNTERS_CONCURRENCY", 4))
+CELERY_COUNTERS_PREFETCH = int(os.environ.get("CELERY_COUNTERS_PREFETCH", 4))
+CELERY_MAINTENANCE_CONCURRENCY = int(os.environ.get("CELERY_MAINTENANCE_CONCURRENCY", 1))
+CELERY_MAINTENANCE_PREFETCH = int(os.environ.get("CELERY_MAINTENANCE_PREFETCH", 1))
 ORIGINS = os.environ.get("ORIGINS").split(',')
 ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD")
 COOKIE_DOMAIN = os.environ.get("COOKIE_DOMAIN")
+VIDEO_STATS_BUFFERED = os.environ.get("VIDEO_STATS_BUFFERED", "false").lower() == "true"
+VIDEO_STATS_FLUSH_INTERVAL = int(os.environ.get("VIDEO_STATS_FLUSH_INTERVAL", 10))
+VIDEO_STATS_FLUSH_BATCH = int(os.environ.get("VIDEO_STATS_FLUSH_BATCH", 1000))
+# the unique viewers estimate of a video is dropped after it has not been viewed for this many seconds
+VIDEO_STATS_VIEWERS_TTL = int(os.environ.get("VIDEO_STATS_VIEWERS_TTL", 30 * 24 * 3600))
+POPULARITY_VIEW_WEIGHT = float(os.environ.get("POPULARITY_VIEW_WEIGHT", 1))
+POPULARITY_LIKE_WEIGHT = float(os.environ.get("POPULARITY_LIKE_WEIGHT", 5))
+POPULARITY_DECAY_HOURS = float(os.environ.get("POPULARITY_DECAY_HOURS", 24))
+POPULARITY_REFRESH_INTERVAL = int(os.environ.get("POPULARITY_REFRESH_INTERVAL", 60))
+SUBSCRIPTION_FEED_SIZE = int(os.environ.get("SUBSCRIPTION_FEED_SIZE", 500))
+SUBSCRIPTION_FEED_TTL = int(os.environ.get("SUBSCRIPTION_FEED_TTL", 7 * 24 * 3600))
+SUBSCRIPTION_FEED_FANOUT_LIMIT = int(os.environ.get("SUBSCRIPTION_FEED_FANOUT_LIMIT", 10000))
@@ -1,4 +1,5 @@
-from typing import AsyncGenerator
+import asyncio
+from typing import AsyncGenerator, Callable, Awaitable, Any
 
 from sqlalchemy import MetaData
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
@@ -22,3 +23,16 @@ async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 async def get_async_db_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
         yield session
+
+
+def run_with_async_db_session(task: Callable[[AsyncSession], Awaitable[Any]]) -> Any:
+    """Run a coroutine with a fresh db session from synchronous code such as celery tasks."""
+
+    async def run():
+        try:
+            async with async_session_maker() as session:
+                return await task(session)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(run())
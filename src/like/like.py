@@ -4,10 +4,12 @@ from src.like.like_database_adapter import LikeDatabaseAdapter
 from src.like.like_manager import LikeManager
 from src.like.models import Like
 from src.database import get_async_db_session
+from src.video.video_stats import get_video_stats_db
 
 
-async def get_like_db(db_session=Depends(get_async_db_session)):
-    yield LikeDatabaseAdapter(db_session, Like)
+async def get_like_db(db_session=Depends(get_async_db_session),
+                      video_stats_db=Depends(get_video_stats_db)):
+    yield LikeDatabaseAdapter(db_session, Like, video_stats_db)
 
 
 async def get_like_manager(like_db=Depends(get_like_db)):
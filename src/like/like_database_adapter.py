@@ -1,12 +1,14 @@
 import uuid
-from typing import Type, Dict, Any
+from typing import Type, Dict, Any, List
 
 from sqlalchemy import select, Select, delete, Delete
+from sqlalchemy.sql.functions import count
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.like.models import Like
 from src.user.models import User
 from src.video.models import Video
+from src.video.video_stats_database_adapter import VideoStatsDatabaseAdapter
 
 
 class LikeDatabaseAdapter:
@@ -14,20 +16,26 @@ class LikeDatabaseAdapter:
             self,
             session: AsyncSession,
             like_table: Type[Like],
+            video_stats_db: VideoStatsDatabaseAdapter,
     ):
         self.session = session
         self.like_table = like_table
+        self.video_stats_db = video_stats_db
 
     async def create(self, create_dict: Dict[str, Any], user_id: uuid.UUID):
         like = self.like_table(**create_dict)
         like.owner_id = user_id
         self.session.add(like)
-        await self.session.commit()
+        await self._shift_stats(like.video_id, like.status, 1)
+        await self.video_stats_db.commit()
         return like
 
     async def update(self, like: Like, status: bool):
+        if like.status != status:
+            await self._shift_stats(like.video_id, like.status, -1)
+            await self._shift_stats(like.video_id, status, 1)
         like.status = status
-        await self.session.commit()
+        await self.video_stats_db.commit()
 
     async def get(self, user_id: uuid.UUID, video_id: uuid.UUID):
         statement = select(self.like_table).filter(
@@ -40,12 +48,21 @@ class LikeDatabaseAdapter:
 
     async def remove(self, user_id: uuid.UUID, video_id: uuid.UUID):
         statement = delete(self.like_table).where(
-            self.like_table.owner_id == user_id, self.like_table.video_id == video_id)
-        await self._remove(statement)
+            self.like_table.owner_id == user_id, self.like_table.video_id == video_id).returning(
+            self.like_table.status)
+        await self._remove(statement, video_id)
+
+    async def _remove(self, statement: Delete, video_id: uuid.UUID):
+        results = await self.session.execute(statement)
+        for status in results.scalars().all():
+            await self._shift_stats(video_id, status, -1)
+        await self.video_stats_db.commit()
 
-    async def _remove(self, statement: Delete):
-        await self.session.execute(statement)
-        await self.session.commit()
+    async def _shift_stats(self, video_id: uuid.UUID, status: bool, delta: int):
+        if status:
+            await self.video_stats_db.increment(video_id, likes=delta)
+        else:
+            await self.video_stats_db.increment(video_id, dislikes=delta)
 
     async def get_liked_users(self, video: Video):
         liked_users = await self.session.scalars(video.liked_users)
@@ -54,3 +71,20 @@ class LikeDatabaseAdapter:
     async def get_disliked_users(self, video: Video):
         disliked_users = await self.session.scalars(video.disliked_users)
         return disliked_users.all()
+
+    async def count_video_likes(self, video_id: uuid.UUID) -> int:
+        return await self._count(video_id, True)
+
+    async def count_video_dislikes(self, video_id: uuid.UUID) -> int:
+        return await self._count(video_id, False)
+
+    async def _count(self, video_id: uuid.UUID, status: bool) -> int:
+        statement = select(count()).select_from(self.like_table).where(
+            self.like_table.video_id == video_id, self.like_table.status == status)
+        return await self.session.scalar(statement)
+
+    async def get_user_likes(self, user_id: uuid.UUID, video_ids: List[uuid.UUID]):
+        statement = select(self.like_table).where(
+            self.like_table.owner_id == user_id, self.like_table.video_id.in_(video_ids))
+        results = await self.session.execute(statement)
+        return results.scalars().all()
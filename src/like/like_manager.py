@@ -1,4 +1,5 @@
 import uuid
+from typing import List, Dict
 
 from src.like.exceptions import NonExistentLike, SameStatusException
 from src.like.like_database_adapter import LikeDatabaseAdapter
@@ -44,6 +45,13 @@ class LikeManager:
                        ) -> Like:
         return await self.like_db.get(user.id, video.id)
 
+    async def get_rates(self,
+                        user: User,
+                        videos: List[Video]
+                        ) -> Dict[uuid.UUID, Like]:
+        likes = await self.like_db.get_user_likes(user.id, [video.id for video in videos])
+        return {like.video_id: like for like in likes}
+
     async def get_liked_users(self,
                               video: Video
                               ):
@@ -56,10 +64,10 @@ class LikeManager:
 
     async def count_video_likes(self,
                                 video: Video
-                                ):
-        return len(await self.get_liked_users(video))
+                                ) -> int:
+        return await self.like_db.count_video_likes(video.id)
 
     async def count_video_dislikes(self,
                                    video: Video
-                                   ):
-        return len(await self.get_disliked_users(video))
+                                   ) -> int:
+        return await self.like_db.count_video_dislikes(video.id)
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, ForeignKey, UUID
+from sqlalchemy import Boolean, ForeignKey, UUID, Index
 from sqlalchemy.orm import mapped_column, Mapped, relationship, backref
 from uuid import UUID as pyUUID
 from src.database import Base
@@ -6,6 +6,9 @@ from src.database import Base
 
 class Like(Base):
     __tablename__ = "like"
+    __table_args__ = (
+        Index('ix_like_video_id_status', 'video_id', 'status'),
+    )
     status: Mapped[bool] = mapped_column(Boolean, nullable=False)
     owner_id: Mapped[pyUUID] = mapped_column(UUID, ForeignKey("user.id"), primary_key=True)
     video_id: Mapped[pyUUID] = mapped_column(UUID, ForeignKey("video.id", ondelete='CASCADE'), primary_key=True)
@@ -0,0 +1,12 @@
+from email.message import EmailMessage
+
+from src.mail.outbox import MailOutbox
+from src.mail.tasks import deliver_mail
+from src.redis_main import connection
+
+mail_outbox = MailOutbox(connection)
+
+
+async def send_mail(message: EmailMessage):
+    if await mail_outbox.push(message):
+        deliver_mail.delay()
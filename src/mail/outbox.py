@@ -0,0 +1,56 @@
+import json
+from email.message import EmailMessage
+from typing import Dict, List, Tuple, Union
+
+from aioredis import Redis
+
+
+class MailOutbox:
+    """
+    Redis list of the messages waiting for delivery, drained in batches by the deliver_mail task.
+
+    Only one delivery is scheduled at a time: push reports whether the caller has to schedule one,
+    the delivery clears the flag when the outbox is empty and reports whether messages came in meanwhile.
+    A delivery claims a batch by moving it to a processing list and acks every message once it is done with it,
+    the messages left there by a delivery that died are restored by the next one, so none is lost.
+    """
+    key = 'mailOutbox'
+    processing_key = 'mailOutbox:processing'
+    scheduled_key = 'mailOutbox:scheduled'
+    # a lost delivery task does not block the outbox for longer than this
+    scheduled_timeout = 300
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+
+    async def push(self, message: EmailMessage, attempts: int = 0) -> bool:
+        item = json.dumps({'message': message.as_string(), 'attempts': attempts})
+        pipeline = self.redis.pipeline(transaction=False)
+        pipeline.rpush(self.key, item)
+        pipeline.set(self.scheduled_key, 1, ex=self.scheduled_timeout, nx=True)
+        _, schedule = await pipeline.execute()
+        return bool(schedule)
+
+    async def claim(self, count: int) -> List[Tuple[bytes, Dict[str, Union[str, int]]]]:
+        """The next messages of the outbox, as the items to ack and their contents."""
+        pipeline = self.redis.pipeline(transaction=True)
+        for _ in range(count):
+            # aioredis has no lmove, it needs redis 6.2
+            pipeline.execute_command('LMOVE', self.key, self.processing_key, 'LEFT', 'RIGHT')
+        items = await pipeline.execute()
+        return [(item, json.loads(item)) for item in items if item is not None]
+
+    async def ack(self, item: bytes):
+        await self.redis.lrem(self.processing_key, 1, item)
+
+    async def restore(self):
+        """Put the messages claimed by a delivery that did not finish back at the head of the outbox."""
+        while await self.redis.execute_command('LMOVE', self.processing_key, self.key, 'RIGHT', 'LEFT'):
+            pass
+
+    async def finish(self) -> bool:
+        pipeline = self.redis.pipeline(transaction=True)
+        pipeline.delete(self.scheduled_key)
+        pipeline.llen(self.key)
+        _, pending = await pipeline.execute()
+        return pending > 0
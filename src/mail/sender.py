@@ -0,0 +1,84 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from email.message import EmailMessage
+from typing import Callable, Iterator
+
+from src.mail.transport import MailTransport
+
+
+class MailSender:
+    """
+    Pool of transports of a worker process with a limit on the messages sent per second.
+
+    Transports are created lazily, so the pool can be built before the worker forks.
+    A transport that failed is closed and replaced, which reconnects on the next send.
+    """
+
+    def __init__(self, create_transport: Callable[[], MailTransport], pool_size: int, rate_limit: float):
+        self.create_transport = create_transport
+        self.pool_size = pool_size
+        self.interval = 1 / rate_limit if rate_limit else 0
+        self._pool: queue.LifoQueue[MailTransport] = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._next_send = 0.0
+
+    def send(self, message: EmailMessage):
+        self._throttle()
+        with self._transport() as transport:
+            transport.send(message)
+
+    def close(self):
+        while True:
+            try:
+                transport = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            transport.close()
+            with self._lock:
+                self._created -= 1
+
+    @contextmanager
+    def _transport(self) -> Iterator[MailTransport]:
+        transport = self._acquire()
+        try:
+            yield transport
+        except Exception:
+            transport.close()
+            with self._lock:
+                self._created -= 1
+            raise
+        self._pool.put(transport)
+
+    def _acquire(self) -> MailTransport:
+        while True:
+            try:
+                return self._pool.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                create = self._created < self.pool_size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    return self.create_transport()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            # wait for a transport to be returned or for a failed one to free its place
+            try:
+                return self._pool.get(timeout=1)
+            except queue.Empty:
+                pass
+
+    def _throttle(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_send - now
+            self._next_send = max(now, self._next_send) + self.interval
+        if wait > 0:
+            time.sleep(wait)
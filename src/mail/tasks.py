@@ -0,0 +1,75 @@
+import asyncio
+import smtplib
+from email import message_from_string, policy
+
+import aioredis as redis
+from celery.signals import worker_process_shutdown
+
+from src.celery_main import celery
+from src.config import REDIS_HOST, REDIS_PORT, MAIL_POOL_SIZE, MAIL_RATE_LIMIT, MAIL_BATCH_SIZE, MAIL_MAX_RETRIES, \
+    MAIL_RETRY_BACKOFF
+from src.mail.outbox import MailOutbox
+from src.mail.sender import MailSender
+from src.mail.transport import create_transport
+
+mail_sender = MailSender(create_transport, MAIL_POOL_SIZE, MAIL_RATE_LIMIT)
+
+
+def is_permanent(error: Exception) -> bool:
+    """Whether the server refused the message for good with a 5xx reply, sending it again would fail the same way."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, (smtplib.SMTPSenderRefused, smtplib.SMTPDataError)):
+        return error.smtp_code >= 500
+    return False
+
+
+@worker_process_shutdown.connect
+def close_mail_sender(**kwargs):
+    mail_sender.close()
+
+
+@celery.task
+def deliver_mail():
+    asyncio.run(_deliver_mail())
+
+
+@celery.task
+def requeue_mail(message: str, attempts: int):
+    asyncio.run(_requeue_mail(message, attempts))
+
+
+async def _deliver_mail():
+    """
+    Send the outbox in batches over the pooled connections, failed messages are retried with a backoff.
+
+    A message stays claimed until it is sent, refused for good or requeued, so a worker that dies
+    mid batch loses none of them, at worst one is sent twice.
+    """
+    connection = redis.Redis(host=REDIS_HOST, port=REDIS_PORT)
+    outbox = MailOutbox(connection)
+    try:
+        await outbox.restore()
+        while items := await outbox.claim(MAIL_BATCH_SIZE):
+            for item, mail in items:
+                try:
+                    mail_sender.send(message_from_string(mail['message'], policy=policy.default))
+                except (smtplib.SMTPException, OSError) as error:
+                    if not is_permanent(error) and mail['attempts'] < MAIL_MAX_RETRIES:
+                        requeue_mail.apply_async((mail['message'], mail['attempts'] + 1),
+                                                 countdown=MAIL_RETRY_BACKOFF * 2 ** mail['attempts'])
+                await outbox.ack(item)
+        if await outbox.finish():
+            deliver_mail.delay()
+    finally:
+        await connection.close()
+
+
+async def _requeue_mail(message: str, attempts: int):
+    connection = redis.Redis(host=REDIS_HOST, port=REDIS_PORT)
+    try:
+        outbox = MailOutbox(connection)
+        if await outbox.push(message_from_string(message, policy=policy.default), attempts):
+            deliver_mail.delay()
+    finally:
+        await connection.close()
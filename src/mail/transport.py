@@ -0,0 +1,88 @@
+import logging
+import smtplib
+from abc import ABC, abstractmethod
+from email.message import EmailMessage
+from typing import Callable, Dict, Optional
+
+from src.config import SMTP_HOST, SMTP_PORT, SMTP_LOGIN, SMTP_PASSWORD, MAIL_TRANSPORT, MAIL_SMTP_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+
+class MailTransport(ABC):
+    """Delivers messages, keeping whatever connection it needs between the sends."""
+
+    @abstractmethod
+    def send(self, message: EmailMessage):
+        pass
+
+    def close(self):
+        pass
+
+
+class SmtpTransport(MailTransport):
+    """A persistent smtp connection, opened on the first send and reopened once if the server has dropped it."""
+
+    def __init__(self,
+                 host: str,
+                 port: int,
+                 login: Optional[str] = None,
+                 password: Optional[str] = None,
+                 use_ssl: bool = True,
+                 timeout: float = 30):
+        self.host = host
+        self.port = port
+        self.login = login
+        self.password = password
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self._server: Optional[smtplib.SMTP] = None
+
+    def send(self, message: EmailMessage):
+        if self._server is None:
+            self._server = self._connect()
+        try:
+            self._server.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            self._server = self._connect()
+            self._server.send_message(message)
+
+    def close(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except smtplib.SMTPException:
+            pass
+        finally:
+            self._server = None
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.login:
+            server.login(self.login, self.password)
+        return server
+
+
+class ConsoleTransport(MailTransport):
+    """Logs the messages instead of sending them."""
+
+    def send(self, message: EmailMessage):
+        logger.info('%s', message.as_string())
+
+
+# smtp is a plain connection, e.g. to a local debugging server: python -m aiosmtpd -n -l localhost:1025
+transports: Dict[str, Callable[[], MailTransport]] = {
+    'smtp_ssl': lambda: SmtpTransport(SMTP_HOST, int(SMTP_PORT), SMTP_LOGIN, SMTP_PASSWORD,
+                                      timeout=MAIL_SMTP_TIMEOUT),
+    'smtp': lambda: SmtpTransport(SMTP_HOST, int(SMTP_PORT), SMTP_LOGIN, SMTP_PASSWORD, use_ssl=False,
+                                  timeout=MAIL_SMTP_TIMEOUT),
+    'console': ConsoleTransport,
+}
+
+
+def create_transport() -> MailTransport:
+    return transports[MAIL_TRANSPORT]()
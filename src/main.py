@@ -1,21 +1,39 @@
+from contextlib import asynccontextmanager
+
 import fastapi_jsonrpc as jsonrpc
 
 from fastapi import Request
 from starlette.middleware.cors import CORSMiddleware
 from starlette.responses import JSONResponse
 
+from src.batch import BatchEntrypoint
 from src.comment.endpoints import comment_router
 from src.config import ORIGINS
 from src.like.endpoints import like_router
+from src.offload import offloader
+from src.s3 import s3_client
 from src.subscription.endpoints import subscription_router
+from src.user.auth import token_denylist
 from src.user.endpoints import user_router
 from src.user.exceptions import AccessDenied
 from src.video.endpoints import video_router
 from src.video.exceptions import UploadVideoException
 from src.view.endpoints import view_router
 
-app = jsonrpc.API()
 
+@asynccontextmanager
+async def lifespan(app: jsonrpc.API):
+    await s3_client.open()
+    await token_denylist.start()
+    await offloader.start()
+    yield
+    await offloader.stop()
+    await token_denylist.stop()
+    await s3_client.close()
+    offloader.shutdown()
+
+
+app = jsonrpc.API(lifespan=lifespan)
 
 
 def error_handler(request: Request, exc: jsonrpc.BaseError):
@@ -44,3 +62,5 @@ app.bind_entrypoint(like_router)
 app.bind_entrypoint(comment_router)
 app.bind_entrypoint(view_router)
 app.bind_entrypoint(subscription_router)
+app.bind_entrypoint(BatchEntrypoint('/batch', [user_router, video_router, like_router, comment_router, view_router,
+                                               subscription_router]))
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, Optional, TypeVar
+
+from src.config import OFFLOAD_MAX_WORKERS, OFFLOAD_MEDIAINFO_LIMIT, OFFLOAD_FINGERPRINT_LIMIT, \
+    OFFLOAD_PASSWORD_LIMIT, OFFLOAD_METRICS_INTERVAL
+
+T = TypeVar('T')
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OffloadMetrics:
+    queued: int = 0
+    running: int = 0
+    completed: int = 0
+    total_wait_time: float = 0
+    max_wait_time: float = 0
+
+
+class Offloader:
+    """
+    Runs blocking calls on a shared thread pool instead of the event loop.
+
+    Every category of calls has its own concurrency limit, so a burst of one kind
+    (e.g. uploads) cannot take all the threads from another (e.g. logins).
+    Once started, the queue depth and wait times of every category are logged every metrics_interval seconds.
+    """
+
+    def __init__(self, max_workers: int, limits: Dict[str, int], metrics_interval: float = 0):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='offload')
+        self.limits = {category: asyncio.Semaphore(limit) for category, limit in limits.items()}
+        self.metrics = {category: OffloadMetrics() for category in limits}
+        self.metrics_interval = metrics_interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def run(self, category: str, func: Callable[..., T], *args) -> T:
+        metrics = self.metrics[category]
+        semaphore = self.limits[category]
+        queued_at = time.monotonic()
+        metrics.queued += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            metrics.queued -= 1
+        wait_time = time.monotonic() - queued_at
+        metrics.total_wait_time += wait_time
+        metrics.max_wait_time = max(metrics.max_wait_time, wait_time)
+        metrics.running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            metrics.running -= 1
+            metrics.completed += 1
+            semaphore.release()
+
+    def get_metrics(self) -> Dict[str, Dict[str, float]]:
+        return {category: asdict(metrics) | {'average_wait_time': self._get_average_wait_time(metrics)}
+                for category, metrics in self.metrics.items()}
+
+    async def start(self):
+        if self.metrics_interval:
+            self._task = asyncio.create_task(self._log_metrics())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _log_metrics(self):
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            for category, metrics in self.get_metrics().items():
+                logger.info('offload %s: %d queued, %d running, %d completed, wait %.3fs average, %.3fs max',
+                            category, metrics['queued'], metrics['running'], metrics['completed'],
+                            metrics['average_wait_time'], metrics['max_wait_time'])
+
+    def _get_average_wait_time(self, metrics: OffloadMetrics) -> float:
+        # every call past the semaphore has added its wait time
+        started = metrics.running + metrics.completed
+        return metrics.total_wait_time / started if started else 0
+
+
+offloader = Offloader(OFFLOAD_MAX_WORKERS, {
+    'mediainfo': OFFLOAD_MEDIAINFO_LIMIT,
+    'fingerprint': OFFLOAD_FINGERPRINT_LIMIT,
+    'password': OFFLOAD_PASSWORD_LIMIT,
+}, OFFLOAD_METRICS_INTERVAL)
@@ -1,11 +1,21 @@
 import aioredis as redis
-from aioredis.client import Pipeline
 
-from src.config import REDIS_HOST, REDIS_PORT
+from src.config import REDIS_HOST, REDIS_PORT, REDIS_MAX_CONNECTIONS, REDIS_POOL_TIMEOUT, \
+    REDIS_HEALTH_CHECK_INTERVAL, REDIS_SOCKET_TIMEOUT
 
-connection = redis.Redis(host=REDIS_HOST, port=REDIS_PORT)
+# waits for a free connection instead of failing once all of them are checked out,
+# idle connections are pinged before reuse so the ones dropped by the server are replaced
+pool = redis.BlockingConnectionPool(host=REDIS_HOST,
+                                    port=REDIS_PORT,
+                                    max_connections=REDIS_MAX_CONNECTIONS,
+                                    timeout=REDIS_POOL_TIMEOUT,
+                                    health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+                                    socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+                                    socket_keepalive=True,
+                                    retry_on_timeout=True)
+connection = redis.Redis(connection_pool=pool)
 
 
-async def get_async_redis_session() -> Pipeline:
-    async with connection.pipeline(transaction=True) as session:
-        yield session
+async def get_async_redis_session() -> redis.Redis:
+    # a connection is checked out of the pool per command, requests that make none never hold one
+    yield connection
@@ -1,45 +1,34 @@
 from datetime import timedelta
+from typing import Optional
 
+from aioredis import Redis
 from aioredis.client import Pipeline
 
 
 class RedisManager:
-    def __init__(self, redis_session: Pipeline):
-        self.redis_session = redis_session
+    """
+    Commands are sent one by one, each on a connection checked out of the pool only while it runs.
+    Several commands are batched into one round trip with an explicit pipeline.
+    """
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
 
     async def set(self,
                   key: str,
                   value: str,
-                  time: timedelta = None,
-                  execute: bool = False):
-        await self.redis_session.set(key, value, time)
-        if execute:
-            return await self.execute()
+                  time: timedelta = None):
+        return await self.redis.set(key, value, time)
 
-    async def get(self,
-                  key: str,
-                  execute: bool = False):
-        result = await self.redis_session.get(key)
-        if execute:
-            return await self.execute()
-        return result
-
-    async def check_existing(self,
-                             key: str,
-                             execute: bool = False
-                             ):
-        exists = await self.redis_session.exists(key)
-        if execute:
-            return await self.execute()
-        return exists
-
-    async def get_time_exp(self,
-                           key: str,
-                           execute: bool = False):
-        ttl = await self.redis_session.ttl(key)
-        if execute:
-            return await self.execute()
-        return ttl
-
-    async def execute(self):
-        return await self.redis_session.execute()
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.redis.get(key)
+
+    async def check_existing(self, key: str) -> bool:
+        return bool(await self.redis.exists(key))
+
+    async def get_time_exp(self, key: str) -> int:
+        return await self.redis.ttl(key)
+
+    def pipeline(self, transaction: bool = False) -> Pipeline:
+        """Queue commands and send them with `await pipeline.execute()`, wrapped in MULTI/EXEC if transactional."""
+        return self.redis.pipeline(transaction=transaction)
@@ -0,0 +1,45 @@
+import asyncio
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class RequestCache:
+    """
+    Values loaded at most once while serving a request, by what identifies them.
+
+    Concurrent loads of a key wait for the first one and share its result, or its error.
+    """
+
+    def __init__(self):
+        self._values: Dict[Hashable, asyncio.Future] = {}
+
+    async def get(self, key: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+        future = self._values.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._values[key] = future
+            try:
+                future.set_result(await load())
+            except asyncio.CancelledError:
+                del self._values[key]
+                future.cancel()
+                raise
+            except Exception as exc:
+                future.set_exception(exc)
+        return await future
+
+
+# verified tokens, shared by every call of a batch
+token_cache: ContextVar[Optional[RequestCache]] = ContextVar('token_cache', default=None)
+# entities read by the read only calls of a batch, dropped once a call may have changed them
+identity_cache: ContextVar[Optional[RequestCache]] = ContextVar('identity_cache', default=None)
+
+
+async def cached(cache: ContextVar[Optional[RequestCache]], key: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+    """Load through the cache of the current request if it has one, otherwise just load."""
+    request_cache = cache.get()
+    if request_cache is None:
+        return await load()
+    return await request_cache.get(key, load)
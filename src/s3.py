@@ -0,0 +1,45 @@
+from contextlib import AsyncExitStack
+from typing import Optional
+
+import aioboto3
+from aiobotocore.config import AioConfig
+from botocore.client import BaseClient
+
+from src.config import BOTO_SERVICE_NAME, BOTO_ENDPOINT_URL, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, \
+    S3_MAX_POOL_CONNECTIONS, S3_KEEPALIVE_TIMEOUT
+
+s3_session = aioboto3.Session()
+s3_config = AioConfig(max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+                      connector_args={'keepalive_timeout': S3_KEEPALIVE_TIMEOUT})
+
+
+def create_s3_client():
+    return s3_session.client(
+        service_name=BOTO_SERVICE_NAME,
+        endpoint_url=BOTO_ENDPOINT_URL,
+        aws_access_key_id=AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+        config=s3_config,
+    )
+
+
+class S3Client:
+    """A single S3 client per worker process, opened and closed by the app lifespan."""
+
+    def __init__(self):
+        self.client: Optional[BaseClient] = None
+        self._exit_stack = AsyncExitStack()
+
+    async def open(self):
+        self.client = await self._exit_stack.enter_async_context(create_s3_client())
+
+    async def close(self):
+        await self._exit_stack.aclose()
+        self.client = None
+
+
+s3_client = S3Client()
+
+
+async def get_s3_client() -> BaseClient:
+    return s3_client.client
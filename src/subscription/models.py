@@ -8,4 +8,4 @@ from src.database import Base
 class Subscription(Base):
     __tablename__ = "subscription"
     subscriber: Mapped[pyUUID] = mapped_column(UUID, ForeignKey("user.id"), primary_key=True)
-    subscribed: Mapped[pyUUID] = mapped_column(UUID, ForeignKey("user.id"), primary_key=True)
+    subscribed: Mapped[pyUUID] = mapped_column(UUID, ForeignKey("user.id"), primary_key=True, index=True)
@@ -1,4 +1,4 @@
-from typing import Type, Dict, Any
+from typing import Type, Dict, Any, List
 from uuid import UUID
 
 from sqlalchemy import delete, Delete, select, Select
@@ -40,6 +40,12 @@ class SubscriptionDatabaseAdapter:
             self.subscription_table.subscriber == subscriber_id, self.subscription_table.subscribed == subscribed_id)
         return await self._get(statement)
 
+    async def get_subscriber_ids(self, subscribed_id: UUID, limit: int) -> List[UUID]:
+        statement = select(self.subscription_table.subscriber).where(
+            self.subscription_table.subscribed == subscribed_id).limit(limit)
+        results = await self.session.scalars(statement)
+        return results.all()
+
     async def _get(self, statement: Select):
         results = await self.session.execute(statement)
         return results.unique().scalar_one_or_none()
@@ -1,9 +1,11 @@
 from uuid import UUID
 
 from src.subscription.exceptions import NonExistentSubscription, SubscribeException, UnSubscribeException
+from src.request_cache import cached, identity_cache
 from src.user.models import User
 from src.subscription.shemas import BaseSubscription
 from src.subscription.subscription_database_adapter import SubscriptionDatabaseAdapter
+from src.video.tasks import add_to_subscription_feed, remove_from_subscription_feed
 
 
 class SubscriptionManager:
@@ -22,6 +24,7 @@ class SubscriptionManager:
         if subscription:
             raise SubscribeException(data={'reason': 'You have already subscribed'})
         await self.subscription_db.create(subscribed_id, user.id)
+        add_to_subscription_feed.delay(str(user.id), str(subscribed_id))
 
     async def unsubscribe(self,
                           subscribed_id: UUID,
@@ -32,6 +35,7 @@ class SubscriptionManager:
         if not subscription:
             raise NonExistentSubscription
         await self.subscription_db.remove(subscribed_id, user.id)
+        remove_from_subscription_feed.delay(str(user.id), str(subscribed_id))
 
     async def get_user_subscribed(self,
                                   subscriber: User,
@@ -41,4 +45,8 @@ class SubscriptionManager:
     async def check_subscription(self,
                                  subscriber: UUID,
                                  subscribed: UUID):
-        return True if await self.subscription_db.get(subscriber, subscribed) else False
+        async def load() -> bool:
+            return await self.subscription_db.get(subscriber, subscribed) is not None
+
+        # only whether it exists is shared, the subscription belongs to the session that read it
+        return await cached(identity_cache, ('subscription', subscriber, subscribed), load)
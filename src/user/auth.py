@@ -4,8 +4,12 @@ from src.user.authentication_backend import AdvancedAuthenticationBackend
 from src.user.authenticator import Authenticator
 from src.user.token_manager import TokenManager
 from src.user.auth_user_manager import AuthUserManager
-from src.config import SECRET, COOKIE_DOMAIN
-from src.user.user import get_auth_user_manager, get_user_manager
+from src.config import SECRET, COOKIE_DOMAIN, TOKEN_DENYLIST_BLOOM_SIZE, TOKEN_DENYLIST_BLOOM_HASHES, \
+    TOKEN_DENYLIST_REBUILD_INTERVAL
+from src.redis_main import connection
+from src.user.session_registry import SessionRegistry
+from src.user.token_denylist import TokenDenylist
+from src.user.user import get_user_db
 
 
 class Settings(BaseModel):
@@ -19,6 +23,8 @@ class Settings(BaseModel):
     # Change to 'lax' in production to make your website more secure from CSRF Attacks, default is None
     cookie_samesite: str = 'lax'
     cookie_domain: str = COOKIE_DOMAIN
+    # Check access and refresh tokens against the redis denylist
+    denylist_enabled: bool = True
 
 
 @Authenticator.load_config
@@ -31,10 +37,15 @@ def get_config():
     return Settings()
 
 
+token_denylist = TokenDenylist(connection, TOKEN_DENYLIST_BLOOM_SIZE, TOKEN_DENYLIST_BLOOM_HASHES,
+                               TOKEN_DENYLIST_REBUILD_INTERVAL)
+Authenticator.token_denylist_loader(token_denylist)
+
 token_manager = TokenManager()
-advanced_authentication_backend = AdvancedAuthenticationBackend(token_manager)
+advanced_authentication_backend = AdvancedAuthenticationBackend(token_manager, SessionRegistry(connection),
+                                                                token_denylist)
 
-adv_auth = Authenticator(get_user_manager)
+adv_auth = Authenticator(get_user_db)
 
 access_user = adv_auth.authenticate_current_user(token_type="access")
 access_superuser = adv_auth.authenticate_current_user(token_type="access", superuser=True)
@@ -3,6 +3,8 @@ from typing import Callable, List
 from datetime import timedelta
 
 from src.user.auth_load_config import LoadConfig
+from src.user.token_denylist import TokenDenylist
+from src.user.token_verifier import TokenVerifier
 
 
 class AuthConfig:
@@ -15,9 +17,13 @@ class AuthConfig:
     _encode_issuer = None
     _decode_issuer = None
     _decode_audience = None
+    _decode_cache_size = 10000
+    _decode_cache_ttl = 60
+    _token_verifier = None
     _denylist_enabled = False
     _denylist_token_checks = {'access', 'refresh'}
     _token_in_denylist_callback = None
+    _token_denylist = None
     _access_token_expires = timedelta(minutes=15)
     _refresh_token_expires = timedelta(days=30)
 
@@ -52,6 +58,8 @@ class AuthConfig:
             cls._encode_issuer = config.encode_issuer
             cls._decode_issuer = config.decode_issuer
             cls._decode_audience = config.decode_audience
+            cls._decode_cache_size = config.decode_cache_size
+            cls._decode_cache_ttl = config.decode_cache_ttl
             cls._denylist_enabled = config.denylist_enabled
             cls._denylist_token_checks = config.denylist_token_checks
             cls._access_token_expires = config.access_token_expires
@@ -74,6 +82,11 @@ class AuthConfig:
             cls._access_csrf_header_name = config.access_csrf_header_name
             cls._refresh_csrf_header_name = config.refresh_csrf_header_name
             cls._csrf_methods = config.csrf_methods
+
+            cls._token_verifier = TokenVerifier(cls._secret_key, cls._public_key,
+                                                cls._decode_algorithms or [cls._algorithm],
+                                                cls._decode_audience, cls._decode_leeway,
+                                                cls._decode_cache_size, cls._decode_cache_ttl)
         except ValidationError:
             raise
         except Exception:
@@ -92,3 +105,11 @@ class AuthConfig:
         or *`False`* otherwise.
         """
         cls._token_in_denylist_callback = callback
+
+    @classmethod
+    def token_denylist_loader(cls, denylist: TokenDenylist):
+        """
+        Sets the built-in redis denylist, checked instead of the callback of token_in_denylist_loader.
+        Revoking the tokens of a request requires it.
+        """
+        cls._token_denylist = denylist
@@ -19,6 +19,8 @@ class LoadConfig(BaseModel):
     encode_issuer: Optional[StrictStr] = None
     decode_issuer: Optional[StrictStr] = None
     decode_audience: Optional[Union[StrictStr, Sequence[StrictStr]]] = None
+    decode_cache_size: Optional[StrictInt] = 10000
+    decode_cache_ttl: Optional[StrictInt] = 60
     denylist_enabled: Optional[StrictBool] = False
     denylist_token_checks: Optional[Sequence[StrictStr]] = {'access', 'refresh'}
     access_token_expires: Optional[Union[StrictBool, StrictInt, timedelta]] = timedelta(minutes=15)
@@ -4,13 +4,15 @@ from datetime import timedelta
 from typing import Optional
 from fastapi_users.password import PasswordHelperProtocol, PasswordHelper
 
+from src.mail.mail import send_mail
+from src.offload import offloader
 from src.redis_manager.redis_manager import RedisManager
 from src.user.exceptions import UserAlreadyExists, InvalidPassword, LoginBadCredentials, InvalidField, \
     UserVerifyException
 from src.user.shemas import UserLogin, UserCreate
 from src.user.models import User
 from src.user.user_database_adapter import UserDatabaseAdapter
-from src.user.tasks import send_verify_mail
+from src.user.mails import get_email_template
 import re
 
 
@@ -50,7 +52,7 @@ class AuthUserManager:
             else user_create.create_update_dict_superuser()
         )
         password = user_dict.pop("password")
-        user_dict["hashed_password"] = self.password_helper.hash(password)
+        user_dict["hashed_password"] = await offloader.run('password', self.password_helper.hash, password)
         user_dict["username"] = user_dict["username"].lower()
 
         created_user = await self.user_db.create(user_dict)
@@ -63,16 +65,15 @@ class AuthUserManager:
             self,
             credentials: UserLogin
     ) -> User:
-        user = await self.user_db.get_by_email(credentials.username) or await self.user_db.get_by_username(
-            credentials.username)
+        user = await self.user_db.get_by_email_or_username(credentials.username)
         if user is None:
             # Run the hasher to mitigate timing attack
             # Inspired from Django: https://code.djangoproject.com/ticket/20760
-            self.password_helper.hash(credentials.password)
+            await offloader.run('password', self.password_helper.hash, credentials.password)
             raise LoginBadCredentials
 
-        verified, updated_password_hash = self.password_helper.verify_and_update(
-            credentials.password, user.hashed_password
+        verified, updated_password_hash = await offloader.run(
+            'password', self.password_helper.verify_and_update, credentials.password, user.hashed_password
         )
         if not verified:
             raise LoginBadCredentials
@@ -83,15 +84,15 @@ class AuthUserManager:
         return user
 
     async def verify(self, user: User, token: UUID):
-        verify_token = await self.redis_manager.get(f'verifyUser:{user.id}:UUID', execute=True)
-        if not verify_token[0]:
+        verify_token = await self.redis_manager.get(f'verifyUser:{user.id}:UUID')
+        if not verify_token:
             raise UserVerifyException(data={'reason': 'Link has expired'})
-        if verify_token[0].decode('utf-8') != str(token):
+        if verify_token.decode('utf-8') != str(token):
             raise UserVerifyException(data={'reason': 'Invalid verification token'})
 
     async def update_verify(self, user: User):
-        exp_time = await self.redis_manager.get_time_exp(f'verifyUser:{user.id}:UUID', execute=True)
-        if timedelta(seconds=exp_time[0]) > timedelta(minutes=14):
+        exp_time = await self.redis_manager.get_time_exp(f'verifyUser:{user.id}:UUID')
+        if timedelta(seconds=exp_time) > timedelta(minutes=14):
             raise UserVerifyException(data={'reason': 'You can\'t update the link right away'})
         await self.on_after_register(user)
 
@@ -130,22 +131,10 @@ class AuthUserManager:
         elif len(field) > max_len:
             raise InvalidField(data={'details': f'{field_name} must contain no more than {max_len} characters'})
 
-    async def on_after_logout(
-            self,
-            user: User,
-    ) -> None:
-        await self.user_db.update(user, {"is_active": False})
-
-    async def on_after_login(
-            self,
-            user: User,
-    ) -> None:
-        await self.user_db.update(user, {"is_active": True})
-
     async def on_after_register(self,
                                 user: User,
                                 ) -> None:
         token = str(uuid.uuid4())
-        await self.redis_manager.set(f'verifyUser:{user.id}:UUID', token, timedelta(minutes=15), execute=True)
+        await self.redis_manager.set(f'verifyUser:{user.id}:UUID', token, timedelta(minutes=15))
         user_data = {'id': user.id, 'username': user.username, 'email': user.email, 'token': token}
-        send_verify_mail.delay(user_data)
+        await send_mail(get_email_template(user_data))
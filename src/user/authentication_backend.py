@@ -1,27 +1,70 @@
+import uuid
+from typing import Dict, Optional, Union
+
+import jwt
 from fastapi import Response
+from src.user.exceptions import AccessDenied
 from src.user.models import User
+from src.user.session_registry import SessionRegistry
+from src.user.token_denylist import TokenDenylist
 from src.user.token_manager import TokenManager
 
 
 class AdvancedAuthenticationBackend:
-    def __init__(self, token_manager: TokenManager):
+    def __init__(self, token_manager: TokenManager, session_registry: SessionRegistry, token_denylist: TokenDenylist):
         self.token_manager = token_manager
+        self.session_registry = session_registry
+        self.token_denylist = token_denylist
 
-    def advanced_login(self, response: Response, user: User):
+    async def advanced_login(self, response: Response, user: User):
         # if user is None:  # or user.is_active
         #     raise LoginBadCredentials
-        jwt_access_token, csrf_access_token = self.token_manager.create_access_tokens(subject=user.id)
-        jwt_refresh_token, csrf_refresh_token = self.token_manager.create_refresh_tokens(subject=user.id)
+        session_id = str(uuid.uuid4())
+        tokens = self._set_tokens(response, user, session_id)
+        await self.session_registry.add(user.id, session_id, tokens)
 
-        self.token_manager.set_access_cookies(jwt_access_token, csrf_access_token, response=response)
-        self.token_manager.set_refresh_cookies(jwt_refresh_token, csrf_refresh_token, response=response)
+    async def refresh(self, response: Response, user: User, refresh_token: Dict[str, Union[str, int, bool]]):
+        session_id = refresh_token.get('sid')
+        if session_id is None:
+            raise AccessDenied
+        tokens = self._set_tokens(response, user, session_id)
+        previous = await self.session_registry.replace(user.id, session_id, tokens)
+        if previous is None:
+            # the session has been ended meanwhile, the new tokens are not kept
+            await self._revoke(tokens)
+            raise AccessDenied
+        await self._revoke(previous)
+
+    async def advanced_logout(self, response: Response, user: User, session_id: Optional[str] = None):
+        if session_id is not None:
+            tokens = await self.session_registry.remove(user.id, session_id)
+            if tokens is not None:
+                await self._revoke(tokens)
+        self.token_manager.unset_jwt_cookies(response=response)
 
-    def refresh(self, response: Response, user: User):
-        jwt_access_token, csrf_access_token = self.token_manager.create_access_tokens(subject=user.id)
-        jwt_refresh_token, csrf_refresh_token = self.token_manager.create_refresh_tokens(subject=user.id)
+    async def logout_everywhere(self, response: Response, user: User):
+        for tokens in await self.session_registry.remove_all(user.id):
+            await self._revoke(tokens)
+        self.token_manager.unset_jwt_cookies(response=response)
+
+    async def count_sessions(self, user: User) -> int:
+        return await self.session_registry.count(user.id)
+
+    def _set_tokens(self, response: Response, user: User, session_id: str) -> Dict[str, Union[str, int]]:
+        """Issue and set a pair of tokens of the session, returns their ids and expiry times."""
+        jwt_access_token, csrf_access_token = self.token_manager.create_access_tokens(
+            subject=user.id, user_claims={'sid': session_id})
+        jwt_refresh_token, csrf_refresh_token = self.token_manager.create_refresh_tokens(
+            subject=user.id, user_claims={'sid': session_id})
 
         self.token_manager.set_access_cookies(jwt_access_token, csrf_access_token, response=response)
         self.token_manager.set_refresh_cookies(jwt_refresh_token, csrf_refresh_token, response=response)
 
-    def advanced_logout(self, response: Response):
-        self.token_manager.unset_jwt_cookies(response=response)
+        access_claims = jwt.decode(jwt_access_token, options={'verify_signature': False})
+        refresh_claims = jwt.decode(jwt_refresh_token, options={'verify_signature': False})
+        return {'access_jti': access_claims['jti'], 'access_exp': access_claims['exp'],
+                'refresh_jti': refresh_claims['jti'], 'refresh_exp': refresh_claims['exp']}
+
+    async def _revoke(self, tokens: Dict[str, Union[str, int]]):
+        await self.token_denylist.revoke(tokens['access_jti'], tokens['access_exp'])
+        await self.token_denylist.revoke(tokens['refresh_jti'], tokens['refresh_exp'])
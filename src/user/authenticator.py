@@ -1,24 +1,26 @@
 import hmac
+import uuid
 import jwt
 import fastapi_jsonrpc as jsonrpc
 from fastapi.security import APIKeyCookie, APIKeyHeader
 from fastapi import Depends
 from typing import Optional, Union, Dict, List, cast, Callable
 from inspect import Signature, Parameter
-from fastapi import WebSocket
+from fastapi import WebSocket, Request
 from makefun import with_signature
 
+from src.request_cache import cached, token_cache
 from src.user.auth_config import AuthConfig
 from src.user.exceptions import InvalidAuthenticate, AccessDenied
 from src.user.models import User
-from src.user.user_manager import UserManager
+from src.user.user_database_adapter import UserDatabaseAdapter
 
 
 class Authenticator(AuthConfig):
     def __init__(
             self,
-            get_user_manager: Callable = None):
-        self.get_user_manager = get_user_manager
+            get_user_db: Callable = None):
+        self.get_user_db = get_user_db
 
     def authenticate_current_user(self,
                                   token_type: str = None,
@@ -54,7 +56,7 @@ class Authenticator(AuthConfig):
 
     async def authenticate(self,
                            *args,
-                           user_manager: UserManager,
+                           user_db: UserDatabaseAdapter,
                            token_type: str,
                            jwt_token_name: str,
                            csrf_token_name: str,
@@ -66,7 +68,7 @@ class Authenticator(AuthConfig):
                            ) -> Optional[User]:
         token, csrf = kwargs[jwt_token_name], kwargs[csrf_token_name]
         if token is not None and csrf is not None:
-            user = await self.read_token(token_type, token, csrf, user_manager)
+            user = await self.read_token(token_type, token, csrf, user_db)
             if active and not user.is_active:
                 raise InvalidAuthenticate(data={'reason': 'Current user is not authorized'})
             elif verified and not user.is_verified:
@@ -83,17 +85,26 @@ class Authenticator(AuthConfig):
                          token_type: str,
                          token: Optional[str] = None,
                          csrf_token: Optional[str] = None,
-                         user_manager: UserManager = None,
+                         user_db: UserDatabaseAdapter = None,
                          ):
         token = await self.get_token(token_type, token, csrf_token)
-        user_id = token['sub']
-        return await user_manager.get(user_id)
+        user_id = uuid.UUID(token['sub'])
+        return await user_db.get_cached(user_id)
 
     async def get_token(self,
                         token_type: str,
                         token: Union[str, WebSocket],
                         csrf_token: Optional[str] = None,
                         fresh: Optional[bool] = False, ):
+        # the calls of a batch authenticate with the same cookies, their tokens are verified once
+        return await cached(token_cache, ('token', token_type, token, csrf_token, fresh),
+                            lambda: self._get_token(token_type, token, csrf_token, fresh))
+
+    async def _get_token(self,
+                         token_type: str,
+                         token: Union[str, WebSocket],
+                         csrf_token: Optional[str] = None,
+                         fresh: Optional[bool] = False, ):
         decoded_token = await self.get_decoded_token(token_type, token, fresh)
         if self._cookie_csrf_protect and csrf_token:
             if 'csrf' not in decoded_token:
@@ -109,7 +120,7 @@ class Authenticator(AuthConfig):
             fresh: Optional[bool] = False
     ) -> Dict[str, Union[str, int, bool]]:
         issuer = self._decode_issuer if token_type == 'access' else None
-        decoded_token = self.verify_token(token, issuer)
+        decoded_token = await self.verify_token(token, issuer)
 
         if decoded_token['type'] != token_type:
             raise InvalidAuthenticate(data={'reason': f'Only {token_type} tokens are allowed'})
@@ -118,17 +129,40 @@ class Authenticator(AuthConfig):
             raise InvalidAuthenticate(data={'reason': f'Fresh token required'})
         return decoded_token
 
-    def verify_token(
+    async def verify_token(
             self,
             encoded_token: str,
             issuer: Optional[str] = None
     ) -> Dict[str, Union[str, int, bool]]:
         decoded_token = self._verify_token(encoded_token, issuer)
         if decoded_token['type'] in self._denylist_token_checks:
-            self._check_token_is_revoked(decoded_token)
+            await self._check_token_is_revoked(decoded_token)
 
         return decoded_token
 
+    async def revoke_tokens(self,
+                            request: Request
+                            ) -> None:
+        """Add the access and refresh tokens of the request to the denylist until they expire."""
+        for token_type in ('access', 'refresh'):
+            decoded_token = self.get_request_token(request, token_type)
+            if decoded_token is not None:
+                await self._token_denylist.revoke(decoded_token['jti'], decoded_token.get('exp'))
+
+    def get_request_token(self,
+                          request: Request,
+                          token_type: str
+                          ) -> Optional[Dict[str, Union[str, int, bool]]]:
+        """The decoded token of the type from the cookies of the request, None if it is missing or invalid."""
+        token = request.cookies.get(self._access_cookie_key if token_type == 'access' else self._refresh_cookie_key)
+        if token is None:
+            return None
+        try:
+            decoded_token = self._verify_token(token)
+        except InvalidAuthenticate:
+            return None
+        return decoded_token if decoded_token['type'] == token_type else None
+
     def get_unverified_headers(
             self,
             encoded_token: str
@@ -140,21 +174,8 @@ class Authenticator(AuthConfig):
             encoded_token: str,
             issuer: Optional[str] = None
     ) -> Dict[str, Union[str, int, bool]]:
-        algorithms = self._decode_algorithms or [self._algorithm]
-
         try:
-            self.get_unverified_headers(encoded_token)
-        except Exception as err:
-            raise InvalidAuthenticate(data={'reason': str(err)})
-        try:
-            return jwt.decode(
-                encoded_token,
-                self._secret_key,
-                issuer=issuer,
-                audience=self._decode_audience,
-                leeway=self._decode_leeway,
-                algorithms=algorithms
-            )
+            return self._token_verifier.verify(encoded_token, issuer)
         except Exception as err:
             raise InvalidAuthenticate(data={'reason': str(err)})
 
@@ -165,9 +186,9 @@ class Authenticator(AuthConfig):
     ) -> Signature:
         parameters: List[Parameter] = [
             Parameter(
-                name="user_manager",
+                name="user_db",
                 kind=Parameter.POSITIONAL_OR_KEYWORD,
-                default=Depends(self.get_user_manager),
+                default=Depends(self.get_user_db),
             ),
             Parameter(
                 name=jwt_token_cookie_name,
@@ -183,12 +204,16 @@ class Authenticator(AuthConfig):
 
         return Signature(parameters)
 
-    def _check_token_is_revoked(
+    async def _check_token_is_revoked(
             self,
             raw_token: Dict[str, Union[str, int, bool]]
     ) -> None:
         if not self._denylist_enabled:
             return
 
-        if self._token_in_denylist_callback.__func__(raw_token):
+        if self._token_denylist is not None:
+            revoked = await self._token_denylist.is_revoked(raw_token['jti'])
+        else:
+            revoked = self._token_in_denylist_callback.__func__(raw_token)
+        if revoked:
             raise InvalidAuthenticate(data={'reason': 'Token has been revoked'})
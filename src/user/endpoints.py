@@ -2,10 +2,10 @@ from typing import List
 from uuid import UUID
 
 import fastapi_jsonrpc as jsonrpc
-from fastapi import Depends
+from fastapi import Depends, Request
 from starlette.responses import Response
 
-from src.user.auth import advanced_authentication_backend, access_user, refresh_user, optional_access_user
+from src.user.auth import advanced_authentication_backend, access_user, refresh_user, optional_access_user, adv_auth
 from src.user.exceptions import NonExistentUser, UserVerifyException
 from src.user.models import User
 from src.user.shemas import UserCreate, UserRead, UserLogin
@@ -29,25 +29,42 @@ async def login(response: Response,
                 user_manager: UserManager = Depends(get_user_manager),
                 ) -> UserRead:
     user = await user_manager.authenticate(credentials)
-    advanced_authentication_backend.advanced_login(response, user)
-    await user_manager.on_after_login(user)
+    await advanced_authentication_backend.advanced_login(response, user)
     return user
 
 
 @user_router.method(tags=['user'])
-async def logout(response: Response,
+async def logout(request: Request,
+                 response: Response,
                  user: User = Depends(access_user),
-                 user_manager: UserManager = Depends(get_user_manager),
                  ) -> None:
-    advanced_authentication_backend.advanced_logout(response)
-    await user_manager.on_after_logout(user)
+    access_token = adv_auth.get_request_token(request, 'access')
+    await adv_auth.revoke_tokens(request)
+    await advanced_authentication_backend.advanced_logout(response, user, access_token and access_token.get('sid'))
+
+
+@user_router.method(tags=['user'])
+async def logout_everywhere(request: Request,
+                            response: Response,
+                            user: User = Depends(access_user),
+                            ) -> None:
+    await adv_auth.revoke_tokens(request)
+    await advanced_authentication_backend.logout_everywhere(response, user)
+
+
+@user_router.method(tags=['user'])
+async def count_active_sessions(user: User = Depends(access_user),
+                                ) -> int:
+    return await advanced_authentication_backend.count_sessions(user)
 
 
 @user_router.method(tags=['user'])
-async def refresh(response: Response,
+async def refresh(request: Request,
+                  response: Response,
                   user: User = Depends(refresh_user),
                   ) -> None:
-    return advanced_authentication_backend.refresh(response, user)
+    refresh_token = adv_auth.get_request_token(request, 'refresh')
+    await advanced_authentication_backend.refresh(response, user, refresh_token or {})
 
 
 @user_router.method(tags=['user'])
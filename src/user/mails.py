@@ -1,8 +1,6 @@
-import smtplib
 from email.message import EmailMessage
 
-from src.celery_main import celery
-from src.config import SMTP_HOST, SMTP_PORT, SMTP_LOGIN, SMTP_PASSWORD, ORIGINS
+from src.config import SMTP_LOGIN, ORIGINS
 
 
 def get_email_template(user_data: dict):
@@ -19,11 +17,3 @@ def get_email_template(user_data: dict):
         subtype='html'
     )
     return email
-
-
-@celery.task
-def send_verify_mail(user_data: dict):
-    email = get_email_template(user_data)
-    with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT) as server:
-        server.login(SMTP_LOGIN, SMTP_PASSWORD)
-        server.send_message(email)
@@ -4,7 +4,7 @@ from datetime import datetime
 from typing import List
 
 from fastapi_users_db_sqlalchemy import SQLAlchemyBaseUserTableUUID, GUID, UUID_ID
-from sqlalchemy import TIMESTAMP, Boolean, String, UUID
+from sqlalchemy import TIMESTAMP, Boolean, String, UUID, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship, backref
 
 from src.database import Base
@@ -12,6 +12,10 @@ from src.database import Base
 
 class User(Base):
     __tablename__ = "user"
+    __table_args__ = (
+        Index('ix_user_lower_username', text('lower(username)')),
+        Index('ix_user_lower_email', text('lower(email)')),
+    )
 
     id: Mapped[pyUUID] = mapped_column(UUID, primary_key=True, default=uuid.uuid4)
     name: Mapped[str] = mapped_column(String(length=64), nullable=False)
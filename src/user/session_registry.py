@@ -0,0 +1,72 @@
+import time
+import uuid
+from typing import Dict, List, Optional, Union
+
+from aioredis import Redis
+
+
+class SessionRegistry:
+    """
+    Login sessions of the users in redis.
+
+    A session lives as long as its refresh token and keeps the ids and expiry times of the latest
+    access and refresh tokens issued for it, so ending a session can revoke exactly those tokens.
+    Every user has a sorted set of session ids scored by their expiry.
+    """
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+
+    def get_user_key(self, user_id: uuid.UUID) -> str:
+        return f'userSessions:{user_id}'
+
+    def get_key(self, session_id: str) -> str:
+        return f'userSession:{session_id}'
+
+    async def add(self, user_id: uuid.UUID, session_id: str, tokens: Dict[str, Union[str, int]]):
+        pipeline = self.redis.pipeline(transaction=True)
+        pipeline.hset(self.get_key(session_id), mapping=tokens)
+        pipeline.expireat(self.get_key(session_id), tokens['refresh_exp'])
+        pipeline.zadd(self.get_user_key(user_id), {session_id: tokens['refresh_exp']})
+        pipeline.zremrangebyscore(self.get_user_key(user_id), '-inf', time.time())
+        pipeline.expireat(self.get_user_key(user_id), tokens['refresh_exp'])
+        await pipeline.execute()
+
+    async def replace(self,
+                      user_id: uuid.UUID,
+                      session_id: str,
+                      tokens: Dict[str, Union[str, int]]
+                      ) -> Optional[Dict[str, Union[str, int]]]:
+        """Store the tokens of a refreshed session, returns the previous ones or None if the session has ended."""
+        previous = await self.redis.hgetall(self.get_key(session_id))
+        if not previous:
+            return None
+        await self.add(user_id, session_id, tokens)
+        return self._decode(previous)
+
+    async def remove(self, user_id: uuid.UUID, session_id: str) -> Optional[Dict[str, Union[str, int]]]:
+        pipeline = self.redis.pipeline(transaction=True)
+        pipeline.hgetall(self.get_key(session_id))
+        pipeline.delete(self.get_key(session_id))
+        pipeline.zrem(self.get_user_key(user_id), session_id)
+        tokens, _, _ = await pipeline.execute()
+        return self._decode(tokens) if tokens else None
+
+    async def remove_all(self, user_id: uuid.UUID) -> List[Dict[str, Union[str, int]]]:
+        session_ids = [session_id.decode('utf-8') for session_id in
+                       await self.redis.zrange(self.get_user_key(user_id), 0, -1)]
+        pipeline = self.redis.pipeline(transaction=True)
+        for session_id in session_ids:
+            pipeline.hgetall(self.get_key(session_id))
+        pipeline.delete(self.get_user_key(user_id), *[self.get_key(session_id) for session_id in session_ids])
+        results = await pipeline.execute()
+        return [self._decode(tokens) for tokens in results[:-1] if tokens]
+
+    async def count(self, user_id: uuid.UUID) -> int:
+        return await self.redis.zcount(self.get_user_key(user_id), time.time(), '+inf')
+
+    def _decode(self, tokens: Dict[bytes, bytes]) -> Dict[str, Union[str, int]]:
+        decoded = {key.decode('utf-8'): value.decode('utf-8') for key, value in tokens.items()}
+        for key in ('access_exp', 'refresh_exp'):
+            decoded[key] = int(decoded[key])
+        return decoded
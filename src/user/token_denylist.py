@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+import time
+from typing import Optional
+
+from aioredis import Redis
+
+
+class BloomFilter:
+    def __init__(self, size: int, hashes: int):
+        self.size = size
+        self.hashes = hashes
+        self.bits = bytearray((size + 7) // 8)
+
+    def add(self, item: str):
+        for index in self._indexes(item):
+            self.bits[index // 8] |= 1 << index % 8
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[index // 8] & 1 << index % 8 for index in self._indexes(item))
+
+    def _indexes(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+
+class TokenDenylist:
+    """
+    Revoked token ids in redis, each kept until the token would have expired anyway.
+
+    Every process keeps a bloom filter of the revoked ids, filled from redis on start and on every rebuild,
+    and updated from a pub/sub channel. Ids missing from the filter are not revoked and are answered
+    without a round trip, the rest is checked in redis. Until the filter is in sync, and after the
+    subscription fails, every check goes to redis. The filter is rebuilt periodically to drop expired ids.
+    """
+    channel = 'revokedTokens'
+
+    def __init__(self, redis: Redis, bloom_size: int, bloom_hashes: int, rebuild_interval: int):
+        self.redis = redis
+        self.bloom_size = bloom_size
+        self.bloom_hashes = bloom_hashes
+        self.rebuild_interval = rebuild_interval
+        self._bloom: Optional[BloomFilter] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def get_key(self, jti: str) -> str:
+        return f'revokedToken:{jti}'
+
+    async def revoke(self, jti: str, expires_at: Optional[int]):
+        ttl = int(expires_at - time.time()) + 1 if expires_at else None
+        if ttl is not None and ttl <= 0:
+            return
+        pipeline = self.redis.pipeline(transaction=False)
+        pipeline.set(self.get_key(jti), 1, ex=ttl)
+        pipeline.publish(self.channel, jti)
+        await pipeline.execute()
+        if self._bloom is not None:
+            self._bloom.add(jti)
+
+    async def is_revoked(self, jti: str) -> bool:
+        if self._bloom is not None and jti not in self._bloom:
+            return False
+        return bool(await self.redis.exists(self.get_key(jti)))
+
+    async def start(self):
+        self._task = asyncio.create_task(self._sync())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _sync(self):
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                # subscribe before loading, so nothing revoked in between is missed
+                await pubsub.subscribe(self.channel)
+                self._bloom = await self._load()
+                rebuild_at = time.monotonic() + self.rebuild_interval
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None:
+                        self._bloom.add(message['data'].decode('utf-8'))
+                    if time.monotonic() >= rebuild_at:
+                        self._bloom = await self._load()
+                        rebuild_at = time.monotonic() + self.rebuild_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # redis is unavailable, tokens are checked in redis until the subscription is back
+                await asyncio.sleep(1)
+            finally:
+                self._bloom = None
+                await pubsub.close()
+
+    async def _load(self) -> BloomFilter:
+        bloom = BloomFilter(self.bloom_size, self.bloom_hashes)
+        prefix = len(self.get_key(''))
+        async for key in self.redis.scan_iter(match=self.get_key('*'), count=1000):
+            bloom.add(key.decode('utf-8')[prefix:])
+        return bloom
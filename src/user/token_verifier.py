@@ -0,0 +1,73 @@
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import jwt
+from jwt.algorithms import requires_cryptography
+
+
+class TokenVerifier:
+    """
+    Verifies tokens with the keys, algorithms and options prepared once from the auth config.
+
+    A key is prepared for every configured algorithm and picked by the alg of the token header,
+    then the token is parsed a single time by jwt.decode. Recently verified tokens are kept with their
+    claims for up to ttl seconds and never past their exp, so repeated requests with the same
+    token skip the signature check. The issuer depends on the token type and is checked on every call.
+    """
+
+    def __init__(self,
+                 secret_key: Optional[str],
+                 public_key: Optional[str],
+                 algorithms: List[str],
+                 audience: Optional[Union[str, Sequence[str]]],
+                 leeway: Union[int, timedelta],
+                 max_size: int,
+                 ttl: int):
+        self.algorithms = algorithms
+        self.audience = audience
+        self.leeway = leeway.total_seconds() if isinstance(leeway, timedelta) else leeway
+        self.max_size = max_size
+        self.ttl = ttl
+        self.keys = {}
+        for algorithm in algorithms:
+            key = public_key if algorithm in requires_cryptography else secret_key
+            self.keys[algorithm] = jwt.get_algorithm_by_name(algorithm).prepare_key(key) if key else key
+        self._claims: OrderedDict[str, Tuple[float, Dict]] = OrderedDict()
+
+    def verify(self, token: str, issuer: Optional[str] = None) -> Dict[str, Union[str, int, bool]]:
+        claims = self._get_cached(token)
+        if claims is None:
+            algorithm = jwt.get_unverified_header(token).get('alg')
+            if algorithm not in self.keys:
+                raise jwt.InvalidAlgorithmError('The specified alg value is not allowed')
+            claims = jwt.decode(token, self.keys[algorithm], algorithms=[algorithm], audience=self.audience,
+                                leeway=self.leeway)
+            self._cache(token, claims)
+        if issuer is not None:
+            if 'iss' not in claims:
+                raise jwt.MissingRequiredClaimError('iss')
+            if claims['iss'] != issuer:
+                raise jwt.InvalidIssuerError('Invalid issuer')
+        return claims
+
+    def _get_cached(self, token: str) -> Optional[Dict]:
+        cached = self._claims.get(token)
+        if cached is None:
+            return None
+        expires_at, claims = cached
+        if expires_at <= time.time():
+            del self._claims[token]
+            return None
+        self._claims.move_to_end(token)
+        return claims
+
+    def _cache(self, token: str, claims: Dict):
+        expires_at = time.time() + self.ttl
+        if 'exp' in claims:
+            expires_at = min(expires_at, claims['exp'] + self.leeway)
+        self._claims[token] = (expires_at, claims)
+        self._claims.move_to_end(token)
+        if len(self._claims) > self.max_size:
+            self._claims.popitem(last=False)
@@ -1,18 +1,23 @@
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.config import USER_CACHE_TTL, USER_CACHE_LOCAL_TTL, USER_CACHE_SIZE
 from src.database import get_async_db_session
+from src.redis_main import connection
 from src.redis_manager.redis import get_redis_manager
 from src.subscription.subscription import get_subscription_manager
 from src.subscription.subscription_manager import SubscriptionManager
 from src.user.auth_user_manager import AuthUserManager
 from src.user.models import User
+from src.user.user_cache import UserCache
 from src.user.user_database_adapter import UserDatabaseAdapter
 from src.user.user_manager import UserManager
 
+user_cache = UserCache(connection, USER_CACHE_TTL, USER_CACHE_LOCAL_TTL, USER_CACHE_SIZE)
+
 
 async def get_user_db(session: AsyncSession = Depends(get_async_db_session)):
-    yield UserDatabaseAdapter(session, User)
+    yield UserDatabaseAdapter(session, User, user_cache)
 
 
 async def get_auth_user_manager(user_db=Depends(get_user_db), redis_manager=Depends(get_redis_manager)):
@@ -0,0 +1,82 @@
+import json
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from aioredis import Redis
+
+from src.user.models import User
+
+
+class UserCache:
+    """
+    Snapshots of the users read by the authentication, in process and in redis.
+
+    Every user has a version in redis that invalidate increments. A snapshot is stored together with
+    the version read before the user was loaded from the database, so a snapshot written by a request
+    that raced with an invalidation never matches again. Local entries skip redis for local_ttl seconds,
+    which bounds how long other processes may see an invalidated user.
+    The password hash is never cached.
+    """
+    fields = ('id', 'name', 'username', 'registered_at', 'email', 'is_active', 'is_superuser', 'is_verified')
+
+    def __init__(self, redis: Redis, ttl: int, local_ttl: int, max_size: int):
+        self.redis = redis
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.max_size = max_size
+        self._users: OrderedDict[uuid.UUID, Tuple[float, Dict]] = OrderedDict()
+
+    async def get(self, user_id: uuid.UUID) -> Tuple[Optional[Dict], int]:
+        """The snapshot of the user if it is up to date, and the current version of the user."""
+        cached = self._users.get(user_id)
+        if cached is not None:
+            cached_at, snapshot = cached
+            if time.monotonic() - cached_at < self.local_ttl:
+                self._users.move_to_end(user_id)
+                return snapshot, snapshot['version']
+            del self._users[user_id]
+
+        stored, version = await self.redis.mget(self._snapshot_key(user_id), self._version_key(user_id))
+        version = int(version or 0)
+        if stored is None:
+            return None, version
+        snapshot = json.loads(stored)
+        if snapshot['version'] != version:
+            return None, version
+        self._cache(user_id, snapshot)
+        return snapshot, version
+
+    async def set(self, user: User, version: int):
+        snapshot = {field: getattr(user, field) for field in self.fields} | {'version': version}
+        snapshot['id'] = str(snapshot['id'])
+        snapshot['registered_at'] = snapshot['registered_at'].isoformat()
+        await self.redis.set(self._snapshot_key(user.id), json.dumps(snapshot), ex=self.ttl)
+        self._cache(user.id, snapshot)
+
+    async def invalidate(self, user_id: uuid.UUID):
+        self._users.pop(user_id, None)
+        pipeline = self.redis.pipeline(transaction=True)
+        pipeline.incr(self._version_key(user_id))
+        pipeline.delete(self._snapshot_key(user_id))
+        await pipeline.execute()
+
+    def to_user(self, snapshot: Dict) -> User:
+        values = {field: snapshot[field] for field in self.fields}
+        values['id'] = uuid.UUID(values['id'])
+        values['registered_at'] = datetime.fromisoformat(values['registered_at'])
+        return User(**values)
+
+    def _cache(self, user_id: uuid.UUID, snapshot: Dict):
+        self._users[user_id] = (time.monotonic(), snapshot)
+        self._users.move_to_end(user_id)
+        if len(self._users) > self.max_size:
+            self._users.popitem(last=False)
+
+    def _snapshot_key(self, user_id: uuid.UUID) -> str:
+        return f'userSnapshot:{user_id}'
+
+    def _version_key(self, user_id: uuid.UUID) -> str:
+        return f'userSnapshot:{user_id}:version'
@@ -5,8 +5,10 @@ from fastapi_users.models import UP
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
 from sqlalchemy import select, func, Select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
 from src.user.models import User
+from src.user.user_cache import UserCache
 
 
 class UserDatabaseAdapter(SQLAlchemyUserDatabase):
@@ -14,9 +16,11 @@ class UserDatabaseAdapter(SQLAlchemyUserDatabase):
             self,
             session: AsyncSession,
             user_table: Type[User],
+            cache: Optional[UserCache] = None,
     ):
         self.session = session
         self.user_table = user_table
+        self.cache = cache
 
     async def create(self, create_dict: Dict[str, Any]) -> User:
         user = self.user_table(**create_dict)
@@ -28,6 +32,25 @@ class UserDatabaseAdapter(SQLAlchemyUserDatabase):
         statement = select(self.user_table).where(self.user_table.id == id)
         return await self._get_user(statement)
 
+    async def get_cached(self, id: UUID) -> Optional[User]:
+        """
+        Same as get, but served from the user cache when it has an up to date snapshot.
+
+        The snapshot is attached to the session as if it was loaded, so it can be updated
+        and its relationships queried, without a select.
+        """
+        if self.cache is None:
+            return await self.get(id)
+        snapshot, version = await self.cache.get(id)
+        if snapshot is None:
+            user = await self.get(id)
+            if user is not None:
+                await self.cache.set(user, version)
+            return user
+        user = self.cache.to_user(snapshot)
+        make_transient_to_detached(user)
+        return await self.session.merge(user, load=False)
+
     async def get_by_username(self, username: str) -> Optional[User]:
         statement = select(self.user_table).where(
             func.lower(self.user_table.username) == func.lower(username)
@@ -40,16 +63,28 @@ class UserDatabaseAdapter(SQLAlchemyUserDatabase):
         )
         return await self._get_user(statement)
 
+    async def get_by_email_or_username(self, login: str) -> Optional[User]:
+        """Emails always contain @ and usernames never do, so at most one user matches."""
+        statement = select(self.user_table).where(
+            (func.lower(self.user_table.email) == func.lower(login))
+            | (func.lower(self.user_table.username) == func.lower(login))
+        )
+        return await self._get_user(statement)
+
     async def update(self, user: User, update_dict: Dict[str, Any]) -> User:
         for key, value in update_dict.items():
             setattr(user, key, value)
         self.session.add(user)
         await self.session.commit()
+        if self.cache:
+            await self.cache.invalidate(user.id)
         return user
 
     async def delete(self, user: User) -> None:
         await self.session.delete(user)
         await self.session.commit()
+        if self.cache:
+            await self.cache.invalidate(user.id)
 
     async def _get_user(self, statement: Select) -> Optional[User]:
         results = await self.session.execute(statement)
@@ -62,16 +62,6 @@ class UserManager:
             raise UserVerifyException(data={'reason': 'User has already been verified'})
         await self.auth_manager.update_verify(user)
 
-    async def on_after_login(self,
-                             user: User
-                             ) -> None:
-        await self.auth_manager.on_after_login(user)
-
-    async def on_after_logout(self,
-                              user: User
-                              ) -> None:
-        await self.auth_manager.on_after_logout(user)
-
     async def check_existing(self,
                              user_id
                              ) -> bool:
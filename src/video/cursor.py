@@ -0,0 +1,23 @@
+import json
+import uuid
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import Any, Callable, Tuple
+
+from src.video.exceptions import InvalidCursor
+
+
+def encode_cursor(*values: Any) -> str:
+    raw_values = [value.isoformat() if isinstance(value, datetime)
+                  else str(value) if isinstance(value, uuid.UUID)
+                  else value
+                  for value in values]
+    return urlsafe_b64encode(json.dumps(raw_values).encode()).decode()
+
+
+def decode_cursor(cursor: str, *types: Callable[[Any], Any]) -> Tuple[Any, ...]:
+    try:
+        raw_values = json.loads(urlsafe_b64decode(cursor.encode()))
+        return tuple(type_(value) for type_, value in zip(types, raw_values, strict=True))
+    except (ValueError, TypeError):
+        raise InvalidCursor
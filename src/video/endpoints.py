@@ -1,21 +1,22 @@
 import uuid
-from typing import List
+from typing import List, Literal, Optional
 from uuid import UUID
 
 import fastapi_jsonrpc as jsonrpc
-from fastapi import Depends
-from starlette.responses import JSONResponse
+from fastapi import Depends, HTTPException
+from pydantic import conlist, conint
+from starlette.responses import JSONResponse, Response
 
 from src.subscription.subscription import get_subscription_manager
 from src.subscription.subscription_manager import SubscriptionManager
 from src.user.auth import access_user, optional_access_user, access_superuser
-from src.user.exceptions import NonExistentUser
+from src.user.exceptions import NonExistentUser, AccessDenied
 from src.user.models import User
 from src.user.shemas import UserRead
 from src.user.user import get_user_manager
 from src.user.user_manager import UserManager
 from src.video.exceptions import NonExistentVideo
-from src.video.shemas import VideoUpload, VideoView
+from src.video.shemas import VideoUpload, VideoView, VideoLink, BaseVideo, UploadTarget, UploadStatus, SpriteSheets
 from src.video.video import get_video_manager
 from src.video.video_manager import VideoManager
 
@@ -42,6 +43,30 @@ async def upload_video(video: VideoUpload = Depends(),
     )
 
 
+@video_router.method(tags=['video'])
+async def init_upload(video: BaseVideo,
+                      user: User = Depends(access_user),
+                      video_manager: VideoManager = Depends(get_video_manager)
+                      ) -> UploadTarget:
+    return await video_manager.init_upload(video, user)
+
+
+@video_router.method(tags=['video'])
+async def complete_upload(id: UUID,
+                          user: User = Depends(access_user),
+                          video_manager: VideoManager = Depends(get_video_manager)
+                          ) -> None:
+    await video_manager.complete_upload(id, user)
+
+
+@video_router.method(tags=['video'])
+async def get_upload_status(id: UUID,
+                            user: User = Depends(access_user),
+                            video_manager: VideoManager = Depends(get_video_manager)
+                            ) -> UploadStatus:
+    return await video_manager.get_upload_status(id, user)
+
+
 @video_router.method(tags=['video'])
 async def get_video(id: UUID,
                     user: User = Depends(optional_access_user),
@@ -72,8 +97,26 @@ async def get_video_link(id: uuid.UUID,
     return await video_manager.get_video_link(video, user)
 
 
+@video_router.get('/video/hls/{id}/{playlist}', tags=['video'])
+async def get_hls_playlist(id: UUID,
+                           playlist: str,
+                           expires: int,
+                           token: str,
+                           video_manager: VideoManager = Depends(get_video_manager)
+                           ) -> Response:
+    try:
+        content = await video_manager.get_hls_playlist(id, playlist, expires, token)
+    except AccessDenied:
+        raise HTTPException(status_code=403)
+    except NonExistentVideo:
+        raise HTTPException(status_code=404)
+    return Response(content=content, media_type='application/vnd.apple.mpegurl')
+
+
 @video_router.method(tags=['video'])
 async def get_preview_link(id: uuid.UUID,
+                           size: conint(gt=0) = None,
+                           format: Literal['webp', 'avif'] = 'webp',
                            user: User = Depends(optional_access_user),
                            video_manager: VideoManager = Depends(get_video_manager),
                            subscription_manager: SubscriptionManager = Depends(get_subscription_manager),
@@ -84,67 +127,99 @@ async def get_preview_link(id: uuid.UUID,
     if user.id:
         user = UserRead.from_orm(user)
         user.is_subscribed = await subscription_manager.check_subscription(user.id, video.owner)
-    return await video_manager.get_preview_link(video, user)
+    return await video_manager.get_preview_link(video, user, size, format)
+
+
+@video_router.method(tags=['video'])
+async def get_preview_links(ids: conlist(UUID, max_items=100),
+                            size: conint(gt=0) = None,
+                            format: Literal['webp', 'avif'] = 'webp',
+                            user: User = Depends(optional_access_user),
+                            video_manager: VideoManager = Depends(get_video_manager),
+                            ) -> List[VideoLink]:
+    return await video_manager.get_preview_links(ids, user, size, format)
+
+
+@video_router.method(tags=['video'])
+async def get_sprite_sheets(id: uuid.UUID,
+                            user: User = Depends(optional_access_user),
+                            video_manager: VideoManager = Depends(get_video_manager),
+                            subscription_manager: SubscriptionManager = Depends(get_subscription_manager),
+                            ) -> Optional[SpriteSheets]:
+    video = await video_manager.get(id)
+    if video is None:
+        raise NonExistentVideo
+    if user.id:
+        user = UserRead.from_orm(user)
+        user.is_subscribed = await subscription_manager.check_subscription(user.id, video.owner)
+    return await video_manager.get_sprite_sheets(video, user)
 
 
 @video_router.method(tags=['video'])
 async def get_latest_videos(limit: int = 20,
                             pagination: int = 0,
+                            cursor: str = None,
                             user: User = Depends(optional_access_user),
                             video_manager: VideoManager = Depends(get_video_manager)
                             ) -> List[VideoView]:
-    return await video_manager.get_latest_videos(user, limit, pagination)
+    return await video_manager.get_latest_videos(user, limit, pagination, cursor)
 
 
 @video_router.method(tags=['video'])
 async def get_liked_videos(limit: int = 20,
                            pagination: int = 0,
+                           cursor: str = None,
                            user: User = Depends(access_user),
                            video_manager: VideoManager = Depends(get_video_manager)
                            ) -> List[VideoView]:
-    return await video_manager.get_liked_videos(user, limit, pagination)
+    return await video_manager.get_liked_videos(user, limit, pagination, cursor)
 
 
 @video_router.method(tags=['video'])
 async def get_liked_by_users(limit: int = 20,
                              pagination: int = 0,
+                             cursor: str = None,
                              user: User = Depends(optional_access_user),
                              video_manager: VideoManager = Depends(get_video_manager)
                              ) -> List[VideoView]:
-    return await video_manager.get_liked_by_users(user, limit, pagination)
+    return await video_manager.get_liked_by_users(user, limit, pagination, cursor)
 
 
 @video_router.method(tags=['video'])
 async def get_popular_videos(limit: int = 20,
                              pagination: int = 0,
+                             cursor: str = None,
                              user: User = Depends(optional_access_user),
                              video_manager: VideoManager = Depends(get_video_manager)
                              ) -> List[VideoView]:
-    return await video_manager.get_popular_videos(user, limit, pagination)
+    return await video_manager.get_popular_videos(user, limit, pagination, cursor)
 
 
 @video_router.method(tags=['video'])
 async def get_viewed_videos(limit: int = 20,
                             pagination: int = 0,
+                            cursor: str = None,
                             user: User = Depends(access_user),
                             video_manager: VideoManager = Depends(get_video_manager)
                             ) -> List[VideoView]:
-    return await video_manager.get_viewed_videos(user, limit, pagination)
+    return await video_manager.get_viewed_videos(user, limit, pagination, cursor)
 
 
 @video_router.method(tags=['video'])
 async def get_subscribed_videos(limit: int = 20,
                                 pagination: int = 0,
+                                cursor: str = None,
                                 user: User = Depends(access_user),
                                 video_manager: VideoManager = Depends(get_video_manager)
                                 ) -> List[VideoView]:
-    return await video_manager.get_subscribed_videos(user, limit, pagination)
+    return await video_manager.get_subscribed_videos(user, limit, pagination, cursor)
 
 
 @video_router.method(tags=['video'])
 async def get_user_videos(id: UUID,
                           limit: int = 20,
                           pagination: int = 0,
+                          cursor: str = None,
                           current_user: User = Depends(optional_access_user),
                           user_manager: UserManager = Depends(get_user_manager),
                           video_manager: VideoManager = Depends(get_video_manager)
@@ -152,13 +227,14 @@ async def get_user_videos(id: UUID,
     requested_user = await user_manager.get(id)
     if not requested_user:
         raise NonExistentUser
-    return await video_manager.get_user_videos(current_user, requested_user, limit, pagination)
+    return await video_manager.get_user_videos(current_user, requested_user, limit, pagination, cursor)
 
 
 @video_router.method(tags=['video'])
 async def get_latest_user_videos(id: UUID,
                                  limit: int = 20,
                                  pagination: int = 0,
+                                 cursor: str = None,
                                  current_user: User = Depends(optional_access_user),
                                  user_manager: UserManager = Depends(get_user_manager),
                                  video_manager: VideoManager = Depends(get_video_manager)
@@ -166,13 +242,14 @@ async def get_latest_user_videos(id: UUID,
     requested_user = await user_manager.get(id)
     if not requested_user:
         raise NonExistentUser
-    return await video_manager.get_latest_user_videos(current_user, requested_user, limit, pagination)
+    return await video_manager.get_latest_user_videos(current_user, requested_user, limit, pagination, cursor)
 
 
 @video_router.method(tags=['video'])
 async def get_popular_user_videos(id: UUID,
                                   limit: int = 20,
                                   pagination: int = 0,
+                                  cursor: str = None,
                                   current_user: User = Depends(optional_access_user),
                                   user_manager: UserManager = Depends(get_user_manager),
                                   video_manager: VideoManager = Depends(get_video_manager)
@@ -180,7 +257,7 @@ async def get_popular_user_videos(id: UUID,
     requested_user = await user_manager.get(id)
     if not requested_user:
         raise NonExistentUser
-    return await video_manager.get_popular_user_videos(current_user, requested_user, limit, pagination)
+    return await video_manager.get_popular_user_videos(current_user, requested_user, limit, pagination, cursor)
 
 
 @video_router.method(tags=['video'])
@@ -197,3 +274,23 @@ async def admin_remove_video(id: uuid.UUID,
                              video_manager: VideoManager = Depends(get_video_manager)
                              ) -> None:
     await video_manager.admin_delete(user, id)
+
+
+@video_router.method(tags=['video'])
+async def admin_remove_videos(ids: conlist(UUID, max_items=1000),
+                              user: User = Depends(access_superuser),
+                              video_manager: VideoManager = Depends(get_video_manager)
+                              ) -> None:
+    await video_manager.admin_delete_many(ids)
+
+
+@video_router.method(tags=['video'])
+async def admin_remove_user_videos(id: uuid.UUID,
+                                   user: User = Depends(access_superuser),
+                                   user_manager: UserManager = Depends(get_user_manager),
+                                   video_manager: VideoManager = Depends(get_video_manager)
+                                   ) -> None:
+    requested_user = await user_manager.get(id)
+    if not requested_user:
+        raise NonExistentUser
+    await video_manager.delete_user_videos(requested_user.id)
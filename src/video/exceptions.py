@@ -23,3 +23,8 @@ class DeleteVideoException(jsonrpc.BaseError):
 class NonExistentPermission(jsonrpc.BaseError):
     CODE = 6001
     MESSAGE = "Permission does not exist"
+
+
+class InvalidCursor(jsonrpc.BaseError):
+    CODE = 6003
+    MESSAGE = "Invalid pagination cursor"
@@ -0,0 +1,124 @@
+import hashlib
+import hmac
+import json
+import os
+import re
+import subprocess
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from src.config import SECRET, PUBLIC_API_URL, HLS_SEGMENT_SECONDS
+
+
+class HlsRendition:
+    def __init__(self, name: str, height: int, video_bitrate: int, audio_bitrate: int):
+        self.name = name
+        self.height = height
+        self.video_bitrate = video_bitrate
+        self.audio_bitrate = audio_bitrate
+
+    @property
+    def bandwidth(self) -> int:
+        return (self.video_bitrate + self.audio_bitrate) * 1000
+
+
+class HlsPackager:
+    """Transcodes a video into an HLS ladder with ffmpeg."""
+    renditions = [
+        HlsRendition('1080p', 1080, 5000, 192),
+        HlsRendition('720p', 720, 2800, 128),
+        HlsRendition('480p', 480, 1400, 128),
+        HlsRendition('360p', 360, 800, 96),
+    ]
+
+    def get_prefix(self, video_id: uuid.UUID) -> str:
+        return f'hls/{video_id}'
+
+    def probe(self, source: str) -> Tuple[int, int]:
+        output = subprocess.run(['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+                                 '-show_entries', 'stream=width,height', '-of', 'json', source],
+                                check=True, capture_output=True).stdout
+        stream = json.loads(output)['streams'][0]
+        return stream['width'], stream['height']
+
+    def get_renditions(self, source_height: int) -> List[HlsRendition]:
+        """Renditions that do not upscale the source, at least the lowest one."""
+        renditions = [rendition for rendition in self.renditions if rendition.height <= source_height]
+        return renditions or self.renditions[-1:]
+
+    def transcode(self, source: str, output_dir: str, rendition: HlsRendition):
+        os.makedirs(output_dir, exist_ok=True)
+        gop = HLS_SEGMENT_SECONDS * 24
+        subprocess.run(['ffmpeg', '-v', 'error', '-y', '-i', source,
+                        '-vf', f'scale=-2:{rendition.height}',
+                        '-c:v', 'libx264', '-preset', 'veryfast', '-profile:v', 'main',
+                        '-b:v', f'{rendition.video_bitrate}k',
+                        '-maxrate', f'{int(rendition.video_bitrate * 1.07)}k',
+                        '-bufsize', f'{rendition.video_bitrate * 2}k',
+                        '-g', str(gop), '-keyint_min', str(gop), '-sc_threshold', '0',
+                        '-c:a', 'aac', '-b:a', f'{rendition.audio_bitrate}k', '-ac', '2',
+                        '-hls_time', str(HLS_SEGMENT_SECONDS), '-hls_playlist_type', 'vod',
+                        '-hls_segment_filename', os.path.join(output_dir, 'segment_%04d.ts'),
+                        os.path.join(output_dir, 'index.m3u8')],
+                       check=True)
+
+    def build_master_playlist(self, variants: List[Dict]) -> str:
+        lines = ['#EXTM3U', '#EXT-X-VERSION:3']
+        for variant in variants:
+            lines.append(f'#EXT-X-STREAM-INF:BANDWIDTH={variant["bandwidth"]},RESOLUTION={variant["resolution"]}')
+            lines.append(f'{variant["name"]}.m3u8')
+        return '\n'.join(lines) + '\n'
+
+
+class HlsPlaylists:
+    """
+    Serves the HLS playlists of private videos.
+
+    get_video_link checks the permissions and hands out a master playlist url signed with an expiry.
+    The playlists are served by the app with the same signature, the segment lines of the variant
+    playlists are replaced with presigned s3 urls. Stored playlists never change, so they are cached.
+    """
+    playlist_name = re.compile(r'^[a-z0-9]+\.m3u8$')
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._playlists: OrderedDict[str, str] = OrderedDict()
+
+    def get_master_url(self, video_id: uuid.UUID, expires_in: int) -> str:
+        expires = int(time.time()) + expires_in
+        return f'{PUBLIC_API_URL}/video/hls/{video_id}/master.m3u8?{self._get_query(video_id, expires)}'
+
+    def verify(self, video_id: uuid.UUID, playlist: str, expires: int, token: str) -> bool:
+        return (expires > time.time()
+                and bool(self.playlist_name.match(playlist))
+                and hmac.compare_digest(token, self._sign(video_id, expires)))
+
+    def get_key(self, video_id: uuid.UUID, playlist: str) -> str:
+        if playlist == 'master.m3u8':
+            return f'hls/{video_id}/master.m3u8'
+        return f'hls/{video_id}/{playlist.removesuffix(".m3u8")}/index.m3u8'
+
+    def get_cached(self, key: str) -> Optional[str]:
+        playlist = self._playlists.get(key)
+        if playlist is not None:
+            self._playlists.move_to_end(key)
+        return playlist
+
+    def cache(self, key: str, playlist: str):
+        self._playlists[key] = playlist
+        self._playlists.move_to_end(key)
+        if len(self._playlists) > self.max_size:
+            self._playlists.popitem(last=False)
+
+    def sign_master(self, playlist: str, video_id: uuid.UUID, expires: int) -> str:
+        query = self._get_query(video_id, expires)
+        return '\n'.join(line if not line or line.startswith('#') else f'{line}?{query}'
+                         for line in playlist.splitlines()) + '\n'
+
+    def _get_query(self, video_id: uuid.UUID, expires: int) -> str:
+        return f'expires={expires}&token={self._sign(video_id, expires)}'
+
+    def _sign(self, video_id: uuid.UUID, expires: int) -> str:
+        return hmac.new(SECRET.encode(), f'{video_id}:{expires}'.encode(), hashlib.sha256).hexdigest()
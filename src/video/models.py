@@ -4,9 +4,9 @@ from typing import List
 from enum import Enum as pyEnum
 from sqlalchemy import Enum as sqlEnum, UUID
 from uuid import UUID as pyUUID
-from sqlalchemy import String, TIMESTAMP, ForeignKey
+from sqlalchemy import String, TIMESTAMP, ForeignKey, Integer, Index, Boolean, text
 from sqlalchemy.dialects.postgresql import INTERVAL, ENUM
-from sqlalchemy.orm import mapped_column, Mapped, relationship
+from sqlalchemy.orm import mapped_column, Mapped, relationship, backref
 
 from src.database import Base
 
@@ -18,8 +18,20 @@ class Permission(pyEnum):
     for_myself = 4
 
 
+class ProcessingStatus(pyEnum):
+    raw = 1
+    processing = 2
+    ready = 3
+    failed = 4
+
+
 class Video(Base):
     __tablename__ = "video"
+    __table_args__ = (
+        Index('ix_video_uploaded_at_id', 'uploaded_at', 'id'),
+        Index('ix_video_owner_uploaded_at_id', 'owner', 'uploaded_at', 'id'),
+        Index('ix_video_deleted_at', 'deleted_at', postgresql_where=text('deleted_at IS NOT NULL')),
+    )
     id: Mapped[pyUUID] = mapped_column(UUID, primary_key=True, default=uuid.uuid4)
     title: Mapped[str] = mapped_column(String(length=100), nullable=False)
     description: Mapped[str] = mapped_column(String(length=5000), nullable=False)
@@ -27,6 +39,10 @@ class Video(Base):
     owner: Mapped[pyUUID] = mapped_column(UUID, ForeignKey("user.id"))
     duration: Mapped[INTERVAL] = mapped_column(INTERVAL)
     permission: Mapped[ENUM] = mapped_column(sqlEnum(Permission), default=Permission.for_everyone)
+    processing_status: Mapped[ENUM] = mapped_column(sqlEnum(ProcessingStatus), default=ProcessingStatus.raw,
+                                                    nullable=False)
+    has_thumbnails: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    deleted_at: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP, nullable=True)
 
     # comments: Mapped[List["Comment"]] = relationship("Comment", backref="comments", lazy="dynamic")
     user: Mapped["User"] = relationship("User", back_populates="videos", )
@@ -41,3 +57,16 @@ class Video(Base):
     viewed_users: Mapped[List["User"]] = relationship("User", back_populates="viewed_videos",
                                                       primaryjoin="Video.id==UserView.video_id",
                                                       secondary="user_view", lazy="dynamic")
+
+
+class VideoStats(Base):
+    __tablename__ = "video_stats"
+    video_id: Mapped[pyUUID] = mapped_column(UUID, ForeignKey("video.id", ondelete='CASCADE'), primary_key=True)
+    likes: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    dislikes: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    views: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    comments: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP, default=datetime.utcnow, nullable=False, index=True)
+
+    video: Mapped["Video"] = relationship('Video',
+                                          backref=backref('stats', passive_deletes=True, uselist=False))
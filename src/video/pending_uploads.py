@@ -0,0 +1,66 @@
+import time
+import uuid
+from typing import List, Optional
+
+from aioredis import Redis
+
+from src.config import UPLOAD_EXPIRES
+from src.video.shemas import PendingUpload
+
+
+class PendingUploads:
+    """
+    Videos uploaded straight to s3 that do not have a row yet.
+
+    Every upload is registered with a deadline, uploads that are still not finalized
+    after it are collected together with their s3 objects.
+    """
+    deadlines_key = 'pendingUploads'
+    lifetime = 2 * UPLOAD_EXPIRES
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+
+    async def create(self, video_id: uuid.UUID, upload: PendingUpload):
+        key = self._key(video_id)
+        pipeline = self.redis.pipeline(transaction=True)
+        pipeline.hset(key, mapping={'owner': str(upload.owner),
+                                    'title': upload.title,
+                                    'description': upload.description,
+                                    'permission': upload.permission})
+        pipeline.expire(key, self.lifetime)
+        pipeline.zadd(self.deadlines_key, {str(video_id): time.time() + self.lifetime})
+        await pipeline.execute()
+
+    async def get(self, video_id: uuid.UUID) -> Optional[PendingUpload]:
+        fields = await self.redis.hgetall(self._key(video_id))
+        if not fields:
+            return None
+        fields = {field.decode('utf-8'): value.decode('utf-8') for field, value in fields.items()}
+        completed = fields.pop('completed', None) is not None
+        return PendingUpload(**fields, completed=completed)
+
+    async def complete(self, video_id: uuid.UUID) -> bool:
+        """Mark the upload as complete, returns False if it already was."""
+        return bool(await self.redis.hsetnx(self._key(video_id), 'completed', 1))
+
+    async def fail(self, video_id: uuid.UUID, reason: str):
+        pipeline = self.redis.pipeline(transaction=True)
+        pipeline.hset(self._key(video_id), 'error', reason)
+        pipeline.zrem(self.deadlines_key, str(video_id))
+        await pipeline.execute()
+
+    async def remove(self, video_id: uuid.UUID):
+        pipeline = self.redis.pipeline(transaction=True)
+        pipeline.delete(self._key(video_id))
+        pipeline.zrem(self.deadlines_key, str(video_id))
+        await pipeline.execute()
+
+    async def pop_expired(self, count: int) -> List[uuid.UUID]:
+        expired = await self.redis.zrangebyscore(self.deadlines_key, '-inf', time.time(), start=0, num=count)
+        if expired:
+            await self.redis.zrem(self.deadlines_key, *expired)
+        return [uuid.UUID(video_id.decode('utf-8')) for video_id in expired]
+
+    def _key(self, video_id: uuid.UUID) -> str:
+        return f'pendingUpload:{video_id}'
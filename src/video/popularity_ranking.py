@@ -0,0 +1,52 @@
+import math
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from src.config import POPULARITY_VIEW_WEIGHT, POPULARITY_LIKE_WEIGHT, POPULARITY_DECAY_HOURS
+from src.video.redis_ranking import RedisRanking
+
+
+class PopularityRanking(RedisRanking):
+    """
+    Redis sorted sets of videos ordered by a time-decayed popularity score, globally and per owner.
+
+    The score is ln(1 + weighted views and likes) + upload time / decay period, which orders videos
+    the same way as weighted counters multiplied by e^(-age / decay period). It only changes together
+    with the counters, so a refresh only has to revisit the videos whose counters changed.
+    """
+    key = 'popularity'
+    refreshed_at_key = 'popularity:refreshedAt'
+    refresh_overlap = timedelta(minutes=1)
+
+    def get_user_key(self, owner_id: uuid.UUID) -> str:
+        return f'popularity:user:{owner_id}'
+
+    def get_score(self, views: int, likes: int, uploaded_at: datetime) -> float:
+        weighted = POPULARITY_VIEW_WEIGHT * views + POPULARITY_LIKE_WEIGHT * likes
+        age_score = uploaded_at.replace(tzinfo=timezone.utc).timestamp() / (POPULARITY_DECAY_HOURS * 3600)
+        return math.log1p(max(weighted, 0)) + age_score
+
+    async def update(self, videos: List[Tuple[uuid.UUID, uuid.UUID, datetime, int, int]]):
+        pipeline = self.redis.pipeline(transaction=False)
+        for video_id, owner, uploaded_at, views, likes in videos:
+            score = {str(video_id): self.get_score(views, likes, uploaded_at)}
+            pipeline.zadd(self.key, score)
+            pipeline.zadd(self.get_user_key(owner), score)
+        await pipeline.execute()
+
+    async def remove(self, videos: List[Tuple[uuid.UUID, uuid.UUID]]):
+        pipeline = self.redis.pipeline(transaction=False)
+        for video_id, owner in videos:
+            pipeline.zrem(self.key, str(video_id))
+            pipeline.zrem(self.get_user_key(owner), str(video_id))
+        await pipeline.execute()
+
+    async def get_refreshed_at(self) -> Optional[datetime]:
+        refreshed_at = await self.redis.get(self.refreshed_at_key)
+        if refreshed_at is None:
+            return None
+        return datetime.fromisoformat(refreshed_at.decode('utf-8')) - self.refresh_overlap
+
+    async def set_refreshed_at(self, refreshed_at: datetime):
+        await self.redis.set(self.refreshed_at_key, refreshed_at.isoformat())
@@ -0,0 +1,24 @@
+import uuid
+from typing import List, Tuple
+
+from aioredis import Redis
+
+
+class RedisRanking:
+    """Base for video feeds stored as redis sorted sets and read from the highest score."""
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+
+    async def exists(self, key: str) -> bool:
+        return bool(await self.redis.exists(key))
+
+    async def get_range(self, key: str, start: int, count: int) -> List[Tuple[uuid.UUID, float]]:
+        ranked = await self.redis.zrevrange(key, start, start + count - 1, withscores=True)
+        return [(uuid.UUID(video_id.decode('utf-8')), score) for video_id, score in ranked]
+
+    async def get_position_after(self, key: str, score: float, video_id: uuid.UUID) -> int:
+        rank = await self.redis.zrevrank(key, str(video_id))
+        if rank is not None:
+            return rank + 1
+        return await self.redis.zcount(key, f'({score}', '+inf')
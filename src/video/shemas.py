@@ -1,7 +1,8 @@
 import uuid
+from typing import Dict, List
 
 from fastapi import Form, UploadFile, File
-from pydantic import BaseModel, PrivateAttr
+from pydantic import BaseModel, PrivateAttr, validator
 from pydantic.schema import timedelta, date
 
 from src.video.models import Permission
@@ -28,7 +29,7 @@ class VideoUpload(BaseVideo):
                  description: str = Form(...),
                  permission: str = Form(...),
                  video_file: UploadFile = File(...),
-                 preview_file: UploadFile = File(...)):
+                 preview_file: UploadFile = File(None)):
         super().__init__(**{"title": title, "description": description, 'permission': permission})
         # self.title = title
         # self.description = description
@@ -42,8 +43,64 @@ class VideoView(BaseVideo):
     views: int = 0
     likes: int = 0
     dislikes: int = 0
+    comments_count: int = 0
+    unique_viewers: int | None = None
     like: bool | None
     permission: str
     stop_timecode: timedelta = 0
     uploaded_at: date
+    cursor: str | None = None
 
+    @validator('permission', pre=True)
+    def permission_name(cls, permission):
+        # read from the video, which keeps its permission as it is
+        return permission.name if isinstance(permission, Permission) else permission
+
+
+class PendingUpload(BaseVideo):
+    owner: uuid.UUID
+    completed: bool = False
+    error: str | None = None
+
+
+class PresignedPost(BaseModel):
+    url: str
+    fields: Dict[str, str]
+
+
+class UploadTarget(BaseModel):
+    id: uuid.UUID
+    video: PresignedPost
+    preview: PresignedPost
+
+
+class UploadStatus(BaseModel):
+    status: str
+    reason: str | None = None
+
+
+class VideoLink(BaseModel):
+    id: uuid.UUID
+    link: str
+
+
+class SpriteSheets(BaseModel):
+    interval: int
+    columns: int
+    rows: int
+    tile_width: int
+    tile_height: int
+    frames: int
+    sheets: List[str]
+
+
+class VideoStatsRead(BaseModel):
+    video_id: uuid.UUID
+    likes: int = 0
+    dislikes: int = 0
+    views: int = 0
+    comments: int = 0
+    unique_viewers: int | None = None
+
+    class Config:
+        orm_mode = True
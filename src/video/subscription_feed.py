@@ -0,0 +1,66 @@
+import uuid
+from datetime import datetime, timezone
+from typing import List
+
+from src.config import SUBSCRIPTION_FEED_SIZE, SUBSCRIPTION_FEED_TTL
+from src.video.models import Video
+from src.video.redis_ranking import RedisRanking
+
+
+class SubscriptionFeed(RedisRanking):
+    """
+    Per-subscriber redis inboxes of the latest videos from subscribed users, scored by upload time.
+
+    New videos are pushed into the inboxes of the owner's subscribers when they are uploaded,
+    so reading the feed is a single range read. Inboxes are capped to the latest videos and expire
+    after a while, an expired inbox is filled again from the database on the next read.
+    Owners with too many subscribers to push to are served by pulling their videos on read instead.
+    """
+    pull_owners_key = 'subscriptionFeed:pullOwners'
+
+    def get_key(self, subscriber_id: uuid.UUID) -> str:
+        return f'subscriptionFeed:{subscriber_id}'
+
+    def get_score(self, uploaded_at: datetime) -> float:
+        return uploaded_at.replace(tzinfo=timezone.utc).timestamp()
+
+    async def fill(self, subscriber_id: uuid.UUID, videos: List[Video]):
+        key = self.get_key(subscriber_id)
+        pipeline = self.redis.pipeline(transaction=True)
+        pipeline.delete(key)
+        if videos:
+            pipeline.zadd(key, {str(video.id): self.get_score(video.uploaded_at) for video in videos})
+            pipeline.expire(key, SUBSCRIPTION_FEED_TTL)
+        await pipeline.execute()
+
+    async def push(self, subscriber_ids: List[uuid.UUID], videos: List[Video]):
+        """Add the videos to the inboxes that exist, missing inboxes are filled completely when read."""
+        pipeline = self.redis.pipeline(transaction=False)
+        for subscriber_id in subscriber_ids:
+            pipeline.exists(self.get_key(subscriber_id))
+        existing = await pipeline.execute()
+        scores = {str(video.id): self.get_score(video.uploaded_at) for video in videos}
+        if not scores:
+            return
+
+        pipeline = self.redis.pipeline(transaction=False)
+        for subscriber_id, exists in zip(subscriber_ids, existing):
+            if exists:
+                key = self.get_key(subscriber_id)
+                pipeline.zadd(key, scores)
+                pipeline.zremrangebyrank(key, 0, -SUBSCRIPTION_FEED_SIZE - 1)
+        await pipeline.execute()
+
+    async def remove(self, subscriber_id: uuid.UUID, video_ids: List[uuid.UUID]):
+        if video_ids:
+            await self.redis.zrem(self.get_key(subscriber_id), *[str(video_id) for video_id in video_ids])
+
+    async def get_pull_owners(self) -> List[uuid.UUID]:
+        owners = await self.redis.smembers(self.pull_owners_key)
+        return [uuid.UUID(owner.decode('utf-8')) for owner in owners]
+
+    async def add_pull_owner(self, owner_id: uuid.UUID):
+        await self.redis.sadd(self.pull_owners_key, str(owner_id))
+
+    async def remove_pull_owner(self, owner_id: uuid.UUID):
+        await self.redis.srem(self.pull_owners_key, str(owner_id))
@@ -0,0 +1,419 @@
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+from io import BytesIO
+from tempfile import TemporaryFile, TemporaryDirectory
+from typing import List
+
+import aioredis as redis
+from botocore.client import BaseClient
+from botocore.exceptions import ClientError
+from pymediainfo import MediaInfo
+
+from celery import chain
+
+from src.celery_main import celery
+from src.config import REDIS_HOST, REDIS_PORT, VIDEO_STATS_BUFFERED, VIDEO_STATS_FLUSH_BATCH, \
+    SUBSCRIPTION_FEED_SIZE, SUBSCRIPTION_FEED_FANOUT_LIMIT, BUCKET_NAME, HLS_ENABLED, VIDEO_DELETE_RETRIES, \
+    VIDEO_DELETE_COLLECT_INTERVAL, VIDEO_STATS_VIEWERS_TTL
+from src.database import run_with_async_db_session
+from src.s3 import create_s3_client
+from src.subscription.models import Subscription
+from src.subscription.subscription_database_adapter import SubscriptionDatabaseAdapter
+from src.user.models import User
+from src.video.exceptions import UploadVideoException
+from src.video.hls import HlsPackager
+from src.video.models import VideoStats, Video, Permission, ProcessingStatus
+from src.video.pending_uploads import PendingUploads
+from src.video.popularity_ranking import PopularityRanking
+from src.video.subscription_feed import SubscriptionFeed
+from src.video.thumbnails import ThumbnailGenerator
+from src.video.video_database_adapter import VideoDatabaseAdapter
+from src.video.video_validator import VideoValidator
+from src.video.video_stats_buffer import VideoStatsBuffer
+from src.video.video_stats_database_adapter import VideoStatsDatabaseAdapter
+
+
+@celery.task
+def reconcile_video_stats():
+    run_with_async_db_session(_reconcile_video_stats)
+
+
+@celery.task
+def flush_video_stats():
+    run_with_async_db_session(_flush_video_stats)
+
+
+async def _reconcile_video_stats(session):
+    if VIDEO_STATS_BUFFERED:
+        # pending deltas already have their rows in the source tables
+        await _flush_video_stats(session)
+    await VideoStatsDatabaseAdapter(session, VideoStats).reconcile()
+
+
+async def _flush_video_stats(session):
+    connection = redis.Redis(host=REDIS_HOST, port=REDIS_PORT)
+    buffer = VideoStatsBuffer(connection, VIDEO_STATS_VIEWERS_TTL)
+    video_stats_db = VideoStatsDatabaseAdapter(session, VideoStats)
+    try:
+        while True:
+            pending = await buffer.pop_pending(VIDEO_STATS_FLUSH_BATCH)
+            if not pending:
+                break
+            try:
+                await video_stats_db.apply(pending)
+            except Exception:
+                await session.rollback()
+                await buffer.restore(pending)
+                raise
+            if len(pending) < VIDEO_STATS_FLUSH_BATCH:
+                break
+    finally:
+        await connection.close()
+
+
+@celery.task
+def refresh_popularity_ranking(full: bool = False):
+    run_with_async_db_session(lambda session: _refresh_popularity_ranking(session, full))
+
+
+async def _refresh_popularity_ranking(session, full: bool):
+    connection = redis.Redis(host=REDIS_HOST, port=REDIS_PORT)
+    ranking = PopularityRanking(connection)
+    video_stats_db = VideoStatsDatabaseAdapter(session, VideoStats)
+    try:
+        refreshed_at = datetime.utcnow()
+        since = None if full else await ranking.get_refreshed_at()
+        after_id = None
+        while videos := await video_stats_db.get_updated_since(since, after_id, VIDEO_STATS_FLUSH_BATCH):
+            await ranking.update(videos)
+            after_id = videos[-1].id
+        await ranking.set_refreshed_at(refreshed_at)
+    finally:
+        await connection.close()
+
+
+# everything a subscriber may see, the inboxes are filtered by permission again on read
+subscriber_permissions = [permission for permission in Permission if permission != Permission.for_myself]
+
+
+@celery.task
+def push_to_subscription_feeds(video_id: str):
+    run_with_async_db_session(lambda session: _push_to_subscription_feeds(session, uuid.UUID(video_id)))
+
+
+@celery.task
+def add_to_subscription_feed(subscriber_id: str, owner_id: str):
+    run_with_async_db_session(
+        lambda session: _add_to_subscription_feed(session, uuid.UUID(subscriber_id), uuid.UUID(owner_id)))
+
+
+@celery.task
+def remove_from_subscription_feed(subscriber_id: str, owner_id: str):
+    run_with_async_db_session(
+        lambda session: _remove_from_subscription_feed(session, uuid.UUID(subscriber_id), uuid.UUID(owner_id)))
+
+
+async def _push_to_subscription_feeds(session, video_id: uuid.UUID):
+    video = await VideoDatabaseAdapter(session, Video).get(video_id)
+    if video is None or video.permission == Permission.for_myself:
+        return
+    subscriber_ids = await SubscriptionDatabaseAdapter(session, Subscription).get_subscriber_ids(
+        video.owner, SUBSCRIPTION_FEED_FANOUT_LIMIT + 1)
+    connection = redis.Redis(host=REDIS_HOST, port=REDIS_PORT)
+    subscription_feed = SubscriptionFeed(connection)
+    try:
+        if len(subscriber_ids) > SUBSCRIPTION_FEED_FANOUT_LIMIT:
+            await subscription_feed.add_pull_owner(video.owner)
+        else:
+            await subscription_feed.push(subscriber_ids, [video])
+    finally:
+        await connection.close()
+
+
+async def _add_to_subscription_feed(session, subscriber_id: uuid.UUID, owner_id: uuid.UUID):
+    connection = redis.Redis(host=REDIS_HOST, port=REDIS_PORT)
+    subscription_feed = SubscriptionFeed(connection)
+    try:
+        if owner_id in await subscription_feed.get_pull_owners():
+            return
+        videos = await VideoDatabaseAdapter(session, Video).get_latest_user_videos(
+            User(id=owner_id), subscriber_permissions, User(id=subscriber_id), SUBSCRIPTION_FEED_SIZE)
+        await subscription_feed.push([subscriber_id], videos)
+    finally:
+        await connection.close()
+
+
+async def _remove_from_subscription_feed(session, subscriber_id: uuid.UUID, owner_id: uuid.UUID):
+    connection = redis.Redis(host=REDIS_HOST, port=REDIS_PORT)
+    subscription_feed = SubscriptionFeed(connection)
+    try:
+        videos = await VideoDatabaseAdapter(session, Video).get_latest_user_videos(
+            User(id=owner_id), subscriber_permissions, User(id=subscriber_id), SUBSCRIPTION_FEED_SIZE)
+        await subscription_feed.remove(subscriber_id, [video.id for video in videos])
+    finally:
+        await connection.close()
+
+
+@celery.task
+def finalize_upload(video_id: str):
+    run_with_async_db_session(lambda session: _finalize_upload(session, uuid.UUID(video_id)))
+
+
+@celery.task
+def collect_expired_uploads():
+    run_with_async_db_session(_collect_expired_uploads)
+
+
+async def _finalize_upload(session, video_id: uuid.UUID):
+    connection = redis.Redis(host=REDIS_HOST, port=REDIS_PORT)
+    pending_uploads = PendingUploads(connection)
+    try:
+        upload = await pending_uploads.get(video_id)
+        if upload is None or upload.error:
+            return
+        async with create_s3_client() as s3:
+            try:
+                duration = await _validate_upload(s3, video_id)
+            except (UploadVideoException, ClientError) as e:
+                reason = e.data.reason if isinstance(e, UploadVideoException) else 'Uploaded files were not found'
+                await _remove_uploads(s3, [video_id])
+                await pending_uploads.fail(video_id, reason)
+                return
+        await VideoDatabaseAdapter(session, Video).create({'id': video_id,
+                                                           'title': upload.title,
+                                                           'description': upload.description,
+                                                           'owner': upload.owner,
+                                                           'permission': Permission[upload.permission],
+                                                           'duration': timedelta(milliseconds=duration)})
+        await pending_uploads.remove(video_id)
+    finally:
+        await connection.close()
+    push_to_subscription_feeds.delay(str(video_id))
+    generate_thumbnails.delay(str(video_id))
+    start_transcoding(video_id)
+
+
+async def _validate_upload(s3: BaseClient, video_id: uuid.UUID) -> int:
+    """Run the upload checks against the objects in s3, reading only the head of the video if it is conclusive."""
+    validator = VideoValidator()
+    video_key, preview_key = f'videos/{video_id}', f'previews/{video_id}'
+    video_size = (await s3.head_object(Bucket=BUCKET_NAME, Key=video_key))['ContentLength']
+    validator.validate_video_size(video_size)
+
+    try:
+        preview = await s3.get_object(Bucket=BUCKET_NAME, Key=preview_key)
+    except s3.exceptions.NoSuchKey:
+        # the preview is optional, it is made from a frame of the video then
+        pass
+    else:
+        preview_content = await preview['Body'].read()
+        validator.validate_preview(MediaInfo.parse(BytesIO(preview_content)), len(preview_content))
+
+    head = await s3.get_object(Bucket=BUCKET_NAME, Key=video_key,
+                               Range=f'bytes=0-{validator.validation_head_size - 1}')
+    video_media_info = MediaInfo.parse(BytesIO(await head['Body'].read()))
+    if not validator.is_conclusive(video_media_info):
+        # the index of the file is not at its start, the whole file has to be parsed
+        with TemporaryFile() as video_file:
+            await s3.download_fileobj(BUCKET_NAME, video_key, video_file)
+            video_file.seek(0)
+            video_media_info = MediaInfo.parse(video_file)
+    duration = video_media_info.general_tracks[0].duration
+    validator.validate_video(video_media_info, video_size, duration or 0)
+    return duration
+
+
+async def _collect_expired_uploads(session):
+    connection = redis.Redis(host=REDIS_HOST, port=REDIS_PORT)
+    pending_uploads = PendingUploads(connection)
+    try:
+        # every upload has two objects and delete_objects takes up to 1000 keys
+        while expired := await pending_uploads.pop_expired(500):
+            existing = set(await VideoDatabaseAdapter(session, Video).get_existing_ids(expired))
+            abandoned = [video_id for video_id in expired if video_id not in existing]
+            if abandoned:
+                async with create_s3_client() as s3:
+                    await _remove_uploads(s3, abandoned)
+    finally:
+        await connection.close()
+
+
+async def _remove_uploads(s3: BaseClient, video_ids: List[uuid.UUID]):
+    await _delete_keys(s3, [f'{prefix}/{video_id}' for video_id in video_ids for prefix in ('videos', 'previews')])
+
+
+# delete_objects takes up to 1000 keys
+s3_delete_batch_size = 1000
+# videos per deletion task, each has a few dozen objects once transcoded
+video_delete_batch_size = 100
+
+
+def start_deletion(video_ids: List[uuid.UUID]):
+    for start in range(0, len(video_ids), video_delete_batch_size):
+        delete_videos.delay([str(video_id) for video_id in video_ids[start:start + video_delete_batch_size]])
+
+
+@celery.task(autoretry_for=(ClientError,), max_retries=VIDEO_DELETE_RETRIES, retry_backoff=True)
+def delete_videos(video_ids: List[str]):
+    run_with_async_db_session(lambda session: _delete_videos(session, [uuid.UUID(video_id) for video_id in video_ids]))
+
+
+@celery.task
+def collect_deleted_videos():
+    run_with_async_db_session(_collect_deleted_videos)
+
+
+async def _delete_videos(session, video_ids: List[uuid.UUID]):
+    """Remove every object of the soft deleted videos from s3, then their rows. Safe to run again on failure."""
+    async with create_s3_client() as s3:
+        keys = []
+        for video_id in video_ids:
+            keys += [f'videos/{video_id}', f'previews/{video_id}']
+            for prefix in (f'hls/{video_id}/', f'thumbnails/{video_id}/'):
+                keys += await _list_keys(s3, prefix)
+        await _delete_keys(s3, keys)
+    await VideoDatabaseAdapter(session, Video).purge(video_ids)
+    connection = redis.Redis(host=REDIS_HOST, port=REDIS_PORT)
+    try:
+        await VideoStatsBuffer(connection, VIDEO_STATS_VIEWERS_TTL).remove(video_ids)
+    finally:
+        await connection.close()
+
+
+async def _collect_deleted_videos(session):
+    """Requeue the videos whose deletion task was lost or ran out of retries."""
+    deleted_before = datetime.utcnow() - timedelta(seconds=VIDEO_DELETE_COLLECT_INTERVAL)
+    video_db = VideoDatabaseAdapter(session, Video)
+    start_deletion(await video_db.get_deleted_ids(deleted_before, video_delete_batch_size * 100))
+
+
+async def _list_keys(s3: BaseClient, prefix: str) -> List[str]:
+    keys = []
+    paginator = s3.get_paginator('list_objects_v2')
+    async for page in paginator.paginate(Bucket=BUCKET_NAME, Prefix=prefix):
+        keys += [content['Key'] for content in page.get('Contents', [])]
+    return keys
+
+
+async def _delete_keys(s3: BaseClient, keys: List[str]):
+    for start in range(0, len(keys), s3_delete_batch_size):
+        objects = [{'Key': key} for key in keys[start:start + s3_delete_batch_size]]
+        response = await s3.delete_objects(Bucket=BUCKET_NAME, Delete={'Objects': objects, 'Quiet': True})
+        if response.get('Errors'):
+            raise ClientError({'Error': response['Errors'][0]}, 'DeleteObjects')
+
+
+def start_transcoding(video_id: uuid.UUID):
+    if HLS_ENABLED:
+        chain(transcode_video.s(str(video_id)), publish_hls.s(str(video_id))).apply_async(
+            link_error=fail_transcoding.si(str(video_id)))
+
+
+@celery.task
+def transcode_video(video_id: str):
+    return run_with_async_db_session(lambda session: _transcode_video(session, uuid.UUID(video_id)))
+
+
+@celery.task
+def publish_hls(variants: List[dict], video_id: str):
+    run_with_async_db_session(lambda session: _publish_hls(session, variants, uuid.UUID(video_id)))
+
+
+@celery.task
+def fail_transcoding(video_id: str):
+    run_with_async_db_session(lambda session: VideoDatabaseAdapter(session, Video).set_processing_status(
+        uuid.UUID(video_id), ProcessingStatus.failed))
+
+
+async def _transcode_video(session, video_id: uuid.UUID) -> List[dict]:
+    """Transcode the uploaded video into every rendition of the ladder and upload the HLS files."""
+    await VideoDatabaseAdapter(session, Video).set_processing_status(video_id, ProcessingStatus.processing)
+    packager = HlsPackager()
+    prefix = packager.get_prefix(video_id)
+    variants = []
+    async with create_s3_client() as s3:
+        with TemporaryDirectory() as work_dir:
+            source = os.path.join(work_dir, 'source')
+            with open(source, 'wb') as source_file:
+                await s3.download_fileobj(BUCKET_NAME, f'videos/{video_id}', source_file)
+            width, height = packager.probe(source)
+            for rendition in packager.get_renditions(height):
+                output_dir = os.path.join(work_dir, rendition.name)
+                packager.transcode(source, output_dir, rendition)
+                for file_name in sorted(os.listdir(output_dir)):
+                    content_type = 'application/vnd.apple.mpegurl' if file_name.endswith('.m3u8') else 'video/mp2t'
+                    with open(os.path.join(output_dir, file_name), 'rb') as file:
+                        await s3.upload_fileobj(file, BUCKET_NAME, f'{prefix}/{rendition.name}/{file_name}',
+                                                ExtraArgs={'ContentType': content_type})
+                rendition_width = round(width * rendition.height / height / 2) * 2
+                variants.append({'name': rendition.name,
+                                 'bandwidth': rendition.bandwidth,
+                                 'resolution': f'{rendition_width}x{rendition.height}'})
+    return variants
+
+
+async def _publish_hls(session, variants: List[dict], video_id: uuid.UUID):
+    packager = HlsPackager()
+    async with create_s3_client() as s3:
+        await s3.put_object(Bucket=BUCKET_NAME, Key=f'{packager.get_prefix(video_id)}/master.m3u8',
+                            Body=packager.build_master_playlist(variants).encode(),
+                            ContentType='application/vnd.apple.mpegurl')
+    await VideoDatabaseAdapter(session, Video).set_processing_status(video_id, ProcessingStatus.ready)
+
+
+@celery.task
+def generate_thumbnails(video_id: str):
+    run_with_async_db_session(lambda session: _generate_thumbnails(session, uuid.UUID(video_id)))
+
+
+async def _generate_thumbnails(session, video_id: uuid.UUID):
+    """
+    Resize the preview into every width and format and build the seek preview sprite sheets.
+    Without an uploaded preview one is made from a frame of the video first.
+    """
+    video_db = VideoDatabaseAdapter(session, Video)
+    video = await video_db.get(video_id)
+    if video is None:
+        return
+    generator = ThumbnailGenerator()
+    packager = HlsPackager()
+    preview_key = f'previews/{video_id}'
+    duration = video.duration.total_seconds()
+    async with create_s3_client() as s3:
+        with TemporaryDirectory() as work_dir:
+            source = os.path.join(work_dir, 'source')
+            with open(source, 'wb') as source_file:
+                await s3.download_fileobj(BUCKET_NAME, f'videos/{video_id}', source_file)
+
+            preview = os.path.join(work_dir, 'preview')
+            try:
+                with open(preview, 'wb') as preview_file:
+                    await s3.download_fileobj(BUCKET_NAME, preview_key, preview_file)
+            except ClientError:
+                preview = os.path.join(work_dir, 'frame.jpg')
+                generator.extract_frame(source, preview, duration)
+                with open(preview, 'rb') as preview_file:
+                    await s3.upload_fileobj(preview_file, BUCKET_NAME, preview_key,
+                                            ExtraArgs={'ContentType': 'image/jpeg'})
+
+            for width in generator.widths:
+                for format, (content_type, _) in generator.formats.items():
+                    output = os.path.join(work_dir, f'{width}.{format}')
+                    generator.resize(preview, output, width, format)
+                    with open(output, 'rb') as file:
+                        await s3.upload_fileobj(file, BUCKET_NAME, generator.get_key(video_id, width, format),
+                                                ExtraArgs={'ContentType': content_type})
+
+            sprites_dir = os.path.join(work_dir, 'sprites')
+            sheets = generator.build_sprites(source, sprites_dir)
+            for name in sheets:
+                with open(os.path.join(sprites_dir, name), 'rb') as file:
+                    await s3.upload_fileobj(file, BUCKET_NAME, generator.get_sprite_key(video_id, name),
+                                            ExtraArgs={'ContentType': 'image/jpeg'})
+            width, height = packager.probe(source)
+            metadata = generator.build_sprite_metadata(sheets, width, height, duration)
+            await s3.put_object(Bucket=BUCKET_NAME, Key=generator.get_sprite_metadata_key(video_id),
+                                Body=json.dumps(metadata).encode(), ContentType='application/json')
+    await video_db.set_has_thumbnails(video_id, True)
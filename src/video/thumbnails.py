@@ -0,0 +1,71 @@
+import math
+import os
+import subprocess
+import uuid
+from typing import Dict, List
+
+from src.config import SPRITE_INTERVAL_SECONDS
+
+
+class ThumbnailGenerator:
+    """
+    Derives sized thumbnails and seek preview sprite sheets from the preview and the video with ffmpeg.
+
+    Every width is generated in every format, a preview narrower than the width is not upscaled,
+    so the key of any width and format exists once the video has thumbnails.
+    """
+    widths = [160, 320, 640, 1280]
+    formats = {
+        'webp': ('image/webp', ['-c:v', 'libwebp', '-quality', '80']),
+        'avif': ('image/avif', ['-c:v', 'libaom-av1', '-still-picture', '1', '-crf', '32', '-cpu-used', '6']),
+    }
+    sprite_width = 160
+    sprite_columns = 10
+    sprite_rows = 10
+
+    def get_prefix(self, video_id: uuid.UUID) -> str:
+        return f'thumbnails/{video_id}'
+
+    def get_key(self, video_id: uuid.UUID, width: int, format: str) -> str:
+        return f'{self.get_prefix(video_id)}/{width}.{format}'
+
+    def get_sprite_metadata_key(self, video_id: uuid.UUID) -> str:
+        return f'{self.get_prefix(video_id)}/sprites.json'
+
+    def get_sprite_key(self, video_id: uuid.UUID, name: str) -> str:
+        return f'{self.get_prefix(video_id)}/sprites/{name}'
+
+    def get_width(self, size: int) -> int:
+        """The smallest width covering the requested size, the largest one if none does."""
+        return next((width for width in self.widths if width >= size), self.widths[-1])
+
+    def extract_frame(self, source: str, output: str, duration: float):
+        """Pick a representative frame from around a tenth of the video."""
+        subprocess.run(['ffmpeg', '-v', 'error', '-y', '-ss', f'{duration / 10:.3f}', '-i', source,
+                        '-vf', 'thumbnail', '-frames:v', '1', '-q:v', '2', output],
+                       check=True)
+
+    def resize(self, source: str, output: str, width: int, format: str):
+        subprocess.run(['ffmpeg', '-v', 'error', '-y', '-i', source,
+                        '-vf', f"scale='min({width},iw)':-2", '-frames:v', '1',
+                        *self.formats[format][1], output],
+                       check=True)
+
+    def build_sprites(self, source: str, output_dir: str) -> List[str]:
+        """Tile a frame every SPRITE_INTERVAL_SECONDS into jpeg sheets, returns the file names of the sheets."""
+        os.makedirs(output_dir, exist_ok=True)
+        subprocess.run(['ffmpeg', '-v', 'error', '-y', '-i', source,
+                        '-vf', f'fps=1/{SPRITE_INTERVAL_SECONDS},scale={self.sprite_width}:-2,'
+                               f'tile={self.sprite_columns}x{self.sprite_rows}',
+                        '-q:v', '5', os.path.join(output_dir, 'sprite_%03d.jpg')],
+                       check=True)
+        return sorted(os.listdir(output_dir))
+
+    def build_sprite_metadata(self, sheets: List[str], width: int, height: int, duration: float) -> Dict:
+        return {'interval': SPRITE_INTERVAL_SECONDS,
+                'columns': self.sprite_columns,
+                'rows': self.sprite_rows,
+                'tile_width': self.sprite_width,
+                'tile_height': round(self.sprite_width * height / width / 2) * 2,
+                'frames': math.ceil(duration / SPRITE_INTERVAL_SECONDS),
+                'sheets': sheets}
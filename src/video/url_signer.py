@@ -0,0 +1,39 @@
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+from botocore.client import BaseClient
+
+from src.config import BUCKET_NAME
+
+
+class UrlSigner:
+    """
+    Presigned S3 GET urls cached in an LRU per (key, expiry bucket).
+
+    Urls are signed for `expires_in` seconds and reused until the expiry bucket they were signed in
+    is over, so a served url stays valid for at least `expires_in` minus the bucket length.
+    Returning the same url for a while also lets browsers cache the previews.
+    """
+
+    def __init__(self, expires_in: int, max_size: int):
+        self.expires_in = expires_in
+        self.bucket_length = expires_in // 2
+        self.max_size = max_size
+        self._urls: OrderedDict[str, Tuple[int, str]] = OrderedDict()
+
+    async def sign(self, s3: BaseClient, key: str) -> str:
+        bucket = int(time.time()) // self.bucket_length
+        cached = self._urls.get(key)
+        if cached is not None and cached[0] == bucket:
+            self._urls.move_to_end(key)
+            return cached[1]
+
+        url = await s3.generate_presigned_url('get_object',
+                                              Params={'Bucket': BUCKET_NAME, 'Key': key},
+                                              ExpiresIn=self.expires_in)
+        self._urls[key] = (bucket, url)
+        self._urls.move_to_end(key)
+        if len(self._urls) > self.max_size:
+            self._urls.popitem(last=False)
+        return url
@@ -1,39 +1,39 @@
-import uuid
-from typing import AsyncGenerator
-
-import aioboto3
 from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.config import BOTO_SERVICE_NAME, BOTO_ENDPOINT_URL, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY
+from src.config import PRESIGNED_URL_EXPIRES, PRESIGNED_URL_CACHE_SIZE, HLS_PLAYLIST_CACHE_SIZE
+
 from src.database import get_async_db_session
 from src.like.like import get_like_manager
 from src.like.like_manager import LikeManager
+from src.redis_main import connection
+from src.s3 import get_s3_client
+from src.video.hls import HlsPlaylists
 from src.video.models import Video
+from src.video.pending_uploads import PendingUploads
+from src.video.popularity_ranking import PopularityRanking
+from src.video.subscription_feed import SubscriptionFeed
+from src.video.url_signer import UrlSigner
 from src.video.video_database_adapter import VideoDatabaseAdapter
 from src.video.video_manager import VideoManager
+from src.video.video_stats import get_video_stats_db
 from src.view.view import get_view_manager
 from src.view.view_manager import ViewManager
 
-s3_session = aioboto3.Session()
-
-
-async def get_async_s3_session():
-    async with s3_session.client(
-            service_name=BOTO_SERVICE_NAME,
-            endpoint_url=BOTO_ENDPOINT_URL,
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY
-    ) as session:
-        yield session
+popularity_ranking = PopularityRanking(connection)
+subscription_feed = SubscriptionFeed(connection)
+url_signer = UrlSigner(PRESIGNED_URL_EXPIRES, PRESIGNED_URL_CACHE_SIZE)
+pending_uploads = PendingUploads(connection)
+hls_playlists = HlsPlaylists(HLS_PLAYLIST_CACHE_SIZE)
 
 
 async def get_video_db(db_session=Depends(get_async_db_session)):
     yield VideoDatabaseAdapter(db_session, Video)
 
 
-async def get_video_manager(s3=Depends(get_async_s3_session),
+async def get_video_manager(s3=Depends(get_s3_client),
                             video_db=Depends(get_video_db),
                             view_manager: ViewManager = Depends(get_view_manager),
-                            like_manager: LikeManager = Depends(get_like_manager)):
-    yield VideoManager(s3, video_db, view_manager, like_manager)
+                            like_manager: LikeManager = Depends(get_like_manager),
+                            video_stats_db=Depends(get_video_stats_db)):
+    yield VideoManager(s3, video_db, view_manager, like_manager, video_stats_db, popularity_ranking,
+                       subscription_feed, url_signer, pending_uploads, hls_playlists)
@@ -1,16 +1,20 @@
 import uuid
-from typing import Type, Dict, Any, List
+from datetime import datetime
+from typing import Type, Dict, Any, List, Optional, Callable, Tuple
 
-from sqlalchemy import select, Select, delete, Delete, union, union_all, CompoundSelect, and_, or_
+from sqlalchemy import select, Select, delete, Delete, update, union, union_all, CompoundSelect, and_, or_, tuple_, \
+    ColumnElement, inspect
 from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import aliased
+from sqlalchemy.orm import aliased, make_transient_to_detached
 from sqlalchemy.sql.functions import count
 
+from src.like.models import Like
 from src.subscription.models import Subscription
 from src.user.models import User
-from src.video.models import Video, Permission
-from src.view.models import View
+from src.video.cursor import encode_cursor, decode_cursor
+from src.video.models import Video, Permission, VideoStats, ProcessingStatus
+from src.view.models import View, UserView
 
 
 class VideoDatabaseAdapter:
@@ -25,6 +29,7 @@ class VideoDatabaseAdapter:
     async def create(self, create_dict: Dict[str, Any]):
         video = self.video_table(**create_dict)
         self.session.add(video)
+        self.session.add(VideoStats(video=video))
         await self.session.commit()
         return video
 
@@ -35,73 +40,169 @@ class VideoDatabaseAdapter:
         await self.session.commit()
         return video
 
+    async def set_processing_status(self, id: uuid.UUID, processing_status: ProcessingStatus):
+        statement = update(self.video_table).where(self.video_table.id == id).values(
+            processing_status=processing_status)
+        await self.session.execute(statement)
+        await self.session.commit()
+
+    async def set_has_thumbnails(self, id: uuid.UUID, has_thumbnails: bool):
+        statement = update(self.video_table).where(self.video_table.id == id).values(has_thumbnails=has_thumbnails)
+        await self.session.execute(statement)
+        await self.session.commit()
+
     async def get(self, id: uuid.UUID) -> Video:
-        statement = select(self.video_table).where(self.video_table.id == id)
+        statement = self._select().where(self.video_table.id == id)
         return await self._get_video(statement)
 
-    async def get_latest_videos(self, user_permissions: List[Permission], user: User):
-        statement = self.get_permission_select(user, user_permissions).order_by(self.video_table.uploaded_at.desc())
-        return await self._get_videos(statement)
+    async def get_snapshot(self, id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        """The column values of the video, which may be shared by sessions, unlike the video itself."""
+        video = await self.get(id)
+        if video is None:
+            return None
+        return {column.key: getattr(video, column.key) for column in inspect(self.video_table).column_attrs}
+
+    async def from_snapshot(self, snapshot: Dict[str, Any]) -> Video:
+        """A video of the session with the values of the snapshot, as if it was loaded, without a select."""
+        video = self.video_table(**snapshot)
+        make_transient_to_detached(video)
+        return await self.session.merge(video, load=False)
+
+    async def get_existing_ids(self, video_ids: List[uuid.UUID]) -> List[uuid.UUID]:
+        results = await self.session.scalars(select(self.video_table.id).where(self.video_table.id.in_(video_ids)))
+        return results.all()
+
+    async def get_permitted_videos(self, video_ids: List[uuid.UUID], user_permissions: List[Permission], user: User):
+        statement = self.get_permission_select(user, user_permissions).where(
+            self.video_table.id.in_(video_ids))
+        results = await self.session.execute(statement)
+        return results.scalars().all()
+
+    async def get_latest_videos(self, user_permissions: List[Permission], user: User,
+                                limit: int, offset: int = 0, cursor: Optional[str] = None):
+        statement = self.get_permission_select(user, user_permissions)
+        return await self._get_page(statement, self.video_table.uploaded_at, datetime.fromisoformat,
+                                    limit, offset, cursor)
 
-    async def get_liked_by_users(self, user_permissions: List[Permission], user: User):
+    async def get_liked_by_users(self, user_permissions: List[Permission], user: User,
+                                 limit: int, offset: int = 0, cursor: Optional[str] = None):
         statement = self.get_permission_select(user, user_permissions).join(self.video_table.liked_users).group_by(
-            self.video_table.id).order_by(
-            count().desc())
-        return await self._get_videos(statement)
+            self.video_table.id)
+        return await self._get_page(statement, count(), int, limit, offset, cursor, aggregated=True)
 
-    async def get_popular_videos(self, user_permissions: List[Permission], user: User):
+    async def get_popular_videos(self, user_permissions: List[Permission], user: User,
+                                 limit: int, offset: int = 0, cursor: Optional[str] = None):
         statement = self.get_permission_select(user, user_permissions).join(self.video_table.models_views).where(
             View.viewing_time != None).group_by(
-            self.video_table.id).order_by(
-            count().desc())
-        return await self._get_videos(statement)
+            self.video_table.id)
+        return await self._get_page(statement, count(), int, limit, offset, cursor, aggregated=True)
 
-    async def get_subscribed_videos(self, user_permissions: List[Permission], user: User):
+    async def get_subscribed_videos(self, user_permissions: List[Permission], user: User,
+                                    limit: int, offset: int = 0, cursor: Optional[str] = None,
+                                    owners: Optional[List[uuid.UUID]] = None):
         statement = self.get_permission_select(user, user_permissions) \
-            .where(and_(self.video_table.owner == Subscription.subscribed, user.id == Subscription.subscriber)) \
-            .order_by(self.video_table.uploaded_at.desc())
-        return await self._get_videos(statement)
-
-    async def get_liked_videos(self, current_user: User):
-        liked_videos = await self.session.scalars(current_user.liked_videos)
-        return liked_videos.all()
-
-    async def get_viewed_videos(self, current_user: User):
-        viewed_videos = await self.session.scalars(current_user.viewed_videos)
-        return viewed_videos.all()
-
-    async def get_user_videos(self, requested_user: User, user_permissions: List[Permission], current_user: User):
-        statement = self.get_permission_select(current_user, user_permissions, requested_user.videos)
-        return await self._get_videos(statement)
+            .join(Subscription, Subscription.subscribed == self.video_table.owner) \
+            .where(Subscription.subscriber == user.id)
+        if owners is not None:
+            statement = statement.where(self.video_table.owner.in_(owners))
+        return await self._get_page(statement, self.video_table.uploaded_at, datetime.fromisoformat,
+                                    limit, offset, cursor)
+
+    async def get_liked_videos(self, current_user: User,
+                               limit: int, offset: int = 0, cursor: Optional[str] = None):
+        statement = self._select().join(Like, Like.video_id == self.video_table.id).where(
+            Like.owner_id == current_user.id, Like.status)
+        return await self._get_page(statement, self.video_table.uploaded_at, datetime.fromisoformat,
+                                    limit, offset, cursor)
+
+    async def get_viewed_videos(self, current_user: User,
+                                limit: int, offset: int = 0, cursor: Optional[str] = None):
+        statement = self._select().join(UserView, UserView.video_id == self.video_table.id).where(
+            UserView.owner_id == current_user.id)
+        return await self._get_page(statement, self.video_table.uploaded_at, datetime.fromisoformat,
+                                    limit, offset, cursor)
+
+    async def get_user_videos(self, requested_user: User, user_permissions: List[Permission], current_user: User,
+                              limit: int, offset: int = 0, cursor: Optional[str] = None):
+        statement = self.get_permission_select(current_user, user_permissions, self._get_owner_select(requested_user))
+        return await self._get_page(statement, self.video_table.uploaded_at, datetime.fromisoformat,
+                                    limit, offset, cursor, descending=False)
 
     async def get_latest_user_videos(self, requested_user: User,
                                      user_permissions: List[Permission],
-                                     current_user: User):
-        statement = self.get_permission_select(current_user, user_permissions, requested_user.videos).order_by(
-            self.video_table.uploaded_at.desc())
-        # statement = select(self.video_table).order_by(self.video_table.upload_at.desc()).where(
-        #     requested_user.id == self.video_table.author)
-        return await self._get_videos(statement)
+                                     current_user: User,
+                                     limit: int, offset: int = 0, cursor: Optional[str] = None):
+        statement = self.get_permission_select(current_user, user_permissions, self._get_owner_select(requested_user))
+        return await self._get_page(statement, self.video_table.uploaded_at, datetime.fromisoformat,
+                                    limit, offset, cursor)
 
     async def get_popular_user_videos(self, requested_user: User,
                                       user_permissions: List[Permission],
-                                      current_user: User):
-        # statement = select(self.video_table).join(self.video_table.models_views).where(
-        #     View.viewing_time != None, requested_user.id == self.video_table.author).group_by(
-        #     self.video_table.id).order_by(
-        #     count().desc())
-        statement = self.get_permission_select(current_user, user_permissions, requested_user.videos).join(
+                                      current_user: User,
+                                      limit: int, offset: int = 0, cursor: Optional[str] = None):
+        statement = self.get_permission_select(current_user, user_permissions,
+                                               self._get_owner_select(requested_user)).join(
             self.video_table.models_views).where(
-            View.viewing_time != None).group_by(self.video_table.id).order_by(count().desc())
-        return await self._get_videos(statement)
+            View.viewing_time != None).group_by(self.video_table.id)
+        return await self._get_page(statement, count(), int, limit, offset, cursor, aggregated=True)
+
+    async def soft_delete(self, video_ids: List[uuid.UUID]) -> List[Tuple[uuid.UUID, uuid.UUID]]:
+        """Hide the videos from every query until purge removes them, returns the ids and owners of the hidden."""
+        return await self._soft_delete(self.video_table.id.in_(video_ids))
+
+    async def soft_delete_user_videos(self, owner_id: uuid.UUID) -> List[Tuple[uuid.UUID, uuid.UUID]]:
+        return await self._soft_delete(self.video_table.owner == owner_id)
 
-    async def remove(self, video: Video):
-        statement = delete(self.video_table).where(self.video_table.id == video.id)
+    async def get_deleted_ids(self, deleted_before: datetime, limit: int) -> List[uuid.UUID]:
+        statement = select(self.video_table.id).where(self.video_table.deleted_at < deleted_before).order_by(
+            self.video_table.deleted_at).limit(limit)
+        results = await self.session.scalars(statement)
+        return results.all()
+
+    async def purge(self, video_ids: List[uuid.UUID]):
+        statement = delete(self.video_table).where(self.video_table.id.in_(video_ids),
+                                                   self.video_table.deleted_at != None)
         await self._remove(statement)
 
-    async def _get_videos(self, statement):
+    async def _get_page(self,
+                        statement: Select,
+                        score: ColumnElement,
+                        score_type: Callable[[Any], Any],
+                        limit: int,
+                        offset: int = 0,
+                        cursor: Optional[str] = None,
+                        aggregated: bool = False,
+                        descending: bool = True) -> List[Video]:
+        """
+        Fetch a single page of videos ordered by (score, id).
+
+        If a cursor is given, the page starts right after the video it was issued for (keyset pagination),
+        otherwise the offset is used. Every returned video gets the cursor of its own position in `cursor`.
+        """
+        key = tuple_(score, self.video_table.id)
+        if cursor is not None:
+            last_key = tuple_(*decode_cursor(cursor, score_type, uuid.UUID))
+            condition = key < last_key if descending else key > last_key
+            statement = statement.having(condition) if aggregated else statement.where(condition)
+        else:
+            statement = statement.offset(offset)
+        order = [score.desc(), self.video_table.id.desc()] if descending else [score.asc(), self.video_table.id.asc()]
+        statement = statement.add_columns(score).order_by(*order).limit(limit)
+
         results = await self.session.execute(statement)
-        return results.scalars().unique().all()
+        videos = []
+        for video, video_score in results.all():
+            video.cursor = encode_cursor(video_score, video.id)
+            videos.append(video)
+        return videos
+
+    async def _soft_delete(self, condition: ColumnElement) -> List[Tuple[uuid.UUID, uuid.UUID]]:
+        statement = update(self.video_table).where(condition, self.video_table.deleted_at == None).values(
+            deleted_at=datetime.utcnow()).returning(self.video_table.id, self.video_table.owner)
+        results = await self.session.execute(statement)
+        deleted = [tuple(row) for row in results.all()]
+        await self.session.commit()
+        return deleted
 
     async def _get_video(self, statement: Select):
         results = await self.session.execute(statement)
@@ -111,15 +212,22 @@ class VideoDatabaseAdapter:
         await self.session.execute(statement)
         await self.session.commit()
 
+    def _select(self) -> Select:
+        return select(self.video_table).where(self.video_table.deleted_at == None)
+
+    def _get_owner_select(self, owner: User) -> Select:
+        return self._select().where(self.video_table.owner == owner.id)
+
     def get_permission_select(self, user: User, user_permissions: List[Permission], selected: Select = None):
         if selected is None:
-            selected = select(self.video_table)
-        return selected \
-            .where(or_(self.video_table.permission.in_(user_permissions),
-                       and_(self.video_table.permission == Permission.for_myself,
-                            self.video_table.owner == user.id),
-                       and_(self.video_table.permission == Permission.for_subscribers,
-                            or_(user.id == self.video_table.owner,
-                                and_(Subscription.subscriber == user.id,
-                                     Subscription.subscribed == self.video_table.owner),
-                                ))))
+            selected = self._select()
+        permitted = [self.video_table.permission.in_(user_permissions)]
+        if user.id:
+            is_subscribed = select(Subscription.subscriber).where(
+                Subscription.subscriber == user.id,
+                Subscription.subscribed == self.video_table.owner).correlate(self.video_table).exists()
+            permitted += [and_(self.video_table.permission == Permission.for_myself,
+                               self.video_table.owner == user.id),
+                          and_(self.video_table.permission == Permission.for_subscribers,
+                               or_(self.video_table.owner == user.id, is_subscribed))]
+        return selected.where(or_(*permitted))
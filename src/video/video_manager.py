@@ -1,44 +1,74 @@
+import asyncio
+import json
+from io import BytesIO
 from uuid import UUID
 import uuid
-from datetime import timedelta
-from typing import List, Optional, Any, Union
+from datetime import timedelta, datetime
+from typing import List, Optional, Any, Union, Tuple
 from botocore.client import BaseClient
 from botocore.exceptions import ClientError
 
 from src.like.like_manager import LikeManager
+from src.offload import offloader
+from src.request_cache import cached, identity_cache
 from src.user.exceptions import AccessDenied
 from src.user.models import User
 from src.user.shemas import UserRead
-from src.video.exceptions import UploadVideoException, NonExistentVideo, DeleteVideoException, NonExistentPermission
-from src.video.models import Video, Permission
-from src.video.shemas import VideoUpload, BaseVideo, VideoView
-from src.config import BUCKET_NAME
+from src.video.exceptions import UploadVideoException, NonExistentVideo
+from src.video.hls import HlsPlaylists
+from src.video.models import Video, Permission, ProcessingStatus
+from src.video.pending_uploads import PendingUploads
+from src.video.shemas import VideoUpload, BaseVideo, VideoView, VideoLink, PendingUpload, PresignedPost, \
+    UploadTarget, UploadStatus, SpriteSheets
+from src.config import BUCKET_NAME, SUBSCRIPTION_FEED_SIZE, UPLOAD_MODE, UPLOAD_PART_SIZE, UPLOAD_CONCURRENCY, \
+    UPLOAD_EXPIRES, PRESIGNED_URL_EXPIRES
+from src.video.cursor import encode_cursor, decode_cursor
+from src.video.popularity_ranking import PopularityRanking
+from src.video.redis_ranking import RedisRanking
+from src.video.subscription_feed import SubscriptionFeed
+from src.video.tasks import push_to_subscription_feeds, finalize_upload, start_transcoding, generate_thumbnails, \
+    start_deletion
+from src.video.thumbnails import ThumbnailGenerator
+from src.video.url_signer import UrlSigner
 from src.video.video_database_adapter import VideoDatabaseAdapter
+from src.video.video_stats_database_adapter import VideoStatsDatabaseAdapter
+from src.video.video_validator import VideoValidator
 from src.view.view_manager import ViewManager
 from pymediainfo import MediaInfo
 
 
 class VideoManager:
-    max_video_size = 100
-    max_preview_size = 10
-    max_title_len = 100
-    max_description_len = 5000
-    min_video_duration = 15
+    validator = VideoValidator()
+    thumbnails = ThumbnailGenerator()
 
     def __init__(self,
                  s3: BaseClient,
                  video_db: VideoDatabaseAdapter,
                  view_manager: ViewManager,
-                 like_manager: LikeManager):
+                 like_manager: LikeManager,
+                 video_stats_db: VideoStatsDatabaseAdapter,
+                 ranking: PopularityRanking,
+                 subscription_feed: SubscriptionFeed,
+                 url_signer: UrlSigner,
+                 pending_uploads: PendingUploads,
+                 hls_playlists: HlsPlaylists):
         self.s3 = s3
         self.video_db = video_db
         self.view_manager = view_manager
         self.like_manager = like_manager
+        self.video_stats_db = video_stats_db
+        self.ranking = ranking
+        self.subscription_feed = subscription_feed
+        self.url_signer = url_signer
+        self.pending_uploads = pending_uploads
+        self.hls_playlists = hls_playlists
 
     async def get(self,
                   id: UUID
                   ) -> Optional[Video]:
-        return await self.video_db.get(id)
+        # the calls sharing the cache run on sessions of their own, so each gets its own video
+        snapshot = await cached(identity_cache, ('video', id), lambda: self.video_db.get_snapshot(id))
+        return None if snapshot is None else await self.video_db.from_snapshot(snapshot)
 
     async def get_video_view(self,
                              video: Video,
@@ -53,18 +83,37 @@ class VideoManager:
                                           video: Video,
                                           current_user: User = None
                                           ) -> VideoView:
-        video.permission = video.permission.name if isinstance(video.permission, Permission) else video.permission
-        video_view = VideoView.from_orm(video)
-        video_view.likes = await self.like_manager.count_video_likes(video)
-        video_view.dislikes = await self.like_manager.count_video_dislikes(video)
-        video_view.views = await self.view_manager.count_video_views(video)
+        video_views = await self.convert_videos_to_video_views([video], current_user)
+        return video_views[0]
+
+    async def convert_videos_to_video_views(self,
+                                            videos: List[Video],
+                                            current_user: User = None
+                                            ) -> List[VideoView]:
+        if not videos:
+            return []
+        videos_stats = await self.video_stats_db.get([video.id for video in videos])
+        videos_stats = {stats.video_id: stats for stats in videos_stats}
+        user_views, user_likes = {}, {}
         if current_user and current_user.id:
-            user_view = await self.view_manager.get_user_view(current_user, video)
-            if user_view:
-                video_view.stop_timecode = user_view.stop_timecode
-            like = await self.like_manager.get_rate(current_user, video)
-            video_view.like = like.status if like else like
-        return video_view
+            user_views = await self.view_manager.get_user_views(current_user, videos)
+            user_likes = await self.like_manager.get_rates(current_user, videos)
+
+        video_views = []
+        for video in videos:
+            video_view = VideoView.from_orm(video)
+            if video.id in videos_stats:
+                video_view.likes = videos_stats[video.id].likes
+                video_view.dislikes = videos_stats[video.id].dislikes
+                video_view.views = videos_stats[video.id].views
+                video_view.comments_count = videos_stats[video.id].comments
+                video_view.unique_viewers = videos_stats[video.id].unique_viewers
+            if video.id in user_views:
+                video_view.stop_timecode = user_views[video.id].stop_timecode
+            if video.id in user_likes:
+                video_view.like = user_likes[video.id].status
+            video_views.append(video_view)
+        return video_views
 
     async def upload(self,
                      video: VideoUpload,
@@ -79,39 +128,195 @@ class VideoManager:
         #     await video._video_file.seek(0)
         if not user.is_verified:
             raise AccessDenied
-        video_media_info = MediaInfo.parse(video._video_file.file)
-        preview_media_info = MediaInfo.parse(video._preview_file.file)
-        self._validate(video, video_media_info, preview_media_info)
+        self.validator.validate_fields(video)
+        video_id = uuid.uuid4()
+        if UPLOAD_MODE == 'streaming':
+            duration = await self._upload_streaming(video, video_id)
+        else:
+            duration = await self._upload_buffered(video, video_id)
+
+        video = await self.video_db.create(video.dict()
+                                           | {'id': video_id,
+                                              "owner": user.id,
+                                              'permission': Permission[video.permission],
+                                              "duration": timedelta(milliseconds=duration)})
+        push_to_subscription_feeds.delay(str(video.id))
+        generate_thumbnails.delay(str(video.id))
+        start_transcoding(video.id)
+        return VideoView.from_orm(video)
+
+    async def init_upload(self,
+                          video: BaseVideo,
+                          user: User
+                          ) -> UploadTarget:
+        """Register an upload straight to s3 and return the presigned forms for the video and the preview."""
+        if not user.is_verified:
+            raise AccessDenied
+        self.validator.validate_fields(video)
+        video_id = uuid.uuid4()
+        await self.pending_uploads.create(video_id, PendingUpload(**video.dict(), owner=user.id))
+        video_post = await self.s3.generate_presigned_post(
+            BUCKET_NAME, f'videos/{video_id}',
+            Conditions=[['content-length-range', 1, self.validator.max_video_size * 1024 * 1024]],
+            ExpiresIn=UPLOAD_EXPIRES)
+        preview_post = await self.s3.generate_presigned_post(
+            BUCKET_NAME, f'previews/{video_id}',
+            Conditions=[['content-length-range', 1, self.validator.max_preview_size * 1024 * 1024]],
+            ExpiresIn=UPLOAD_EXPIRES)
+        return UploadTarget(id=video_id, video=PresignedPost(**video_post), preview=PresignedPost(**preview_post))
+
+    async def complete_upload(self,
+                              id: UUID,
+                              user: User
+                              ) -> None:
+        upload = await self.pending_uploads.get(id)
+        if upload is None or upload.owner != user.id:
+            raise NonExistentVideo
+        if await self.pending_uploads.complete(id):
+            finalize_upload.delay(str(id))
+
+    async def get_upload_status(self,
+                                id: UUID,
+                                user: User
+                                ) -> UploadStatus:
+        upload = await self.pending_uploads.get(id)
+        if upload is None:
+            video = await self.video_db.get(id)
+            if video is None or video.owner != user.id:
+                raise NonExistentVideo
+            return UploadStatus(status='ready')
+        if upload.owner != user.id:
+            raise NonExistentVideo
+        if upload.error:
+            return UploadStatus(status='failed', reason=upload.error)
+        return UploadStatus(status='processing' if upload.completed else 'uploading')
+
+    async def _upload_buffered(self,
+                               video: VideoUpload,
+                               video_id: UUID
+                               ) -> int:
+        video_media_info = await offloader.run('mediainfo', MediaInfo.parse, video._video_file.file)
+        if video._preview_file:
+            preview_media_info = await offloader.run('mediainfo', MediaInfo.parse, video._preview_file.file)
+            self.validator.validate_preview(preview_media_info)
+            await video._preview_file.seek(0)
+        self.validator.validate_video(video_media_info,
+                                      video_media_info.general_tracks[0].file_size,
+                                      video_media_info.general_tracks[0].duration)
         await video._video_file.seek(0)
-        await video._preview_file.seek(0)
 
         video_head = None
-        video_id = uuid.uuid4()
 
         try:
             await self.s3.upload_fileobj(video._video_file.file, BUCKET_NAME, f'videos/{video_id}')
-            await self.s3.upload_fileobj(video._preview_file.file, BUCKET_NAME, f'previews/{video_id}')
+            if video._preview_file:
+                await self.s3.upload_fileobj(video._preview_file.file, BUCKET_NAME, f'previews/{video_id}')
         except ClientError:
             pass
 
         try:
             video_head = await self.s3.head_object(Bucket=BUCKET_NAME, Key=f'videos/{video_id}')
-            await self.s3.head_object(Bucket=BUCKET_NAME, Key=f'previews/{video_id}')
+            if video._preview_file:
+                await self.s3.head_object(Bucket=BUCKET_NAME, Key=f'previews/{video_id}')
         except ClientError:
             while video_head:
                 response = await self.s3.delete_object(Bucket=BUCKET_NAME, Key='videos/{video_id}')
                 if response["DeleteMarker"]:
                     break
             raise UploadVideoException(data={"reason": 'Failed to upload files to s3'})
+        return video_media_info.general_tracks[0].duration
 
-        video = await self.video_db.create(video.dict()
-                                           | {'id': video_id,
-                                              "owner": user.id,
-                                              'permission': Permission[video.permission],
-                                              "duration": timedelta(
-                                                  milliseconds=video_media_info.general_tracks[0].duration)})
-        video.permission = video.permission.name
-        return VideoView.from_orm(video)
+    async def _upload_streaming(self,
+                                video: VideoUpload,
+                                video_id: UUID
+                                ) -> int:
+        """
+        Send the video, already spooled by the form parser, to s3 as a multipart upload while reading it once.
+
+        Parts are uploaded concurrently with at most UPLOAD_CONCURRENCY parts in flight and the upload is aborted
+        as soon as the size limit or any part fails. The head of the file is parsed with MediaInfo in parallel,
+        the whole file only when the head is not conclusive, and the video is validated before the upload
+        is completed.
+        """
+        if video._preview_file:
+            preview_media_info = await offloader.run('mediainfo', MediaInfo.parse, video._preview_file.file)
+            self.validator.validate_preview(preview_media_info)
+            await video._preview_file.seek(0)
+
+        key = f'videos/{video_id}'
+        try:
+            multipart_upload = await self.s3.create_multipart_upload(Bucket=BUCKET_NAME, Key=key)
+        except ClientError:
+            raise UploadVideoException(data={"reason": 'Failed to upload files to s3'})
+        upload_id = multipart_upload['UploadId']
+        semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+        uploaded_parts = []
+        tasks = []
+        if video._preview_file:
+            tasks.append(asyncio.create_task(
+                self.s3.upload_fileobj(video._preview_file.file, BUCKET_NAME, f'previews/{video_id}')))
+        validation = None
+        size = 0
+        try:
+            part_number = 1
+            while chunk := await video._video_file.read(UPLOAD_PART_SIZE):
+                size += len(chunk)
+                self.validator.validate_video_size(size)
+                if validation is None:
+                    head = BytesIO(chunk[:self.validator.validation_head_size])
+                    validation = asyncio.create_task(offloader.run('mediainfo', MediaInfo.parse, head))
+                for task in tasks:
+                    if task.done() and task.exception():
+                        raise task.exception()
+                await semaphore.acquire()
+                tasks.append(asyncio.create_task(
+                    self._upload_part(semaphore, key, upload_id, part_number, chunk, uploaded_parts)))
+                part_number += 1
+
+            if validation is None:
+                raise UploadVideoException(
+                    data={"reason": 'Uploaded file is not a video or this format is not supported'})
+            video_media_info = await validation
+            await asyncio.gather(*tasks)
+            if not self.validator.is_conclusive(video_media_info):
+                # the index of the file is not at its start, the whole file has to be parsed
+                await video._video_file.seek(0)
+                video_media_info = await offloader.run('mediainfo', MediaInfo.parse, video._video_file.file)
+            duration = video_media_info.general_tracks[0].duration
+            self.validator.validate_video(video_media_info, size, duration or 0)
+
+            await self.s3.complete_multipart_upload(
+                Bucket=BUCKET_NAME, Key=key, UploadId=upload_id,
+                MultipartUpload={'Parts': sorted(uploaded_parts, key=lambda part: part['PartNumber'])})
+        except BaseException as e:
+            if validation is not None:
+                tasks.append(validation)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            try:
+                await self.s3.abort_multipart_upload(Bucket=BUCKET_NAME, Key=key, UploadId=upload_id)
+                await self.s3.delete_object(Bucket=BUCKET_NAME, Key=f'previews/{video_id}')
+            except ClientError:
+                pass
+            if isinstance(e, ClientError):
+                raise UploadVideoException(data={"reason": 'Failed to upload files to s3'})
+            raise
+        return duration
+
+    async def _upload_part(self,
+                           semaphore: asyncio.Semaphore,
+                           key: str,
+                           upload_id: str,
+                           part_number: int,
+                           chunk: bytes,
+                           uploaded_parts: List[dict]):
+        try:
+            response = await self.s3.upload_part(Bucket=BUCKET_NAME, Key=key, UploadId=upload_id,
+                                                 PartNumber=part_number, Body=chunk)
+            uploaded_parts.append({'PartNumber': part_number, 'ETag': response['ETag']})
+        finally:
+            semaphore.release()
 
     async def get_video_link(self,
                              video: Video,
@@ -120,111 +325,217 @@ class VideoManager:
         current_user_permissions = self.get_permissions(current_user, video.owner)
         if video.permission not in current_user_permissions:
             raise AccessDenied
-        link = await self.s3.generate_presigned_url('get_object',
-                                                    Params={'Bucket': BUCKET_NAME,
-                                                            'Key': f'videos/{str(video.id)}'})
-        return link
+        if video.processing_status == ProcessingStatus.ready:
+            return self.hls_playlists.get_master_url(video.id, PRESIGNED_URL_EXPIRES)
+        return await self.url_signer.sign(self.s3, f'videos/{str(video.id)}')
+
+    async def get_hls_playlist(self,
+                               id: UUID,
+                               playlist: str,
+                               expires: int,
+                               token: str
+                               ) -> str:
+        if not self.hls_playlists.verify(id, playlist, expires, token):
+            raise AccessDenied
+        key = self.hls_playlists.get_key(id, playlist)
+        content = self.hls_playlists.get_cached(key)
+        if content is None:
+            try:
+                stored = await self.s3.get_object(Bucket=BUCKET_NAME, Key=key)
+            except ClientError:
+                raise NonExistentVideo
+            content = (await stored['Body'].read()).decode('utf-8')
+            self.hls_playlists.cache(key, content)
+
+        if playlist == 'master.m3u8':
+            return self.hls_playlists.sign_master(content, id, expires)
+        prefix = key.rsplit('/', 1)[0]
+        lines = []
+        for line in content.splitlines():
+            if line and not line.startswith('#'):
+                line = await self.url_signer.sign(self.s3, f'{prefix}/{line}')
+            lines.append(line)
+        return '\n'.join(lines) + '\n'
 
     async def get_preview_link(self,
                                video: Video,
-                               current_user: UserRead
+                               current_user: UserRead,
+                               size: Optional[int] = None,
+                               format: str = 'webp'
                                ) -> str:
         current_user_permissions = self.get_permissions(current_user, video.owner)
         if video.permission not in current_user_permissions:
             raise AccessDenied
-        link = await self.s3.generate_presigned_url('get_object',
-                                                    Params={'Bucket': BUCKET_NAME,
-                                                            'Key': f'previews/{str(video.id)}'})
-        return link
+        return await self.url_signer.sign(self.s3, self._get_preview_key(video, size, format))
+
+    async def get_preview_links(self,
+                                ids: List[UUID],
+                                current_user: User,
+                                size: Optional[int] = None,
+                                format: str = 'webp'
+                                ) -> List[VideoLink]:
+        current_user_permissions = self.get_permissions(current_user)
+        videos = await self.video_db.get_permitted_videos(ids, current_user_permissions, current_user)
+        videos = {video.id: video for video in videos}
+        return [VideoLink(id=id, link=await self.url_signer.sign(self.s3,
+                                                                 self._get_preview_key(videos[id], size, format)))
+                for id in ids if id in videos]
+
+    async def get_sprite_sheets(self,
+                                video: Video,
+                                current_user: UserRead
+                                ) -> Optional[SpriteSheets]:
+        current_user_permissions = self.get_permissions(current_user, video.owner)
+        if video.permission not in current_user_permissions:
+            raise AccessDenied
+        if not video.has_thumbnails:
+            return None
+        stored = await self.s3.get_object(Bucket=BUCKET_NAME, Key=self.thumbnails.get_sprite_metadata_key(video.id))
+        metadata = json.loads(await stored['Body'].read())
+        metadata['sheets'] = [await self.url_signer.sign(self.s3, self.thumbnails.get_sprite_key(video.id, name))
+                              for name in metadata['sheets']]
+        return SpriteSheets(**metadata)
+
+    def _get_preview_key(self, video: Video, size: Optional[int], format: str) -> str:
+        """The thumbnail fitting the size, the original preview if no size is asked or it is not resized yet."""
+        if size is None or not video.has_thumbnails:
+            return f'previews/{str(video.id)}'
+        return self.thumbnails.get_key(video.id, self.thumbnails.get_width(size), format)
 
     async def get_latest_videos(self,
                                 current_user: User,
                                 limit: int,
                                 pagination: int,
+                                cursor: Optional[str] = None,
                                 ) -> List[VideoView]:
         current_user_permissions = self.get_permissions(current_user)
-        latest_videos = await self.video_db.get_latest_videos(current_user_permissions, current_user)
-        paginated_result = self._paginate(limit, pagination, latest_videos)
-        return [await self.convert_video_to_video_view(video, current_user) for video in paginated_result]
+        latest_videos = await self.video_db.get_latest_videos(current_user_permissions, current_user,
+                                                              limit, limit * pagination, cursor)
+        return await self.convert_videos_to_video_views(latest_videos, current_user)
 
     async def get_liked_by_users(self,
                                  current_user: User,
                                  limit: int,
-                                 pagination: int
+                                 pagination: int,
+                                 cursor: Optional[str] = None,
                                  ):
         current_user_permissions = self.get_permissions(current_user)
-        liked_by_users_videos = await self.video_db.get_liked_by_users(current_user_permissions, current_user)
-        paginated_result = self._paginate(limit, pagination, liked_by_users_videos)
-        return [await self.convert_video_to_video_view(video, current_user) for video in paginated_result]
+        liked_by_users_videos = await self.video_db.get_liked_by_users(current_user_permissions, current_user,
+                                                                       limit, limit * pagination, cursor)
+        return await self.convert_videos_to_video_views(liked_by_users_videos, current_user)
 
     async def get_popular_videos(self,
                                  current_user: User,
                                  limit: int,
                                  pagination: int,
+                                 cursor: Optional[str] = None,
                                  ) -> List[VideoView]:
         current_user_permissions = self.get_permissions(current_user)
-        popular_videos = await self.video_db.get_popular_videos(current_user_permissions, current_user)
-        paginated_result = self._paginate(limit, pagination, popular_videos)
-        return [await self.convert_video_to_video_view(video, current_user) for video in paginated_result]
+        if await self.ranking.exists(self.ranking.key):
+            popular_videos = await self._get_popular_ranked_videos(self.ranking.key, current_user_permissions,
+                                                                   current_user, limit, limit * pagination, cursor)
+        else:
+            popular_videos = await self.video_db.get_popular_videos(current_user_permissions, current_user,
+                                                                    limit, limit * pagination, cursor)
+        return await self.convert_videos_to_video_views(popular_videos, current_user)
 
     async def get_liked_videos(self,
                                current_user: User,
                                limit: int,
                                pagination: int,
+                               cursor: Optional[str] = None,
                                ) -> List[VideoView]:
-        liked_videos = await self.video_db.get_liked_videos(current_user)
-        paginated_result = self._paginate(limit, pagination, liked_videos)
-        return [await self.convert_video_to_video_view(video, current_user) for video in paginated_result]
+        liked_videos = await self.video_db.get_liked_videos(current_user, limit, limit * pagination, cursor)
+        return await self.convert_videos_to_video_views(liked_videos, current_user)
 
     async def get_subscribed_videos(self,
                                     current_user: User,
                                     limit: int,
                                     pagination: int,
+                                    cursor: Optional[str] = None,
                                     ) -> List[VideoView]:
         current_user_permissions = self.get_permissions(current_user)
-        subscribed_videos = await self.video_db.get_subscribed_videos(current_user_permissions, current_user)
-        paginated_result = self._paginate(limit, pagination, subscribed_videos)
-        return [await self.convert_video_to_video_view(video, current_user) for video in paginated_result]
+        feed_key = self.subscription_feed.get_key(current_user.id)
+        if not await self.subscription_feed.exists(feed_key):
+            await self.subscription_feed.fill(current_user.id, await self.video_db.get_subscribed_videos(
+                current_user_permissions, current_user, SUBSCRIPTION_FEED_SIZE))
+
+        offset = limit * pagination
+        if cursor is None:
+            start, count = 0, offset + limit
+        else:
+            uploaded_at, video_id = decode_cursor(cursor, datetime.fromisoformat, uuid.UUID)
+            start = await self.subscription_feed.get_position_after(
+                feed_key, self.subscription_feed.get_score(uploaded_at), video_id)
+            offset, count = 0, limit
+        if start + count > SUBSCRIPTION_FEED_SIZE:
+            # the inbox only keeps the latest videos
+            subscribed_videos = await self.video_db.get_subscribed_videos(current_user_permissions, current_user,
+                                                                          limit, offset, cursor)
+            return await self.convert_videos_to_video_views(subscribed_videos, current_user)
+
+        subscribed_videos = await self._get_ranked_videos(self.subscription_feed, feed_key,
+                                                          current_user_permissions, current_user, count, start)
+        pull_owners = await self.subscription_feed.get_pull_owners()
+        if pull_owners:
+            subscribed_videos += await self.video_db.get_subscribed_videos(current_user_permissions, current_user,
+                                                                           count, 0, cursor, owners=pull_owners)
+        subscribed_videos = {video.id: video for video in subscribed_videos}.values()
+        subscribed_videos = sorted(subscribed_videos, key=lambda video: (video.uploaded_at, video.id), reverse=True)
+        subscribed_videos = subscribed_videos[offset:offset + limit]
+        for video in subscribed_videos:
+            video.cursor = encode_cursor(video.uploaded_at, video.id)
+        return await self.convert_videos_to_video_views(subscribed_videos, current_user)
 
     async def get_viewed_videos(self, current_user: User,
                                 limit: int,
                                 pagination: int,
+                                cursor: Optional[str] = None,
                                 ) -> List[VideoView]:
-        viewed_videos = await self.video_db.get_viewed_videos(current_user)
-        paginated_result = self._paginate(limit, pagination, viewed_videos)
-        return [await self.convert_video_to_video_view(video, current_user) for video in paginated_result]
+        viewed_videos = await self.video_db.get_viewed_videos(current_user, limit, limit * pagination, cursor)
+        return await self.convert_videos_to_video_views(viewed_videos, current_user)
 
     async def get_user_videos(self, current_user: User,
                               requested_user: User,
                               limit: int,
                               pagination: int,
+                              cursor: Optional[str] = None,
                               ) -> List[VideoView]:
         current_user_permissions = self.get_permissions(current_user)
-        user_videos = await self.video_db.get_user_videos(requested_user, current_user_permissions, current_user)
-        paginated_result = self._paginate(limit, pagination, user_videos)
-        return [await self.convert_video_to_video_view(video, current_user) for video in paginated_result]
+        user_videos = await self.video_db.get_user_videos(requested_user, current_user_permissions, current_user,
+                                                          limit, limit * pagination, cursor)
+        return await self.convert_videos_to_video_views(user_videos, current_user)
 
     async def get_latest_user_videos(self, current_user: User,
                                      requested_user: User,
                                      limit: int,
                                      pagination: int,
+                                     cursor: Optional[str] = None,
                                      ) -> List[VideoView]:
         current_user_permissions = self.get_permissions(current_user)
         latest_user_videos = await self.video_db.get_latest_user_videos(requested_user, current_user_permissions,
-                                                                        current_user)
-        paginated_result = self._paginate(limit, pagination, latest_user_videos)
-        return [await self.convert_video_to_video_view(video, current_user) for video in paginated_result]
+                                                                        current_user, limit, limit * pagination,
+                                                                        cursor)
+        return await self.convert_videos_to_video_views(latest_user_videos, current_user)
 
     async def get_popular_user_videos(self, current_user: User,
                                       requested_user: User,
                                       limit: int,
                                       pagination: int,
+                                      cursor: Optional[str] = None,
                                       ) -> List[VideoView]:
         current_user_permissions = self.get_permissions(current_user)
-        popular_user_videos = await self.video_db.get_popular_user_videos(requested_user, current_user_permissions,
-                                                                          current_user)
-        paginated_result = self._paginate(limit, pagination, popular_user_videos)
-        return [await self.convert_video_to_video_view(video, current_user) for video in paginated_result]
+        ranking_key = self.ranking.get_user_key(requested_user.id)
+        if await self.ranking.exists(ranking_key):
+            popular_user_videos = await self._get_popular_ranked_videos(ranking_key, current_user_permissions,
+                                                                        current_user, limit, limit * pagination,
+                                                                        cursor)
+        else:
+            popular_user_videos = await self.video_db.get_popular_user_videos(requested_user,
+                                                                              current_user_permissions,
+                                                                              current_user, limit,
+                                                                              limit * pagination, cursor)
+        return await self.convert_videos_to_video_views(popular_user_videos, current_user)
 
     async def count_video_likes(self,
                                 id: UUID
@@ -232,14 +543,14 @@ class VideoManager:
         video = await self.video_db.get(id)
         if video is None:
             raise NonExistentVideo
-        return len(video.liked_users)
+        return await self.like_manager.count_video_likes(video)
 
     async def delete(self,
                      user: User,
                      id: UUID):
         video = await self.video_db.get(id)
         self.check_access(video, user)
-        await self._delete(video)
+        await self._delete([video.id])
 
     async def admin_delete(self,
                            user: User,
@@ -249,7 +560,15 @@ class VideoManager:
             self.check_access(video, user)
         except AccessDenied:
             pass
-        await self._delete(video)
+        await self._delete([video.id])
+
+    async def admin_delete_many(self,
+                                ids: List[UUID]):
+        await self._delete(ids)
+
+    async def delete_user_videos(self,
+                                 owner_id: UUID):
+        await self._schedule_deletion(await self.video_db.soft_delete_user_videos(owner_id))
 
     async def check_existing(self,
                              video_id
@@ -280,58 +599,51 @@ class VideoManager:
         if video.owner != current_user.id:
             raise AccessDenied
 
-    async def _delete(self, video: Video):
-        try:
-            await self.s3.delete_object(Bucket=BUCKET_NAME, Key=f'videos/{str(video.id)}')
-        except ClientError:
-            raise DeleteVideoException
-        try:
-            await self.s3.head_object(Bucket=BUCKET_NAME, Key=f'videos/{str(video.id)}')
-        except ClientError:
-            pass
-        else:
-            raise DeleteVideoException
-        try:
-            await self.s3.delete_object(Bucket=BUCKET_NAME, Key=f'previews/{str(video.id)}')
-        except ClientError:
-            raise DeleteVideoException
-        try:
-            await self.s3.head_object(Bucket=BUCKET_NAME, Key=f'previews/{str(video.id)}')
-        except ClientError:
-            pass
-        else:
-            raise DeleteVideoException
-
-        await self.video_db.remove(video)
-
-    def _paginate(self,
-                  limit,
-                  pagination,
-                  result) -> List[Any]:
-        return result[limit * pagination: limit * (pagination + 1)]
-
-    def _validate(self,
-                  video: VideoUpload,
-                  video_media_info,
-                  preview_media_info):
-        if len(video.title) > self.max_title_len:
-            raise UploadVideoException(
-                data={"reason": f'Title must contain no more than {self.max_title_len} characters'})
-        elif len(video.description) > self.max_description_len:
-            raise UploadVideoException(
-                data={"reason": f'Description must contain no more than {self.max_description_len} characters'})
-        elif video.permission not in Permission.__members__:
-            raise NonExistentPermission
-        elif not video_media_info.video_tracks:
-            raise UploadVideoException(data={"reason": 'Uploaded file is not a video or this format is not supported'})
-        elif not preview_media_info.image_tracks:
-            raise UploadVideoException(data={"reason": 'Uploaded file is not a image or this format is not supported'})
-        elif video_media_info.general_tracks[0].file_size / (1024 * 1024) > self.max_video_size:
-            raise UploadVideoException(
-                data={"reason": f'Exceeded the maximum video size. Max.size = {self.max_video_size}mb'})
-        elif preview_media_info.general_tracks[0].file_size / (1024 * 1024) > self.max_preview_size:
-            raise UploadVideoException(
-                data={"reason": f'Exceeded the maximum preview size. Max.size = {self.max_preview_size}mb'})
-        elif video_media_info.general_tracks[0].duration < self.min_video_duration:
-            raise UploadVideoException(
-                data={"reason": f'Invalid video duration. The minimum duration is {self.min_video_duration} seconds'})
+    async def _delete(self, video_ids: List[UUID]):
+        await self._schedule_deletion(await self.video_db.soft_delete(video_ids))
+
+    async def _schedule_deletion(self, deleted: List[Tuple[UUID, UUID]]):
+        """The soft deleted videos are hidden right away, their files and rows are removed in the background."""
+        if deleted:
+            await self.ranking.remove(deleted)
+            start_deletion([video_id for video_id, _ in deleted])
+
+    async def _get_popular_ranked_videos(self,
+                                         ranking_key: str,
+                                         user_permissions: List[Permission],
+                                         current_user: User,
+                                         limit: int,
+                                         offset: int,
+                                         cursor: Optional[str] = None,
+                                         ) -> List[Video]:
+        if cursor is None:
+            # the offset counts the videos the user may see, not the positions in the ranking
+            videos = await self._get_ranked_videos(self.ranking, ranking_key, user_permissions, current_user,
+                                                   offset + limit, 0)
+            return videos[offset:]
+        start = await self.ranking.get_position_after(ranking_key, *decode_cursor(cursor, float, uuid.UUID))
+        return await self._get_ranked_videos(self.ranking, ranking_key, user_permissions, current_user, limit, start)
+
+    async def _get_ranked_videos(self,
+                                 ranking: RedisRanking,
+                                 ranking_key: str,
+                                 user_permissions: List[Permission],
+                                 current_user: User,
+                                 limit: int,
+                                 start: int,
+                                 ) -> List[Video]:
+        videos = []
+        while len(videos) < limit:
+            ranked = await ranking.get_range(ranking_key, start, limit)
+            if not ranked:
+                break
+            start += len(ranked)
+            permitted_videos = await self.video_db.get_permitted_videos([video_id for video_id, _ in ranked],
+                                                                        user_permissions, current_user)
+            permitted_videos = {video.id: video for video in permitted_videos}
+            for video_id, score in ranked:
+                if video_id in permitted_videos and len(videos) < limit:
+                    video = permitted_videos[video_id]
+                    video.cursor = encode_cursor(score, video_id)
+                    videos.append(video)
+        return videos
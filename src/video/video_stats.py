@@ -0,0 +1,14 @@
+from fastapi import Depends
+
+from src.config import VIDEO_STATS_BUFFERED, VIDEO_STATS_VIEWERS_TTL
+from src.database import get_async_db_session
+from src.redis_main import connection
+from src.video.models import VideoStats
+from src.video.video_stats_buffer import VideoStatsBuffer
+from src.video.video_stats_database_adapter import VideoStatsDatabaseAdapter
+
+video_stats_buffer = VideoStatsBuffer(connection, VIDEO_STATS_VIEWERS_TTL) if VIDEO_STATS_BUFFERED else None
+
+
+async def get_video_stats_db(db_session=Depends(get_async_db_session)):
+    yield VideoStatsDatabaseAdapter(db_session, VideoStats, video_stats_buffer)
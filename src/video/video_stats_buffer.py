@@ -0,0 +1,78 @@
+import uuid
+from typing import Dict, List, Optional
+
+from aioredis import Redis
+
+
+class VideoStatsBuffer:
+    """
+    Write-behind buffer for the video counters.
+
+    Increments are accumulated in redis and periodically flushed to the video_stats table,
+    reads add the pending deltas to the flushed values. The unique viewers estimate of a video only lives
+    in redis, it expires viewers_ttl seconds after the last view and is removed with the video.
+    """
+    dirty_key = 'videoStats:dirty'
+
+    def __init__(self, redis: Redis, viewers_ttl: int):
+        self.redis = redis
+        self.viewers_ttl = viewers_ttl
+
+    async def increment(self,
+                        video_id: uuid.UUID,
+                        deltas: Dict[str, int],
+                        viewer: Optional[str] = None):
+        pipeline = self.redis.pipeline(transaction=False)
+        for counter, delta in deltas.items():
+            pipeline.hincrby(self._counters_key(video_id), counter, delta)
+        if viewer:
+            pipeline.pfadd(self._viewers_key(video_id), viewer)
+            pipeline.expire(self._viewers_key(video_id), self.viewers_ttl)
+        pipeline.sadd(self.dirty_key, str(video_id))
+        await pipeline.execute()
+
+    async def get_pending(self, video_ids: List[uuid.UUID]) -> Dict[uuid.UUID, Dict[str, int]]:
+        pipeline = self.redis.pipeline(transaction=False)
+        for video_id in video_ids:
+            pipeline.hgetall(self._counters_key(video_id))
+            pipeline.pfcount(self._viewers_key(video_id))
+        results = await pipeline.execute()
+        pending = {}
+        for video_id, counters, viewers in zip(video_ids, results[::2], results[1::2]):
+            pending[video_id] = self._decode_counters(counters) | {'unique_viewers': viewers}
+        return pending
+
+    async def pop_pending(self, batch_size: int) -> Dict[uuid.UUID, Dict[str, int]]:
+        popped = await self.redis.spop(self.dirty_key, batch_size)
+        video_ids = [uuid.UUID(video_id.decode('utf-8')) for video_id in popped]
+        if not video_ids:
+            return {}
+        pipeline = self.redis.pipeline(transaction=True)
+        for video_id in video_ids:
+            pipeline.hgetall(self._counters_key(video_id))
+            pipeline.delete(self._counters_key(video_id))
+        results = await pipeline.execute()
+        return {video_id: self._decode_counters(counters) for video_id, counters in zip(video_ids, results[::2])}
+
+    async def restore(self, pending: Dict[uuid.UUID, Dict[str, int]]):
+        for video_id, deltas in pending.items():
+            await self.increment(video_id, deltas)
+
+    async def remove(self, video_ids: List[uuid.UUID]):
+        """Drop everything kept for the removed videos, their deltas are not flushed anymore."""
+        if not video_ids:
+            return
+        pipeline = self.redis.pipeline(transaction=False)
+        pipeline.delete(*[key for video_id in video_ids
+                          for key in (self._counters_key(video_id), self._viewers_key(video_id))])
+        pipeline.srem(self.dirty_key, *[str(video_id) for video_id in video_ids])
+        await pipeline.execute()
+
+    def _decode_counters(self, counters: Dict[bytes, bytes]) -> Dict[str, int]:
+        return {counter.decode('utf-8'): int(delta) for counter, delta in counters.items()}
+
+    def _counters_key(self, video_id: uuid.UUID) -> str:
+        return f'videoStats:{video_id}:counters'
+
+    def _viewers_key(self, video_id: uuid.UUID) -> str:
+        return f'videoStats:{video_id}:viewers'
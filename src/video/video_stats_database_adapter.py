@@ -0,0 +1,124 @@
+import uuid
+from datetime import datetime
+from typing import Type, List, Optional, Dict, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.functions import count
+
+from src.comment.models import Comment
+from src.like.models import Like
+from src.video.models import Video, VideoStats
+from src.video.shemas import VideoStatsRead
+from src.video.video_stats_buffer import VideoStatsBuffer
+from src.view.models import View
+
+
+class VideoStatsDatabaseAdapter:
+    counters = ('likes', 'dislikes', 'views', 'comments')
+
+    def __init__(
+            self,
+            session: AsyncSession,
+            video_stats_table: Type[VideoStats],
+            buffer: Optional[VideoStatsBuffer] = None,
+    ):
+        self.session = session
+        self.video_stats_table = video_stats_table
+        self.buffer = buffer
+        self._buffered: List[Tuple[uuid.UUID, Dict[str, int], Optional[str]]] = []
+
+    async def get(self, video_ids: List[uuid.UUID]) -> List[VideoStatsRead]:
+        statement = select(self.video_stats_table).where(self.video_stats_table.video_id.in_(video_ids))
+        results = await self.session.execute(statement)
+        videos_stats = {stats.video_id: VideoStatsRead.from_orm(stats) for stats in results.scalars().all()}
+        if self.buffer:
+            for video_id, pending in (await self.buffer.get_pending(video_ids)).items():
+                stats = videos_stats.setdefault(video_id, VideoStatsRead(video_id=video_id))
+                for counter, delta in pending.items():
+                    setattr(stats, counter, (getattr(stats, counter) or 0) + delta)
+        return list(videos_stats.values())
+
+    async def increment(self,
+                        video_id: uuid.UUID,
+                        likes: int = 0,
+                        dislikes: int = 0,
+                        views: int = 0,
+                        comments: int = 0,
+                        viewer: Optional[str] = None):
+        """
+        Shift the counters of the video without committing,
+        so the change is saved in the same transaction as the write it reflects.
+
+        With the redis buffer enabled the deltas are accumulated in redis instead, once commit has saved
+        the write, and reach the table with the next flush; the viewer is counted into the unique viewers estimate.
+        """
+        deltas = {'likes': likes, 'dislikes': dislikes, 'views': views, 'comments': comments}
+        deltas = {counter: delta for counter, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        if self.buffer:
+            self._buffered.append((video_id, deltas, viewer))
+        else:
+            await self._upsert({video_id: deltas})
+
+    async def commit(self):
+        """Commit the session, then hand the increments it saved to the redis buffer, a rollback drops them."""
+        buffered, self._buffered = self._buffered, []
+        await self.session.commit()
+        for video_id, deltas, viewer in buffered:
+            await self.buffer.increment(video_id, deltas, viewer)
+
+    async def apply(self, pending: Dict[uuid.UUID, Dict[str, int]]) -> None:
+        """Add deltas flushed from the redis buffer to the counters, skipping videos removed meanwhile."""
+        existing = await self.session.scalars(select(Video.id).where(Video.id.in_(list(pending))))
+        pending = {video_id: pending[video_id] for video_id in existing.all()}
+        if pending:
+            await self._upsert(pending)
+        await self.session.commit()
+
+    async def _upsert(self, deltas: Dict[uuid.UUID, Dict[str, int]]):
+        values = [{'video_id': video_id} | {counter: video_deltas.get(counter, 0) for counter in self.counters}
+                  for video_id, video_deltas in deltas.items()]
+        statement = insert(self.video_stats_table).values(values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[self.video_stats_table.video_id],
+            set_={counter: getattr(self.video_stats_table, counter) + getattr(statement.excluded, counter)
+                  for counter in self.counters} | {'updated_at': datetime.utcnow()})
+        await self.session.execute(statement)
+
+    async def get_updated_since(self,
+                                since: Optional[datetime],
+                                after_id: Optional[uuid.UUID],
+                                limit: int):
+        """Page through the counters changed since the given time together with the data of their videos."""
+        statement = select(Video.id, Video.owner, Video.uploaded_at,
+                           self.video_stats_table.views, self.video_stats_table.likes).join(
+            self.video_stats_table, self.video_stats_table.video_id == Video.id).where(Video.deleted_at == None)
+        if since is not None:
+            statement = statement.where(self.video_stats_table.updated_at > since)
+        if after_id is not None:
+            statement = statement.where(Video.id > after_id)
+        results = await self.session.execute(statement.order_by(Video.id).limit(limit))
+        return results.all()
+
+    async def reconcile(self) -> None:
+        """Rebuild the counters of every video from the like, view and comment tables."""
+        likes = select(count()).select_from(Like).where(Like.video_id == Video.id, Like.status)
+        dislikes = select(count()).select_from(Like).where(Like.video_id == Video.id, Like.status == False)
+        views = select(count()).select_from(View).where(View.video_id == Video.id, View.viewing_time != None)
+        comments = select(count()).select_from(Comment).where(Comment.video_id == Video.id)
+        source = select(Video.id,
+                        likes.scalar_subquery(),
+                        dislikes.scalar_subquery(),
+                        views.scalar_subquery(),
+                        comments.scalar_subquery())
+
+        statement = insert(self.video_stats_table).from_select(['video_id', *self.counters], source)
+        statement = statement.on_conflict_do_update(
+            index_elements=[self.video_stats_table.video_id],
+            set_={counter: getattr(statement.excluded, counter) for counter in self.counters}
+                 | {'updated_at': datetime.utcnow()})
+        await self.session.execute(statement)
+        await self.session.commit()
@@ -0,0 +1,63 @@
+from typing import Optional
+
+from src.video.exceptions import UploadVideoException, NonExistentPermission
+from src.video.models import Permission
+from src.video.shemas import BaseVideo
+
+
+class VideoValidator:
+    max_video_size = 100
+    max_preview_size = 10
+    max_title_len = 100
+    max_description_len = 5000
+    min_video_duration = 15
+    validation_head_size = 2 * 1024 * 1024
+
+    def validate_fields(self,
+                        video: BaseVideo):
+        if len(video.title) > self.max_title_len:
+            raise UploadVideoException(
+                data={"reason": f'Title must contain no more than {self.max_title_len} characters'})
+        elif len(video.description) > self.max_description_len:
+            raise UploadVideoException(
+                data={"reason": f'Description must contain no more than {self.max_description_len} characters'})
+        elif video.permission not in Permission.__members__:
+            raise NonExistentPermission
+
+    def validate_preview(self,
+                         preview_media_info,
+                         file_size: Optional[int] = None):
+        if not preview_media_info.image_tracks:
+            raise UploadVideoException(data={"reason": 'Uploaded file is not a image or this format is not supported'})
+        if file_size is None:
+            file_size = preview_media_info.general_tracks[0].file_size
+        if file_size / (1024 * 1024) > self.max_preview_size:
+            raise UploadVideoException(
+                data={"reason": f'Exceeded the maximum preview size. Max.size = {self.max_preview_size}mb'})
+
+    def validate_video(self,
+                       video_media_info,
+                       file_size: int,
+                       duration: Optional[int] = None):
+        if not video_media_info.video_tracks:
+            raise UploadVideoException(data={"reason": 'Uploaded file is not a video or this format is not supported'})
+        self.validate_video_size(file_size)
+        if duration is not None and duration < self.min_video_duration:
+            raise UploadVideoException(
+                data={"reason": f'Invalid video duration. The minimum duration is {self.min_video_duration} seconds'})
+
+    def is_conclusive(self,
+                      video_media_info) -> bool:
+        """
+        Whether the parsed head of a video has all validate_video checks.
+
+        A file with its index at the end, like an mp4 with the moov atom last, has neither tracks nor a duration
+        in its head, only the whole file tells whether it is a video.
+        """
+        return bool(video_media_info.video_tracks) and video_media_info.general_tracks[0].duration is not None
+
+    def validate_video_size(self,
+                            file_size: int):
+        if file_size / (1024 * 1024) > self.max_video_size:
+            raise UploadVideoException(
+                data={"reason": f'Exceeded the maximum video size. Max.size = {self.max_video_size}mb'})
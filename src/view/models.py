@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from uuid import UUID as pyUUID
-from sqlalchemy import Boolean, ForeignKey, TIMESTAMP, String, UUID
+from sqlalchemy import Boolean, ForeignKey, TIMESTAMP, String, UUID, Index, text
 from sqlalchemy.dialects.postgresql import INTERVAL
 from sqlalchemy.orm import mapped_column, Mapped, relationship, backref
 
@@ -10,6 +10,11 @@ from src.database import Base
 
 class View(Base):
     __tablename__ = "view"
+    __table_args__ = (
+        Index('ix_view_video_id_viewed', 'video_id', postgresql_where=text('viewing_time IS NOT NULL')),
+        Index('ix_view_owner_id_video_id_viewed_at', 'owner_id', 'video_id', 'viewed_at'),
+        Index('ix_view_fingerprint_video_id_viewed_at', 'fingerprint', 'video_id', 'viewed_at'),
+    )
     id: Mapped[pyUUID] = mapped_column(UUID, primary_key=True, default=uuid.uuid4)
     fingerprint: Mapped[str] = mapped_column(String, nullable=True)
     owner_id: Mapped[pyUUID] = mapped_column(UUID, ForeignKey("user.id"), nullable=True)
@@ -1,13 +1,15 @@
 from fastapi import Depends
 from src.database import get_async_db_session
+from src.video.video_stats import get_video_stats_db
 from src.view.models import View, UserView
 from src.view.user_view_database_adapter import UserViewDatabaseAdapter
 from src.view.view_database_adapter import ViewDatabaseAdapter
 from src.view.view_manager import ViewManager
 
 
-async def get_view_db(db_session=Depends(get_async_db_session)):
-    yield ViewDatabaseAdapter(db_session, View)
+async def get_view_db(db_session=Depends(get_async_db_session),
+                      video_stats_db=Depends(get_video_stats_db)):
+    yield ViewDatabaseAdapter(db_session, View, video_stats_db)
 
 
 async def get_user_view_db(db_session=Depends(get_async_db_session)):
@@ -1,12 +1,14 @@
 import uuid
 from datetime import timedelta, datetime
-from typing import Type, Dict, Any, Optional
+from typing import Type, Dict, Any, Optional, List
 
 from sqlalchemy import select, Select, delete, Delete
+from sqlalchemy.sql.functions import count
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.user.models import User
 from src.video.models import Video
+from src.video.video_stats_database_adapter import VideoStatsDatabaseAdapter
 from src.view.models import View, UserView
 from src.view.shemas import ViewRead
 
@@ -16,9 +18,11 @@ class ViewDatabaseAdapter:
             self,
             session: AsyncSession,
             view_table: Type[View],
+            video_stats_db: VideoStatsDatabaseAdapter,
     ):
         self.session = session
         self.view_table = view_table
+        self.video_stats_db = video_stats_db
 
     async def create(self, create_dict: Dict[str, Any], user_id: Optional[uuid.UUID]):
         view = self.view_table(**create_dict)
@@ -27,7 +31,10 @@ class ViewDatabaseAdapter:
         if view.viewing_time is not None and view.viewing_time < timedelta(seconds=15):
             view.viewing_time = None
         self.session.add(view)
-        await self.session.commit()
+        if view.viewing_time is not None:
+            viewer = view.owner_id or view.fingerprint
+            await self.video_stats_db.increment(view.video_id, views=1, viewer=str(viewer) if viewer else None)
+        await self.video_stats_db.commit()
         return view
 
     async def get_video_views(self, video: Video):
@@ -35,6 +42,16 @@ class ViewDatabaseAdapter:
             self.view_table.video_id == video.id, self.view_table.viewing_time != None)
         return await self._get_views(statement)
 
+    async def count_video_views(self, video_id: uuid.UUID) -> int:
+        statement = select(count()).select_from(self.view_table).where(
+            self.view_table.video_id == video_id, self.view_table.viewing_time != None)
+        return await self.session.scalar(statement)
+
+    async def get_user_views(self, user_id: uuid.UUID, video_ids: List[uuid.UUID]):
+        statement = select(self.view_table).join(UserView, UserView.view_id == self.view_table.id).where(
+            UserView.owner_id == user_id, UserView.video_id.in_(video_ids))
+        return await self._get_views(statement)
+
     async def _get_views(self, statement: Select):
         results = await self.session.execute(statement)
         return results.scalars().all()
@@ -1,14 +1,17 @@
 import time
 import uuid
 from datetime import timedelta, datetime
+from typing import List, Dict
 
 from fingerprint_pro_server_api_sdk import Response
 from fingerprint_pro_server_api_sdk.rest import ApiException
 
+from src.offload import offloader
 from src.user.models import User
 from src.video.models import Video
 from src.view.exceptions import ViewRecordException, LimitViewException, InvalidView, NonExistentView
 from src.view.fingerprint import fingerprint_instance
+from src.view.models import View
 from src.view.shemas import BaseView, ViewRead
 from src.view.user_view_database_adapter import UserViewDatabaseAdapter
 from src.view.view_database_adapter import ViewDatabaseAdapter
@@ -28,7 +31,7 @@ class ViewManager:
                           view: BaseView,
                           video: Video) -> None:
         self._validate(view, video)
-        if view.fingerprint and not self._validate_fingerprint(view.fingerprint):
+        if view.fingerprint and not await self._validate_fingerprint(view.fingerprint):
             raise ViewRecordException
         if await self.count_viewer_video_views(user, view) >= self.max_views_per_day:
             view.viewing_time = None
@@ -57,14 +60,18 @@ class ViewManager:
     async def get_video_views(self, video: Video):
         return await self.view_db.get_video_views(video)
 
-    async def count_video_views(self, video: Video):
-        return len(await self.get_video_views(video))
+    async def count_video_views(self, video: Video) -> int:
+        return await self.view_db.count_video_views(video.id)
 
     async def get_user_view(self, user: User, video: Video, ):
         user_view = await self.user_view_db.get(video.id, user.id)
         view = await self.view_db.get(user_view) if user_view else user_view
         return view
 
+    async def get_user_views(self, user: User, videos: List[Video]) -> Dict[uuid.UUID, View]:
+        views = await self.view_db.get_user_views(user.id, [video.id for video in videos])
+        return {view.video_id: view for view in views}
+
     async def count_viewer_video_views(self, user: User, view: BaseView):
         if user.id:
             return len(await self.view_db.get_user_video_views(user, view.video_id))
@@ -86,9 +93,9 @@ class ViewManager:
             view.viewing_time = video.duration
             # raise InvalidView(data={'reason': 'Viewed time cannot be more than the duration of the video'})
 
-    def _validate_fingerprint(self, fingerprint: str):
+    async def _validate_fingerprint(self, fingerprint: str):
         try:
-            visitor_visits: Response = fingerprint_instance.get_visits(fingerprint)
+            visitor_visits: Response = await offloader.run('fingerprint', fingerprint_instance.get_visits, fingerprint)
         except ApiException:
             raise ViewRecordException
         if not visitor_visits.visits:
@@ -0,0 +1,66 @@
+import httpx
+import pytest
+
+import src.batch
+from src.database import get_async_db_session
+from src.main import app
+from src.request_cache import RequestCache, identity_cache
+from src.video.models import Video, Permission, ProcessingStatus
+from src.video.video_database_adapter import VideoDatabaseAdapter
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def client(session_maker):
+    async def get_test_db_session():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_async_db_session] = get_test_db_session
+    async with httpx.AsyncClient(app=app, base_url='http://test') as client:
+        yield client
+    app.dependency_overrides.clear()
+
+
+async def call_batch(client: httpx.AsyncClient, *calls) -> list:
+    response = await client.post('/batch', json=[{'jsonrpc': '2.0', 'id': i, 'method': method, 'params': params}
+                                                 for i, (method, params) in enumerate(calls)])
+    return response.json()
+
+
+# one at a time, every call reads the video the first one cached after it was done with it
+@pytest.mark.parametrize('concurrency', [1, 4])
+@pytest.mark.parametrize('permission', [Permission.for_everyone, Permission.for_myself])
+async def test_read_only_calls_of_a_video_check_its_permission_alike(db_session, client, make_user, make_videos,
+                                                                     monkeypatch, concurrency, permission):
+    monkeypatch.setattr(src.batch, 'BATCH_CONCURRENCY', concurrency)
+    video, = await make_videos(await make_user(), 1, permission)
+    video.processing_status = ProcessingStatus.ready
+    await db_session.commit()
+    params = {'id': str(video.id)}
+
+    responses = await call_batch(client, ('video.get_video', params), ('video.get_video_link', params),
+                                 ('video.get_video', params), ('video.get_video_link', params))
+
+    if permission == Permission.for_everyone:
+        assert [response['result']['permission'] for response in responses[::2]] == ['for_everyone'] * 2
+        assert all(f'/video/hls/{video.id}/master.m3u8' in response['result'] for response in responses[1::2])
+    else:
+        assert all(response['error']['message'] == 'Access denied' for response in responses)
+
+
+async def test_calls_sharing_a_video_get_it_in_their_own_session(session_maker, make_user, make_videos,
+                                                                 make_video_manager):
+    video, = await make_videos(await make_user(), 1)
+    reset = identity_cache.set(RequestCache())
+    try:
+        async with session_maker() as first_session, session_maker() as second_session:
+            first, second = [await make_video_manager(video_db=VideoDatabaseAdapter(session, Video)).get(video.id)
+                             for session in (first_session, second_session)]
+
+            assert first is not second
+            assert first in first_session and second in second_session
+            assert (first.id, first.permission) == (second.id, second.permission) == (video.id, video.permission)
+    finally:
+        identity_cache.reset(reset)
@@ -0,0 +1,206 @@
+import logging
+import smtplib
+from email import message_from_string
+from email.message import EmailMessage
+from typing import List, Optional
+
+import pytest
+
+import src.mail.sender
+import src.mail.tasks
+from src.mail.outbox import MailOutbox
+from src.mail.sender import MailSender
+from src.mail.tasks import _deliver_mail, is_permanent
+from src.mail.transport import MailTransport, ConsoleTransport
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeTransport(MailTransport):
+    """Records the subjects it sends, failing a send with the next error of the shared list if there is one."""
+
+    def __init__(self, sent: List[str], errors: List[Optional[Exception]]):
+        self.sent = sent
+        self.errors = errors
+        self.closed = False
+
+    def send(self, message: EmailMessage):
+        error = self.errors.pop(0) if self.errors else None
+        if error is not None:
+            raise error
+        self.sent.append(message['Subject'])
+
+    def close(self):
+        self.closed = True
+
+
+def make_message(subject: str) -> EmailMessage:
+    message = EmailMessage()
+    message['Subject'] = subject
+    message['To'] = 'someone@example.com'
+    message.set_content('text')
+    return message
+
+
+@pytest.fixture
+def transports():
+    """The transports a sender creates, sharing what they send and the errors to fail with."""
+    sent, errors, created = [], [], []
+
+    def create_transport() -> FakeTransport:
+        created.append(FakeTransport(sent, errors))
+        return created[-1]
+
+    return create_transport, sent, errors, created
+
+
+@pytest.fixture
+def outbox(redis):
+    return MailOutbox(redis)
+
+
+@pytest.fixture
+def delivery(redis, monkeypatch, transports):
+    """Runs _deliver_mail on the fake redis and transports, with the celery calls recorded."""
+    create_transport, sent, errors, _ = transports
+    requeued, scheduled = [], []
+    monkeypatch.setattr(src.mail.tasks.redis, 'Redis', lambda **kwargs: redis)
+    monkeypatch.setattr(src.mail.tasks, 'mail_sender', MailSender(create_transport, 1, 0))
+    monkeypatch.setattr(src.mail.tasks, 'MAIL_BATCH_SIZE', 2)
+    monkeypatch.setattr(src.mail.tasks.requeue_mail, 'apply_async',
+                        lambda args, countdown: requeued.append((args[1], countdown)))
+    monkeypatch.setattr(src.mail.tasks.deliver_mail, 'delay', lambda: scheduled.append(True))
+    return sent, errors, requeued, scheduled
+
+
+async def test_claimed_messages_are_restored_until_acked(outbox):
+    for subject in ('first', 'second', 'third'):
+        await outbox.push(make_message(subject))
+
+    (item, _), _ = await outbox.claim(2)
+    await outbox.ack(item)
+    # the delivery died with the second message claimed
+    await outbox.restore()
+
+    assert [message_from_string(mail['message'])['Subject'] for _, mail in await outbox.claim(10)] == \
+           ['second', 'third']
+
+
+async def test_delivery_sends_in_order_and_empties_the_outbox(outbox, redis, delivery):
+    sent, _, _, scheduled = delivery
+    for subject in ('first', 'second', 'third'):
+        await outbox.push(make_message(subject))
+
+    await _deliver_mail()
+
+    assert sent == ['first', 'second', 'third']
+    assert await redis.llen(outbox.key) == await redis.llen(outbox.processing_key) == 0
+    assert scheduled == []
+
+
+async def test_delivery_resends_what_a_dead_delivery_claimed(outbox, delivery):
+    sent, _, _, _ = delivery
+    for subject in ('first', 'second'):
+        await outbox.push(make_message(subject))
+    await outbox.claim(2)
+
+    await _deliver_mail()
+
+    assert sent == ['first', 'second']
+
+
+async def test_temporary_failures_are_retried_with_a_backoff(outbox, delivery, monkeypatch):
+    sent, errors, requeued, _ = delivery
+    monkeypatch.setattr(src.mail.tasks, 'MAIL_RETRY_BACKOFF', 10)
+    await outbox.push(make_message('busy'), attempts=2)
+    await outbox.push(make_message('dropped'))
+    await outbox.push(make_message('sent'))
+    errors += [smtplib.SMTPDataError(451, b'try again later'), smtplib.SMTPServerDisconnected()]
+
+    await _deliver_mail()
+
+    assert sent == ['sent']
+    assert requeued == [(3, 40), (1, 10)]
+
+
+async def test_refused_messages_and_exhausted_retries_are_dropped(outbox, delivery, monkeypatch):
+    sent, errors, requeued, _ = delivery
+    monkeypatch.setattr(src.mail.tasks, 'MAIL_MAX_RETRIES', 1)
+    await outbox.push(make_message('refused'))
+    await outbox.push(make_message('exhausted'), attempts=1)
+    errors += [smtplib.SMTPDataError(554, b'rejected'), OSError()]
+
+    await _deliver_mail()
+
+    assert sent == requeued == []
+
+
+@pytest.mark.parametrize('error, permanent', [
+    (smtplib.SMTPDataError(451, b''), False),
+    (smtplib.SMTPDataError(554, b''), True),
+    (smtplib.SMTPSenderRefused(450, b'', 'sender@example.com'), False),
+    (smtplib.SMTPSenderRefused(550, b'', 'sender@example.com'), True),
+    (smtplib.SMTPRecipientsRefused({'a@example.com': (550, b''), 'b@example.com': (450, b'')}), False),
+    (smtplib.SMTPRecipientsRefused({'a@example.com': (550, b'')}), True),
+    (smtplib.SMTPServerDisconnected(), False),
+])
+def test_only_5xx_replies_are_permanent(error, permanent):
+    assert is_permanent(error) == permanent
+
+
+def test_transport_has_to_implement_send():
+    with pytest.raises(TypeError):
+        MailTransport()
+
+
+def test_console_transport_logs_the_message(caplog):
+    with caplog.at_level(logging.INFO, logger='src.mail.transport'):
+        ConsoleTransport().send(make_message('logged'))
+
+    assert 'Subject: logged' in caplog.text
+
+
+def test_sender_reuses_its_transport(transports):
+    create_transport, sent, _, created = transports
+    sender = MailSender(create_transport, 2, 0)
+
+    for subject in ('first', 'second', 'third'):
+        sender.send(make_message(subject))
+    sender.close()
+
+    assert sent == ['first', 'second', 'third']
+    assert len(created) == 1 and created[0].closed
+
+
+def test_sender_replaces_a_failed_transport(transports):
+    create_transport, sent, errors, created = transports
+    sender = MailSender(create_transport, 1, 0)
+    errors.append(smtplib.SMTPServerDisconnected())
+
+    with pytest.raises(smtplib.SMTPServerDisconnected):
+        sender.send(make_message('failed'))
+    sender.send(make_message('sent'))
+
+    assert sent == ['sent']
+    assert [transport.closed for transport in created] == [True, False]
+
+
+def test_sender_spaces_the_sends_by_the_rate_limit(transports, monkeypatch):
+    create_transport, sent, _, _ = transports
+    now, sleeps = [100.0], []
+
+    def sleep(seconds: float):
+        sleeps.append(round(seconds, 6))
+        now[0] += seconds
+
+    monkeypatch.setattr(src.mail.sender.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(src.mail.sender.time, 'sleep', sleep)
+    sender = MailSender(create_transport, 1, 20)
+
+    for subject in ('first', 'second', 'third', 'fourth'):
+        sender.send(make_message(subject))
+    now[0] += 1
+    sender.send(make_message('later'))
+
+    assert sleeps == [0.05, 0.05, 0.05]
+    assert len(sent) == 5
@@ -0,0 +1,27 @@
+import uuid
+
+from src.video.hls import HlsPackager, HlsPlaylists
+from src.video.thumbnails import ThumbnailGenerator
+
+video_id = uuid.uuid4()
+# the uploaded objects, no other key may start with them, s3 compatible stores like MinIO cannot keep both
+uploads = [f'videos/{video_id}', f'previews/{video_id}']
+
+
+def test_hls_keys_are_not_under_the_uploads():
+    packager, playlists = HlsPackager(), HlsPlaylists(max_size=1)
+    prefix = packager.get_prefix(video_id)
+    keys = [f'{prefix}/720p/segment_0000.ts',
+            playlists.get_key(video_id, 'master.m3u8'), playlists.get_key(video_id, '720p.m3u8')]
+
+    assert keys == [f'{prefix}/720p/segment_0000.ts', f'{prefix}/master.m3u8', f'{prefix}/720p/index.m3u8']
+    assert not any(key.startswith(upload) for key in keys for upload in uploads)
+
+
+def test_thumbnail_keys_are_not_under_the_uploads():
+    generator = ThumbnailGenerator()
+    keys = [generator.get_key(video_id, 320, 'webp'), generator.get_sprite_metadata_key(video_id),
+            generator.get_sprite_key(video_id, 'sprite_0.jpg')]
+
+    assert all(key.startswith(f'{generator.get_prefix(video_id)}/') for key in keys)
+    assert not any(key.startswith(upload) for key in keys for upload in uploads)
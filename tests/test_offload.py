@@ -0,0 +1,55 @@
+import asyncio
+import logging
+import threading
+
+import pytest
+
+from src.offload import Offloader
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def offloader():
+    offloader = Offloader(4, {'slow': 1, 'idle': 1}, metrics_interval=0.05)
+    yield offloader
+    await offloader.stop()
+    offloader.shutdown()
+
+
+async def wait_for(condition):
+    while not condition():
+        await asyncio.sleep(0.01)
+
+
+async def test_metrics_count_the_queued_and_the_waits(offloader):
+    release = threading.Event()
+    calls = [asyncio.create_task(offloader.run('slow', release.wait)) for _ in range(3)]
+    await wait_for(lambda: offloader.metrics['slow'].running == 1)
+    await wait_for(lambda: offloader.metrics['slow'].queued == 2)
+
+    assert offloader.get_metrics()['slow']['completed'] == 0
+    await asyncio.sleep(0.1)
+    release.set()
+    await asyncio.gather(*calls)
+
+    metrics = offloader.get_metrics()
+    assert metrics['idle'] == {'queued': 0, 'running': 0, 'completed': 0, 'total_wait_time': 0,
+                               'max_wait_time': 0, 'average_wait_time': 0}
+    slow = metrics['slow']
+    assert (slow['queued'], slow['running'], slow['completed']) == (0, 0, 3)
+    # the first call did not wait, the others waited for at least the 0.1 s the first one was held
+    assert slow['max_wait_time'] >= 0.1
+    assert slow['total_wait_time'] >= 0.2
+    assert slow['average_wait_time'] == pytest.approx(slow['total_wait_time'] / 3)
+
+
+async def test_metrics_are_logged_while_started(offloader, caplog):
+    await offloader.run('slow', lambda: None)
+
+    with caplog.at_level(logging.INFO, logger='src.offload'):
+        await offloader.start()
+        await wait_for(lambda: 'offload idle' in caplog.text)
+        await offloader.stop()
+
+    assert 'offload slow: 0 queued, 0 running, 1 completed' in caplog.text
@@ -0,0 +1,46 @@
+import uuid
+
+import pytest
+
+from src.video.pending_uploads import PendingUploads
+from src.video.shemas import PendingUpload
+
+pytestmark = pytest.mark.anyio
+
+
+def make_upload() -> PendingUpload:
+    return PendingUpload(title='title', description='description', permission='for_everyone', owner=uuid.uuid4())
+
+
+async def test_created_upload_is_not_completed(redis):
+    pending_uploads = PendingUploads(redis)
+    video_id, upload = uuid.uuid4(), make_upload()
+    await pending_uploads.create(video_id, upload)
+
+    assert await pending_uploads.get(video_id) == upload
+
+
+async def test_completed_upload_is_read_back_as_completed(redis):
+    pending_uploads = PendingUploads(redis)
+    video_id, upload = uuid.uuid4(), make_upload()
+    await pending_uploads.create(video_id, upload)
+
+    assert await pending_uploads.complete(video_id)
+    assert not await pending_uploads.complete(video_id)
+    assert await pending_uploads.get(video_id) == upload.copy(update={'completed': True})
+
+
+async def test_failed_upload_keeps_its_reason(redis):
+    pending_uploads = PendingUploads(redis)
+    video_id = uuid.uuid4()
+    await pending_uploads.create(video_id, make_upload())
+    await pending_uploads.complete(video_id)
+    await pending_uploads.fail(video_id, 'not a video')
+
+    upload = await pending_uploads.get(video_id)
+    assert upload.completed
+    assert upload.error == 'not a video'
+
+
+async def test_missing_upload(redis):
+    assert await PendingUploads(redis).get(uuid.uuid4()) is None
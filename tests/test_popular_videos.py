@@ -0,0 +1,50 @@
+import pytest
+
+from src.user.models import User
+from src.video.models import Video, Permission
+from src.video.popularity_ranking import PopularityRanking
+from src.video.video_database_adapter import VideoDatabaseAdapter
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def ranked_videos(db_session, redis, make_user, make_videos):
+    """A ranking of 12 videos, where every third one is private and invisible to other users."""
+    owner = await make_user()
+    videos = await make_videos(owner, 12)
+    for video in videos[::3]:
+        video.permission = Permission.for_myself
+    await db_session.commit()
+    ranking = PopularityRanking(redis)
+    await ranking.update([(video.id, video.owner, video.uploaded_at, 100 - i, 0) for i, video in enumerate(videos)])
+    return ranking, [video.id for video in videos if video.permission == Permission.for_everyone]
+
+
+@pytest.fixture
+def video_manager(db_session, ranked_videos, make_video_manager):
+    ranking, _ = ranked_videos
+    return make_video_manager(video_db=VideoDatabaseAdapter(db_session, Video), ranking=ranking)
+
+
+async def test_offset_pages_are_full_and_do_not_skip_permitted_videos(ranked_videos, video_manager):
+    ranking, visible = ranked_videos
+
+    pages = [await video_manager._get_popular_ranked_videos(ranking.key, [Permission.for_everyone], User(), 3,
+                                                            3 * pagination)
+             for pagination in range(4)]
+
+    assert [len(page) for page in pages] == [3, 3, 2, 0]
+    assert [video.id for page in pages for video in page] == visible
+
+
+async def test_cursor_pages_continue_after_the_last_permitted_video(ranked_videos, video_manager):
+    ranking, visible = ranked_videos
+
+    seen, cursor = [], None
+    while page := await video_manager._get_popular_ranked_videos(ranking.key, [Permission.for_everyone], User(),
+                                                                 3, 0, cursor):
+        seen += [video.id for video in page]
+        cursor = page[-1].cursor
+
+    assert seen == visible
@@ -0,0 +1,130 @@
+from typing import Awaitable, Callable, List, Tuple
+
+import pytest
+from sqlalchemy import event, text
+
+from src.comment.comment_database_adapter import CommentDatabaseAdapter
+from src.comment.models import Comment
+from src.like.like_database_adapter import LikeDatabaseAdapter
+from src.like.models import Like
+from src.subscription.models import Subscription
+from src.subscription.subscription_database_adapter import SubscriptionDatabaseAdapter
+from src.user.models import User
+from src.user.user_database_adapter import UserDatabaseAdapter
+from src.video.models import Video, VideoStats, Permission
+from src.video.video_database_adapter import VideoDatabaseAdapter
+from src.video.video_stats_database_adapter import VideoStatsDatabaseAdapter
+from src.view.models import View
+from src.view.view_database_adapter import ViewDatabaseAdapter
+
+pytestmark = pytest.mark.anyio
+
+viewer_permissions = [Permission.for_everyone, Permission.for_authorized]
+
+
+@pytest.fixture
+async def explain(db_engine, db_session):
+    """
+    Run an adapter call and return the plan of the last select it made.
+
+    Sequential scans are disabled, so the tables do not have to be large for the planner to pick an index,
+    and a query no index fits still falls back to one.
+    """
+    statements: List[Tuple[str, tuple]] = []
+
+    def capture(connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db_engine.sync_engine, 'before_cursor_execute', capture)
+    await db_session.execute(text('SET enable_seqscan = off'))
+
+    async def explain(call: Callable[[], Awaitable]) -> str:
+        statements.clear()
+        await call()
+        statement, parameters = statements[-1]
+        connection = await db_session.connection()
+        plan = await connection.exec_driver_sql(f'EXPLAIN {statement}', parameters)
+        return '\n'.join(row[0] for row in plan)
+
+    yield explain
+    event.remove(db_engine.sync_engine, 'before_cursor_execute', capture)
+
+
+@pytest.fixture
+async def data(db_session, make_user, make_videos):
+    viewer, owner = await make_user(), await make_user()
+    db_session.add(Subscription(subscriber=viewer.id, subscribed=owner.id))
+    video, = await make_videos(owner, 1, Permission.for_subscribers)
+    await db_session.commit()
+    return viewer, owner, video
+
+
+async def test_latest_feed_walks_the_upload_index_and_checks_subscriptions_by_key(db_session, explain, data):
+    viewer, _, _ = data
+    video_db = VideoDatabaseAdapter(db_session, Video)
+
+    plan = await explain(lambda: video_db.get_latest_videos(viewer_permissions, viewer, 20))
+
+    assert 'ix_video_uploaded_at_id' in plan
+    assert 'subscription_pkey' in plan
+
+
+async def test_latest_feed_cursor_uses_the_upload_index(db_session, explain, data):
+    viewer, _, _ = data
+    video_db = VideoDatabaseAdapter(db_session, Video)
+    cursor = (await video_db.get_latest_videos(viewer_permissions, viewer, 1))[0].cursor
+
+    plan = await explain(lambda: video_db.get_latest_videos(viewer_permissions, viewer, 20, cursor=cursor))
+
+    assert 'ix_video_uploaded_at_id' in plan
+
+
+async def test_owner_feed_uses_the_owner_upload_index(db_session, explain, data):
+    viewer, owner, _ = data
+    video_db = VideoDatabaseAdapter(db_session, Video)
+
+    plan = await explain(lambda: video_db.get_latest_user_videos(owner, viewer_permissions, viewer, 20))
+
+    assert 'ix_video_owner_uploaded_at_id' in plan
+
+
+async def test_subscribers_of_an_owner_use_the_subscribed_index(db_session, explain, data):
+    _, owner, _ = data
+    subscription_db = SubscriptionDatabaseAdapter(db_session, Subscription)
+
+    plan = await explain(lambda: subscription_db.get_subscriber_ids(owner.id, 100))
+
+    assert 'ix_subscription_subscribed' in plan
+
+
+async def test_view_queries_use_the_view_indexes(db_session, explain, data):
+    viewer, _, video = data
+    view_db = ViewDatabaseAdapter(db_session, View, VideoStatsDatabaseAdapter(db_session, VideoStats))
+
+    assert 'ix_view_video_id_viewed' in await explain(lambda: view_db.count_video_views(video.id))
+    assert 'ix_view_owner_id_video_id_viewed_at' in await explain(
+        lambda: view_db.get_user_video_views(viewer, video.id))
+    assert 'ix_view_fingerprint_video_id_viewed_at' in await explain(
+        lambda: view_db.get_viewer_video_views('fingerprint', video.id))
+
+
+async def test_like_counts_use_the_video_status_index(db_session, explain, data):
+    _, _, video = data
+    like_db = LikeDatabaseAdapter(db_session, Like, VideoStatsDatabaseAdapter(db_session, VideoStats))
+
+    assert 'ix_like_video_id_status' in await explain(lambda: like_db.count_video_likes(video.id))
+
+
+async def test_video_comments_use_the_video_index(db_session, explain, data):
+    _, _, video = data
+    comment_db = CommentDatabaseAdapter(db_session, Comment, VideoStatsDatabaseAdapter(db_session, VideoStats))
+
+    assert 'ix_comment_video_id' in await explain(lambda: comment_db.get_video_comments(video))
+
+
+async def test_user_lookups_use_the_lower_case_indexes(db_session, explain, data):
+    user_db = UserDatabaseAdapter(db_session, User)
+
+    assert 'ix_user_lower_username' in await explain(lambda: user_db.get_by_username('Someone'))
+    assert 'ix_user_lower_email' in await explain(lambda: user_db.get_by_email('Someone@example.com'))
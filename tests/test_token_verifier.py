@@ -0,0 +1,133 @@
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+
+from src.user.token_verifier import TokenVerifier
+
+secret = 'secret'
+started = time.time()
+
+
+def make_verifier(max_size: int = 100, ttl: int = 60) -> TokenVerifier:
+    return TokenVerifier(secret, None, ['HS256'], None, 0, max_size, ttl)
+
+
+def make_token(**claims) -> str:
+    return jwt.encode({'iss': 'access', 'sub': 'user', **claims}, secret, algorithm='HS256')
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """The time seen by the cache, jwt checks the claims against the real time."""
+    now = [started]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    tokens = []
+    decode = jwt.decode
+
+    def counting_decode(token, *args, **kwargs):
+        tokens.append(token)
+        return decode(token, *args, **kwargs)
+
+    monkeypatch.setattr(jwt, 'decode', counting_decode)
+    return tokens
+
+
+def test_verified_tokens_are_decoded_once(decodes):
+    verifier, token = make_verifier(), make_token()
+
+    assert verifier.verify(token, 'access') == verifier.verify(token, 'access')
+    assert decodes == [token]
+
+
+def test_cached_claims_expire_at_exp(clock, decodes):
+    verifier, token = make_verifier(ttl=60), make_token(exp=int(started) + 10)
+    verifier.verify(token)
+
+    clock[0] = int(started) + 9
+    verifier.verify(token)
+    assert len(decodes) == 1
+
+    clock[0] = int(started) + 10
+    verifier.verify(token)
+    assert len(decodes) == 2
+
+
+def test_cached_claims_expire_after_ttl(clock, decodes):
+    verifier, token = make_verifier(ttl=5), make_token()
+    verifier.verify(token)
+
+    clock[0] = started + 4
+    verifier.verify(token)
+    assert len(decodes) == 1
+
+    clock[0] = started + 5
+    verifier.verify(token)
+    assert len(decodes) == 2
+
+
+def test_least_recently_verified_token_is_evicted(decodes):
+    verifier = make_verifier(max_size=2)
+    first, second, third = [make_token(sub=str(i)) for i in range(3)]
+
+    for token in (first, second, first, third):
+        verifier.verify(token)
+    decodes.clear()
+    for token in (first, third, second):
+        verifier.verify(token)
+
+    assert decodes == [second]
+
+
+def test_issuer_is_checked_on_cached_tokens(decodes):
+    verifier, token, token_without_issuer = make_verifier(), make_token(), make_token(iss=None)
+    verifier.verify(token, 'access')
+    verifier.verify(token_without_issuer)
+
+    with pytest.raises(jwt.InvalidIssuerError):
+        verifier.verify(token, 'refresh')
+    with pytest.raises(jwt.InvalidIssuerError):
+        verifier.verify(token_without_issuer, 'access')
+    assert decodes == [token, token_without_issuer]
+
+
+def test_every_configured_algorithm_is_verified_with_its_own_key():
+    private_key = Ed25519PrivateKey.generate()
+    public_key = private_key.public_key().public_bytes(Encoding.PEM, PublicFormat.SubjectPublicKeyInfo).decode()
+    verifier = TokenVerifier(secret, public_key, ['EdDSA', 'HS256'], None, 0, 100, 60)
+
+    for algorithm, key in (('EdDSA', private_key), ('HS256', secret)):
+        token = jwt.encode({'iss': 'access', 'sub': algorithm}, key, algorithm=algorithm)
+        assert verifier.verify(token, 'access')['sub'] == algorithm
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        verifier.verify(jwt.encode({'iss': 'access'}, secret, algorithm='HS512'), 'access')
+
+
+def rate(verify, tokens) -> float:
+    started = time.perf_counter()
+    for token in tokens:
+        verify(token)
+    return len(tokens) / (time.perf_counter() - started)
+
+
+@pytest.mark.benchmark
+def test_verifier_throughput():
+    tokens = [make_token(sub=str(i)) for i in range(5000)]
+    verifier = make_verifier(max_size=len(tokens))
+    rate(lambda token: jwt.decode(token, secret, algorithms=['HS256']), tokens[:500])
+
+    rates = {
+        'jwt.decode': rate(lambda token: jwt.decode(token, secret, algorithms=['HS256'], issuer='access'), tokens),
+        'uncached': rate(lambda token: verifier.verify(token, 'access'), tokens),
+        'cached': rate(lambda token: verifier.verify(token, 'access'), tokens),
+    }
+
+    assert rates['cached'] > 5 * rates['jwt.decode'], \
+        ', '.join(f'{name}: {tokens_per_second:.0f} tokens/s' for name, tokens_per_second in rates.items())
@@ -0,0 +1,32 @@
+import os
+import uuid
+
+import pytest
+from pymediainfo import MediaInfo
+
+from src.video.exceptions import UploadVideoException
+from src.video.tasks import _validate_upload
+from src.video.video_validator import VideoValidator
+
+pytestmark = [pytest.mark.anyio, pytest.mark.skipif(not MediaInfo.can_parse(), reason='libmediainfo is not installed')]
+
+
+@pytest.fixture
+def head_size(monkeypatch):
+    """A ranged read too short for the index of the video."""
+    monkeypatch.setattr(VideoValidator, 'validation_head_size', 1024)
+
+
+async def test_video_with_its_index_at_the_end_is_downloaded_and_parsed(s3, head_size, moov_at_end_video):
+    video_id = uuid.uuid4()
+    s3.objects[f'videos/{video_id}'] = moov_at_end_video
+
+    assert await _validate_upload(s3, video_id) == 20000
+
+
+async def test_object_that_is_not_a_video_is_rejected(s3, head_size):
+    video_id = uuid.uuid4()
+    s3.objects[f'videos/{video_id}'] = os.urandom(4096)
+
+    with pytest.raises(UploadVideoException):
+        await _validate_upload(s3, video_id)
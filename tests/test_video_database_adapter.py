@@ -0,0 +1,139 @@
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, text, select
+from sqlalchemy.sql.functions import count
+
+from src.like.models import Like
+from src.subscription.models import Subscription
+from src.user.models import User
+from src.video.models import Video, VideoStats, Permission
+from src.video.video_database_adapter import VideoDatabaseAdapter
+
+pytestmark = pytest.mark.anyio
+
+viewer_permissions = [Permission.for_everyone, Permission.for_authorized]
+
+
+@pytest.fixture
+async def feed(db_session, make_user, make_videos):
+    """
+    Videos of every permission by a followed and an unfollowed owner, uploaded at the same few times,
+    and liked by up to three users.
+    """
+    viewer, followed, other = [await make_user() for _ in range(3)]
+    db_session.add(Subscription(subscriber=viewer.id, subscribed=followed.id))
+    videos = []
+    for owner in (followed, other):
+        for permission in Permission:
+            videos += await make_videos(owner, 5, permission)
+    likers = [await make_user() for _ in range(3)]
+    db_session.add_all([Like(status=True, owner_id=liker.id, video_id=video.id)
+                        for i, video in enumerate(videos) for liker in likers[:i % 4]])
+    await db_session.commit()
+
+    visible = [video for video in videos
+               if video.permission in viewer_permissions
+               or video.owner == followed.id and video.permission == Permission.for_subscribers]
+    return viewer, followed, visible, {video.id: i % 4 for i, video in enumerate(videos)}
+
+
+async def page_through(load, limit: int = 4, cursor: bool = True):
+    ids, page_cursor, pagination = [], None, 0
+    while page := await load(limit, limit * pagination, page_cursor):
+        ids += [video.id for video in page]
+        if cursor:
+            page_cursor = page[-1].cursor
+        else:
+            pagination += 1
+    return ids
+
+
+@pytest.mark.parametrize('cursor', [True, False])
+async def test_latest_pages_neither_overlap_nor_skip(db_session, feed, cursor):
+    viewer, _, visible, _ = feed
+    video_db = VideoDatabaseAdapter(db_session, Video)
+
+    ids = await page_through(lambda limit, offset, page_cursor: video_db.get_latest_videos(
+        viewer_permissions, viewer, limit, offset, page_cursor), cursor=cursor)
+
+    assert ids == [video.id for video in sorted(visible, key=lambda video: (video.uploaded_at, video.id),
+                                                reverse=True)]
+
+
+async def test_user_pages_ascend_without_overlap(db_session, feed):
+    viewer, followed, visible, _ = feed
+    video_db = VideoDatabaseAdapter(db_session, Video)
+
+    ids = await page_through(lambda limit, offset, page_cursor: video_db.get_user_videos(
+        followed, viewer_permissions, viewer, limit, offset, page_cursor))
+
+    assert ids == [video.id for video in sorted(visible, key=lambda video: (video.uploaded_at, video.id))
+                   if video.owner == followed.id]
+
+
+@pytest.mark.parametrize('cursor', [True, False])
+async def test_aggregated_pages_neither_overlap_nor_skip(db_session, feed, cursor):
+    viewer, _, visible, likes = feed
+    video_db = VideoDatabaseAdapter(db_session, Video)
+
+    ids = await page_through(lambda limit, offset, page_cursor: video_db.get_liked_by_users(
+        viewer_permissions, viewer, limit, offset, page_cursor), cursor=cursor)
+
+    liked = [video for video in visible if likes[video.id]]
+    assert ids == [video.id for video in sorted(liked, key=lambda video: (likes[video.id], video.id), reverse=True)]
+
+
+async def seed(session, videos: int, subscriptions: int) -> User:
+    """A viewer subscribed to every owner, each with a share of the videos, some only for subscribers."""
+    viewer_id = uuid.uuid4()
+    owner_ids = [uuid.uuid4() for _ in range(subscriptions)]
+    await session.execute(insert(User), [
+        {'id': user_id, 'name': str(user_id)[:32], 'username': str(user_id)[:32], 'email': f'{user_id}@example.com',
+         'hashed_password': '-'} for user_id in [viewer_id] + owner_ids])
+    await session.execute(insert(Subscription), [{'subscriber': viewer_id, 'subscribed': owner_id}
+                                                 for owner_id in owner_ids])
+    video_ids = [uuid.uuid4() for _ in range(videos)]
+    await session.execute(insert(Video), [
+        {'id': video_id, 'title': 'video', 'description': '', 'owner': owner_ids[i % subscriptions],
+         'duration': timedelta(seconds=10), 'uploaded_at': datetime(2026, 1, 1) - timedelta(seconds=i),
+         'permission': Permission.for_subscribers if i % 2 else Permission.for_everyone}
+        for i, video_id in enumerate(video_ids)])
+    await session.execute(insert(VideoStats), [{'video_id': video_id} for video_id in video_ids])
+    await session.commit()
+    await session.execute(text('ANALYZE'))
+    return await session.get(User, viewer_id)
+
+
+async def measure(load, runs: int = 5) -> float:
+    await load()
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await load()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+@pytest.mark.benchmark
+async def test_permission_select_scales_with_videos_not_subscriptions(session_maker):
+    timings = {}
+    for videos, subscriptions in [(5000, 10), (5000, 5000), (20000, 10)]:
+        async with session_maker() as session:
+            await session.execute(text('TRUNCATE "user", video, video_stats, subscription CASCADE'))
+            viewer = await seed(session, videos, subscriptions)
+            video_db = VideoDatabaseAdapter(session, Video)
+
+            # every video is listed exactly once, the subscriptions do not multiply the rows
+            assert len(await video_db.get_latest_videos(viewer_permissions, viewer, videos + 1)) == videos
+            permitted = video_db.get_permission_select(viewer, viewer_permissions).subquery()
+            timings[videos, subscriptions] = await measure(
+                lambda: session.scalar(select(count()).select_from(permitted)))
+    report = ', '.join(f'{videos} videos, {subscriptions} subscriptions: {timing * 1000:.1f} ms'
+                       for (videos, subscriptions), timing in timings.items())
+
+    assert timings[5000, 5000] < 3 * timings[5000, 10], report
+    assert timings[20000, 10] < 4 * 2 * timings[5000, 10], report
@@ -0,0 +1,62 @@
+import uuid
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from src.like.like_database_adapter import LikeDatabaseAdapter
+from src.like.models import Like
+from src.video.models import VideoStats
+from src.video.video_stats_buffer import VideoStatsBuffer
+from src.video.video_stats_database_adapter import VideoStatsDatabaseAdapter
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def buffer(redis):
+    return VideoStatsBuffer(redis, viewers_ttl=3600)
+
+
+async def test_viewers_expire_after_the_last_view(redis, buffer):
+    video_id = uuid.uuid4()
+
+    await buffer.increment(video_id, {'views': 1}, 'viewer')
+
+    assert 0 < await redis.ttl(buffer._viewers_key(video_id)) <= 3600
+
+
+async def test_removed_videos_leave_nothing_behind(redis, buffer):
+    removed, kept = uuid.uuid4(), uuid.uuid4()
+    for video_id in (removed, kept):
+        await buffer.increment(video_id, {'views': 1}, 'viewer')
+
+    await buffer.remove([removed])
+
+    assert await redis.exists(buffer._counters_key(removed), buffer._viewers_key(removed)) == 0
+    assert await redis.smembers(buffer.dirty_key) == {str(kept).encode()}
+    assert await buffer.get_pending([kept]) == {kept: {'views': 1, 'unique_viewers': 1}}
+
+
+async def test_increments_reach_the_buffer_once_committed(db_session, buffer, make_user, make_videos):
+    user = await make_user()
+    video, = await make_videos(user, 1)
+    like_db = LikeDatabaseAdapter(db_session, Like, VideoStatsDatabaseAdapter(db_session, VideoStats, buffer))
+
+    await like_db.create({'video_id': video.id, 'status': True}, user.id)
+
+    assert await buffer.get_pending([video.id]) == {video.id: {'likes': 1, 'unique_viewers': 0}}
+
+
+async def test_rolled_back_increments_are_dropped(db_session, buffer, make_user):
+    user = await make_user()
+    video_stats_db = VideoStatsDatabaseAdapter(db_session, VideoStats, buffer)
+    like_db = LikeDatabaseAdapter(db_session, Like, video_stats_db)
+    missing_video_id = uuid.uuid4()
+
+    with pytest.raises(IntegrityError):
+        await like_db.create({'video_id': missing_video_id, 'status': True}, user.id)
+    await db_session.rollback()
+    await video_stats_db.commit()
+
+    assert await buffer.get_pending([missing_video_id]) == {missing_video_id: {'unique_viewers': 0}}
+    assert await buffer.pop_pending(10) == {}
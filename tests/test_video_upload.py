@@ -0,0 +1,45 @@
+import os
+import uuid
+from io import BytesIO
+
+import pytest
+from fastapi import UploadFile
+from pymediainfo import MediaInfo
+
+import src.video.video_manager
+from src.video.exceptions import UploadVideoException
+from src.video.shemas import VideoUpload
+from src.video.video_validator import VideoValidator
+
+pytestmark = [pytest.mark.anyio, pytest.mark.skipif(not MediaInfo.can_parse(), reason='libmediainfo is not installed')]
+
+
+@pytest.fixture
+def video_content(monkeypatch, moov_at_end_video) -> bytes:
+    """The moov at end video, with a head and parts small enough for its index to be outside the first ones."""
+    monkeypatch.setattr(VideoValidator, 'validation_head_size', 1024)
+    monkeypatch.setattr(src.video.video_manager, 'UPLOAD_PART_SIZE', 1024)
+    return moov_at_end_video
+
+
+def make_upload(content: bytes) -> VideoUpload:
+    return VideoUpload(title='video', description='', permission='for_everyone',
+                       video_file=UploadFile(BytesIO(content), filename='video.mp4'), preview_file=None)
+
+
+async def test_video_with_its_index_at_the_end_is_parsed_in_full(s3, make_video_manager, video_content):
+    assert not MediaInfo.parse(BytesIO(video_content[:1024])).video_tracks
+    video_id = uuid.uuid4()
+
+    duration = await make_video_manager(s3=s3)._upload_streaming(make_upload(video_content), video_id)
+
+    assert duration == 20000
+    assert s3.objects[f'videos/{video_id}'] == video_content
+
+
+async def test_file_that_is_not_a_video_is_rejected_and_not_stored(s3, make_video_manager, video_content):
+    with pytest.raises(UploadVideoException):
+        await make_video_manager(s3=s3)._upload_streaming(make_upload(os.urandom(4096)), uuid.uuid4())
+
+    assert s3.objects == {}
+    assert s3.multipart_uploads == {}